@@ -17,6 +17,13 @@ DEFAULTS = {
     "sales_user_targets_mode": "Scoped",
     "sales_manager_targets_mode": "All",
     "annual_financing_rate": 18,
+    "default_holiday_list": "",
+    "use_sales_fact_rollup": 0,
+    "enable_dashboard_cache": 1,
+    "dashboard_cache_ttl": 300,
+    "use_invoice_snapshot": 0,
+    "instrument_dashboard_apis": 0,
+    "persist_dashboard_api_metrics": 0,
 }
 
 ROLE_FIELDS = {
@@ -155,6 +162,45 @@ def get_annual_financing_rate() -> float:
     return rate
 
 
+def get_default_holiday_list() -> str:
+    settings = get_access_settings()
+    return settings.get("default_holiday_list") or ""
+
+
+def use_sales_fact_rollup() -> bool:
+    settings = get_access_settings()
+    return bool(int(settings.get("use_sales_fact_rollup") or 0))
+
+
+def dashboard_cache_enabled() -> bool:
+    settings = get_access_settings()
+    return bool(int(settings.get("enable_dashboard_cache") or 0))
+
+
+def get_dashboard_cache_ttl() -> int:
+    settings = get_access_settings()
+    try:
+        ttl = int(settings.get("dashboard_cache_ttl") or 300)
+    except (TypeError, ValueError):
+        ttl = 300
+    return max(ttl, 1)
+
+
+def use_invoice_snapshot() -> bool:
+    settings = get_access_settings()
+    return bool(int(settings.get("use_invoice_snapshot") or 0))
+
+
+def instrument_dashboard_apis() -> bool:
+    settings = get_access_settings()
+    return bool(int(settings.get("instrument_dashboard_apis") or 0))
+
+
+def persist_dashboard_api_metrics() -> bool:
+    settings = get_access_settings()
+    return bool(int(settings.get("persist_dashboard_api_metrics") or 0))
+
+
 @frappe.whitelist()
 def reset_access_defaults():
     """Reset access settings to safe defaults and apply to workspaces."""
@@ -0,0 +1,257 @@
+import time
+
+import frappe
+from croniter import croniter
+from frappe.utils import now_datetime
+
+from sales_performance_dashboard.api import company_dashboard_api as company_api
+from sales_performance_dashboard.api import department_dashboard_api as department_api
+from sales_performance_dashboard.api.access_settings import dashboard_cache_enabled
+from sales_performance_dashboard.api.dashboard_cache import (
+    COMPANY_POSTING_SCOPE,
+    bump_posted_scopes,
+    has_posted_scopes,
+    pop_posted_scopes,
+    publish_shared_versions,
+    stage_shared_versions,
+)
+from sales_performance_dashboard.sales_performance_dashboard.dashboard_chart_source.department_forecasted_revenue import (
+    department_forecasted_revenue as forecasted_revenue,
+)
+from sales_performance_dashboard.sales_performance_dashboard.dashboard_chart_source.department_sales_order_trend import (
+    department_sales_order_trend as sales_order_trend,
+)
+
+VIEW_MODES = ("Daily", "Monthly", "Quarterly", "Yearly")
+WARM_STATS_KEY = "sales_performance_dashboard:cache_warmer_stats"
+POSTED_WARM_STATS_KEY = "sales_performance_dashboard:cache_warmer_posted_stats"
+WARM_JOB_ID = "sales_performance_dashboard:warm_dashboard_caches"
+POSTED_WARM_JOB_ID = "sales_performance_dashboard:warm_posted_scopes"
+# Same schedule as enqueue_dashboard_warm in hooks.py.
+WARM_CRON = "30 6 * * *"
+# Warmed entries outlive the next scheduled warm by this much, covering its run time.
+WARM_TTL_MARGIN_SEC = 60 * 60
+
+
+def enqueue_dashboard_warm():
+    """Scheduled entry point: run the warm on the long queue, once at a time."""
+    frappe.enqueue(
+        "sales_performance_dashboard.api.cache_warmer.warm_dashboard_caches",
+        queue="long",
+        job_id=WARM_JOB_ID,
+        deduplicate=True,
+    )
+
+
+def enqueue_posted_warm():
+    """Scheduled every minute: re-warm the scopes postings touched, once at a time."""
+    if has_posted_scopes():
+        frappe.enqueue(
+            "sales_performance_dashboard.api.cache_warmer.warm_posted_scopes",
+            queue="long",
+            job_id=POSTED_WARM_JOB_ID,
+            deduplicate=True,
+        )
+
+
+def warm_dashboard_caches():
+    """Precompute department and company payloads into the dashboard cache.
+
+    Arguments mirror what the dashboard blocks send, so the first manager to
+    open a page gets a cache hit. Payloads are built under a staged cache
+    version that is published once the run ends, so a re-warm replaces the
+    previous generation in one step. They are kept until the next scheduled
+    warm; postings in between re-warm their departments (`warm_posted_scopes`).
+    Returns (and stores) build time per payload.
+    """
+    if not dashboard_cache_enabled():
+        return None
+
+    payloads = []
+    for department in get_warm_departments():
+        payloads.extend(_department_payloads(department))
+    payloads.extend(_company_payloads())
+
+    stats = _warm(payloads)
+    frappe.cache().set_value(WARM_STATS_KEY, stats)
+    return stats
+
+
+def warm_posted_scopes():
+    """Rebuild the departments and company view that postings invalidated.
+
+    Scopes are taken off the queue filled by the posting hooks, so postings
+    arriving meanwhile wait for the next run. Departments that are not
+    tracked are only invalidated.
+    """
+    scopes = pop_posted_scopes()
+    if not scopes or not dashboard_cache_enabled():
+        return None
+
+    tracked = set(get_warm_departments())
+    warm_scopes = [scope for scope in scopes if scope == COMPANY_POSTING_SCOPE or scope in tracked]
+    bump_posted_scopes(set(scopes) - set(warm_scopes))
+
+    payloads = []
+    for scope in warm_scopes:
+        payloads.extend(_company_payloads() if scope == COMPANY_POSTING_SCOPE else _department_payloads(scope))
+
+    stats = _warm(payloads, posted_scopes=warm_scopes)
+    frappe.cache().set_value(POSTED_WARM_STATS_KEY, stats)
+    return stats
+
+
+def _warm(payloads, posted_scopes=None):
+    started = time.monotonic()
+    built = []
+    failed = 0
+    stage_shared_versions(posted_scopes)
+    frappe.flags.spd_cache_ttl = _seconds_until_next_warm() + WARM_TTL_MARGIN_SEC
+    try:
+        for label, fn, kwargs in payloads:
+            payload_started = time.monotonic()
+            try:
+                fn(**kwargs)
+            except Exception:
+                failed += 1
+                frappe.log_error(title=f"Dashboard cache warm failed: {label}")
+                continue
+            built.append({"payload": label, "ms": round((time.monotonic() - payload_started) * 1000, 2)})
+    finally:
+        frappe.flags.spd_cache_ttl = None
+        published = publish_shared_versions()
+
+    stats = {
+        "scopes": posted_scopes,
+        "payloads": len(built),
+        "failed": failed,
+        "published": published,
+        "duration_ms": round((time.monotonic() - started) * 1000, 2),
+        "slowest": sorted(built, key=lambda row: row["ms"], reverse=True)[:10],
+        "built": built,
+        "ran_at": str(now_datetime()),
+    }
+    frappe.logger("sales_performance_dashboard").info(
+        f"Dashboard cache warm{' (postings)' if posted_scopes is not None else ''}: "
+        f"{stats['payloads']} payloads, {failed} failed in {stats['duration_ms']}ms"
+    )
+    return stats
+
+
+def _seconds_until_next_warm():
+    now = now_datetime()
+    return int((croniter(WARM_CRON, now).get_next(type(now)) - now).total_seconds())
+
+
+def get_warm_stats(posted=False):
+    return frappe.cache().get_value(POSTED_WARM_STATS_KEY if posted else WARM_STATS_KEY)
+
+
+def get_warm_departments():
+    tracked = department_api._tracked_departments()
+    existing = set(frappe.get_all("Department", filters={"name": ("in", tracked)}, pluck="name"))
+    return [department for department in tracked if department in existing]
+
+
+def _department_payloads(department):
+    payloads = [
+        (f"{department}: kpis", department_api.get_department_kpis, {"department": department}),
+        (
+            f"{department}: kpis (7d risk)",
+            department_api.get_department_kpis,
+            {"department": department, "risk_window_days": 7},
+        ),
+        (
+            f"{department}: gross margin trend",
+            department_api.get_department_gross_margin_trend,
+            {"department": department, "months": 12},
+        ),
+        (
+            f"{department}: payment delay cost",
+            department_api.get_department_payment_delay_cost,
+            {"department": department, "top_limit": 6},
+        ),
+        (
+            f"{department}: top customers",
+            department_api.get_department_top_customers_table,
+            {"department": department, "limit": 5},
+        ),
+        (
+            f"{department}: project delivery health",
+            department_api.get_department_project_delivery_health,
+            {"department": department, "limit": 5},
+        ),
+        (
+            f"{department}: forecasted revenue",
+            forecasted_revenue.get_data_for_custom,
+            {"department": department},
+        ),
+    ]
+    for view_mode in VIEW_MODES:
+        payloads.extend(
+            [
+                (
+                    f"{department}: discount leakage ({view_mode})",
+                    department_api.get_department_discount_leakage_dashboard,
+                    {"department": department, "view_mode": view_mode, "limit": 8, "table_limit": 100},
+                ),
+                (
+                    f"{department}: pipeline coverage ({view_mode})",
+                    department_api.get_department_weighted_pipeline_coverage,
+                    {"department": department, "view_mode": view_mode},
+                ),
+                (
+                    f"{department}: project finance ({view_mode})",
+                    department_api.get_department_project_status_finance,
+                    {"department": department, "view_mode": view_mode},
+                ),
+                (
+                    f"{department}: target slippage ({view_mode})",
+                    department_api.get_department_target_slippage,
+                    {"department": department, "slippage_mode": view_mode},
+                ),
+                (
+                    f"{department}: sales order trend ({view_mode})",
+                    sales_order_trend.get_data_for_custom,
+                    {"department": department, "view_mode": view_mode},
+                ),
+            ]
+        )
+    return payloads
+
+
+def _company_payloads():
+    payloads = []
+    for view_mode in VIEW_MODES:
+        filters = {"company": "", "department": "", "view_mode": view_mode}
+        with_source = {**filters, "lead_source": ""}
+        payloads.extend(
+            [
+                (f"company: pipeline overview ({view_mode})", company_api.get_company_pipeline_overview, with_source),
+                (f"company: revenue by source ({view_mode})", company_api.get_company_revenue_by_source, with_source),
+                (
+                    f"company: pipeline coverage ({view_mode})",
+                    company_api.get_company_weighted_pipeline_coverage,
+                    with_source,
+                ),
+                (f"company: deal conversion ({view_mode})", company_api.get_company_deal_conversion_rate, with_source),
+                (f"company: revenue waterfall ({view_mode})", company_api.get_company_revenue_waterfall, filters),
+                (f"company: gross margin trend ({view_mode})", company_api.get_company_gross_margin_trend, filters),
+                (
+                    f"company: payment delay cost ({view_mode})",
+                    company_api.get_company_payment_delay_cost,
+                    {**filters, "top_limit": 6},
+                ),
+                (
+                    f"company: target slippage ({view_mode})",
+                    company_api.get_company_target_slippage,
+                    {**filters, "slippage_mode": view_mode},
+                ),
+                (
+                    f"company: project finance ({view_mode})",
+                    company_api.get_company_project_status_finance,
+                    filters,
+                ),
+            ]
+        )
+    return payloads
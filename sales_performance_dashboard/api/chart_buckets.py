@@ -0,0 +1,83 @@
+import bisect
+
+import frappe
+from frappe.utils import flt, getdate
+
+
+def month_start_sql(column):
+    """SQL expression truncating a date column to the first day of its month."""
+    return f"DATE_SUB({column}, INTERVAL DAYOFMONTH({column}) - 1 DAY)"
+
+
+def bins_span(bins):
+    """(first start, last end) covered by a list of (start, end, ...) bins."""
+    return min(getdate(b[0]) for b in bins), max(getdate(b[1]) for b in bins)
+
+
+def scatter_into_bins(rows, bins, value_fields, date_field="bucket_date"):
+    """Sum rows grouped by date into (start, end, ...) bins; returns {field: [value per bin]}.
+
+    Bins must not overlap. Rows whose date falls outside every bin are ignored.
+    """
+    totals = {field: [0.0] * len(bins) for field in value_fields}
+    if not bins:
+        return totals
+
+    order = sorted(range(len(bins)), key=lambda idx: getdate(bins[idx][0]))
+    starts = [getdate(bins[idx][0]) for idx in order]
+    ends = [getdate(bins[idx][1]) for idx in order]
+
+    for row in rows:
+        row_date = row.get(date_field)
+        if not row_date:
+            continue
+        row_date = getdate(row_date)
+        pos = bisect.bisect_right(starts, row_date) - 1
+        if pos < 0 or row_date > ends[pos]:
+            continue
+        idx = order[pos]
+        for field in value_fields:
+            totals[field][idx] += flt(row.get(field))
+    return totals
+
+
+def bucket_case_sql(column, buckets, prefix="bucket"):
+    """CASE expression mapping a date column to the index of its (start, end, ...) bucket."""
+    clauses = []
+    params = {}
+    for idx, bucket in enumerate(buckets):
+        clauses.append(f"WHEN {column} BETWEEN %({prefix}_{idx}_from)s AND %({prefix}_{idx}_to)s THEN {idx}")
+        params[f"{prefix}_{idx}_from"] = getdate(bucket[0])
+        params[f"{prefix}_{idx}_to"] = getdate(bucket[1])
+    return f"CASE {' '.join(clauses)} END", params
+
+
+def aggregate_by_bucket(buckets, date_column, select_sql, from_sql, where_sql, params, value_fields):
+    """Aggregate every bucket in one CASE/GROUP BY scan; returns {field: [value per bucket]}.
+
+    `select_sql` holds the aggregate expressions aliased to `value_fields`.
+    """
+    totals = {field: [0.0] * len(buckets) for field in value_fields}
+    if not buckets:
+        return totals
+
+    case_sql, case_params = bucket_case_sql(date_column, buckets)
+    from_date, to_date = bins_span(buckets)
+    rows = frappe.db.sql(
+        f"""
+        SELECT {case_sql} AS bucket_idx, {select_sql}
+        {from_sql}
+        WHERE {date_column} BETWEEN %(bucket_from)s AND %(bucket_to)s
+          AND {where_sql}
+        GROUP BY bucket_idx
+        """,
+        {**params, **case_params, "bucket_from": from_date, "bucket_to": to_date},
+        as_dict=True,
+    )
+    for row in rows:
+        if row.bucket_idx is None:
+            continue
+        idx = int(row.bucket_idx)
+        for field in value_fields:
+            totals[field][idx] += flt(row.get(field))
+    return totals
@@ -2,11 +2,17 @@
 
 import frappe
 from frappe.utils import add_days, add_months, cint, flt, get_first_day, get_last_day, getdate, nowdate
-from collections import defaultdict
-from sales_performance_dashboard.api.access_settings import get_annual_financing_rate
+from sales_performance_dashboard.api.access_settings import get_annual_financing_rate, use_sales_fact_rollup
+from sales_performance_dashboard.api.chart_buckets import aggregate_by_bucket
+from sales_performance_dashboard.api.dashboard_cache import dashboard_cached
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL, get_demo_names
+from sales_performance_dashboard.api.department_membership import get_department_membership
+from sales_performance_dashboard.api.instrumentation import instrumented
+from sales_performance_dashboard.api.payment_delay import build_payment_delay_payload, get_overdue_aging
+from sales_performance_dashboard.api.sales_facts import get_fact_totals_by_bucket
+from sales_performance_dashboard.api.sales_funnel import FUNNEL_STAGES, get_sales_funnel
 
 
-DEMO_PATTERN = "SPD-DEMO-%"
 
 
 def _view_range(view_mode, reference_date):
@@ -37,21 +43,15 @@ def _source_field():
 def _owner_users_for_department(department):
     if not department:
         return []
-    rows = frappe.get_all(
-        "Employee",
-        filters={"department": department, "status": ["!=", "Left"]},
-        fields=["user_id"],
-        limit=5000,
-    )
-    return [r.user_id for r in rows if r.user_id]
+    return get_department_membership(department).user_ids
 
 
 def _invoice_conditions(company=None, department=None, from_date=None, to_date=None):
     where = [
         "si.docstatus = 1",
-        "si.customer NOT LIKE %(demo)s",
+        f"si.customer NOT IN ({DEMO_NAMES_SQL})",
     ]
-    params = {"demo": DEMO_PATTERN}
+    params = {}
 
     if from_date and to_date:
         where.append("si.posting_date BETWEEN %(from_date)s AND %(to_date)s")
@@ -80,7 +80,7 @@ def _opportunity_filters(company=None, department=None, view_mode="Monthly", ref
 
     filters = {
         "docstatus": ["<", 2],
-        "name": ["not like", DEMO_PATTERN],
+        "name": ["not in", get_demo_names()],
         "creation": ["between", [start_date, end_date]],
     }
 
@@ -126,6 +126,7 @@ def _funnel_bucket(status):
 
 
 @frappe.whitelist()
+@instrumented
 def get_company_filter_options():
     companies = frappe.get_all("Company", pluck="name", order_by="name asc")
 
@@ -164,6 +165,7 @@ def get_company_filter_options():
 
 
 @frappe.whitelist()
+@instrumented
 def get_company_dashboard_preview(company=None, department=None, reference_date=None):
     """Minimal placeholder payload for first phase wiring checks."""
     return {
@@ -176,6 +178,8 @@ def get_company_dashboard_preview(company=None, department=None, reference_date=
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("company")
 def get_company_pipeline_overview(
     company=None,
     department=None,
@@ -191,8 +195,12 @@ def get_company_pipeline_overview(
         lead_source=lead_source,
     )
 
-    funnel_labels = ["Lead", "Opportunity", "Quotation", "Customer", "Sales Order", "Delivery Note", "Sales Invoice"]
-    zero_funnel = {"labels": funnel_labels, "values": [0] * len(funnel_labels)}
+    funnel_labels = list(FUNNEL_STAGES)
+    zero_funnel = {
+        "labels": funnel_labels,
+        "values": [0] * len(funnel_labels),
+        "conversion": [0] * (len(funnel_labels) - 1),
+    }
     status_labels = ["Open", "Won", "Lost", "Other"]
 
     if empty_scope:
@@ -212,144 +220,32 @@ def get_company_pipeline_overview(
             "deal_status": {"labels": status_labels, "values": [0, 0, 0, 0]},
         }
 
-    users_tuple = tuple(owner_users) if owner_users else ()
-    source_field = _source_field()
-
-    def _field_exists(doctype, fieldname):
-        return frappe.get_meta(doctype).has_field(fieldname)
-
-    # Lead stage
-    lead_filters = [
-        ["name", "not like", DEMO_PATTERN],
-        ["lead_name", "not like", DEMO_PATTERN],
-        ["creation", "between", [start_date, end_date]],
-    ]
-    if users_tuple:
-        lead_filters.append(["owner", "in", users_tuple])
-    if lead_source and _field_exists("Lead", "source"):
-        lead_filters.append(["source", "=", lead_source])
-
-    lead_names = frappe.get_all("Lead", filters=lead_filters, pluck="name", limit=50000)
-    lead_count = len(lead_names)
-
-    # Opportunity stage (from leads in current scope)
-    opportunity_count = 0
-    if lead_names:
-        opp_filters = [
-            ["name", "not like", DEMO_PATTERN],
-            ["party_name", "not like", DEMO_PATTERN],
-            ["creation", "between", [start_date, end_date]],
-            ["opportunity_from", "=", "Lead"],
-            ["party_name", "in", tuple(lead_names)],
-        ]
-        if users_tuple:
-            opp_filters.append(["owner", "in", users_tuple])
-        if company and _field_exists("Opportunity", "company"):
-            opp_filters.append(["company", "=", company])
-        if lead_source and source_field and _field_exists("Opportunity", source_field):
-            opp_filters.append([source_field, "=", lead_source])
-
-        opportunity_count = frappe.db.count("Opportunity", filters=opp_filters)
-
-    # Customer stage (converted from scoped leads)
-    customer_names = []
-    if lead_names:
-        customer_filters = [
-            ["name", "not like", DEMO_PATTERN],
-            ["customer_name", "not like", DEMO_PATTERN],
-            ["creation", "between", [start_date, end_date]],
-            ["lead_name", "in", tuple(lead_names)],
-        ]
-        if users_tuple:
-            customer_filters.append(["owner", "in", users_tuple])
-        customer_names = frappe.get_all("Customer", filters=customer_filters, pluck="name", limit=50000)
-    customer_count = len(customer_names)
-
-    # Quotation / Sales Order / Delivery Note / Sales Invoice stages
-    quotation_count = 0
-    sales_order_count = 0
-    delivery_note_count = 0
-    sales_invoice_count = 0
-    if customer_names:
-        customer_tuple = tuple(customer_names)
-
-        quotation_filters = [
-            ["docstatus", "=", 1],
-            ["party_name", "in", customer_tuple],
-            ["party_name", "not like", DEMO_PATTERN],
-            ["transaction_date", "between", [start_date, end_date]],
-        ]
-        if users_tuple:
-            quotation_filters.append(["owner", "in", users_tuple])
-        if company and _field_exists("Quotation", "company"):
-            quotation_filters.append(["company", "=", company])
-        quotation_count = frappe.db.count("Quotation", filters=quotation_filters)
-
-        so_filters = [
-            ["docstatus", "=", 1],
-            ["customer", "in", customer_tuple],
-            ["customer", "not like", DEMO_PATTERN],
-            ["transaction_date", "between", [start_date, end_date]],
-        ]
-        if users_tuple:
-            so_filters.append(["owner", "in", users_tuple])
-        if company and _field_exists("Sales Order", "company"):
-            so_filters.append(["company", "=", company])
-        sales_order_count = frappe.db.count("Sales Order", filters=so_filters)
-
-        dn_filters = [
-            ["docstatus", "=", 1],
-            ["customer", "in", customer_tuple],
-            ["customer", "not like", DEMO_PATTERN],
-            ["posting_date", "between", [start_date, end_date]],
-        ]
-        if users_tuple:
-            dn_filters.append(["owner", "in", users_tuple])
-        if company and _field_exists("Delivery Note", "company"):
-            dn_filters.append(["company", "=", company])
-        delivery_note_count = frappe.db.count("Delivery Note", filters=dn_filters)
-
-        si_filters = [
-            ["docstatus", "=", 1],
-            ["customer", "in", customer_tuple],
-            ["customer", "not like", DEMO_PATTERN],
-            ["posting_date", "between", [start_date, end_date]],
-        ]
-        if users_tuple:
-            si_filters.append(["owner", "in", users_tuple])
-        if company and _field_exists("Sales Invoice", "company"):
-            si_filters.append(["company", "=", company])
-        sales_invoice_count = frappe.db.count("Sales Invoice", filters=si_filters)
-
-    rows = frappe.get_all(
-        "Opportunity",
-        filters=filters,
-        fields=["status"],
-        limit=20000,
+    funnel = get_sales_funnel(
+        owner_users=owner_users or None,
+        company=company,
+        from_date=start_date,
+        to_date=end_date,
+        lead_source=lead_source,
     )
 
     status_counts = {k: 0 for k in status_labels}
-
-    for row in rows:
-        status = row.get("status")
-        status_key = _status_bucket(status)
+    for row in frappe.get_all(
+        "Opportunity",
+        filters=filters,
+        fields=["status", "count(name) as count"],
+        group_by="status",
+    ):
+        status_key = _status_bucket(row.get("status"))
         if status_key in status_counts:
-            status_counts[status_key] += 1
+            status_counts[status_key] += cint(row.get("count"))
 
     return {
         "from_date": str(start_date),
         "to_date": str(end_date),
         "funnel": {
             "labels": funnel_labels,
-            "values": [
-                lead_count,
-                opportunity_count,
-                quotation_count,
-                customer_count,
-                sales_order_count,
-                delivery_note_count,
-                sales_invoice_count,
-            ],
+            "values": funnel.counts,
+            "conversion": funnel.conversion,
         },
         "deal_status": {
             "labels": status_labels,
@@ -467,6 +363,8 @@ def _company_scope_target(company=None, department=None, view_mode="Monthly", re
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("company")
 def get_company_revenue_by_source(
     company=None,
     department=None,
@@ -516,6 +414,8 @@ def get_company_revenue_by_source(
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("company")
 def get_company_weighted_pipeline_coverage(
     company=None,
     department=None,
@@ -579,6 +479,8 @@ def get_company_weighted_pipeline_coverage(
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("company")
 def get_company_deal_conversion_rate(
     company=None,
     department=None,
@@ -640,6 +542,8 @@ def get_company_deal_conversion_rate(
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("company")
 def get_company_revenue_waterfall(
     company=None,
     department=None,
@@ -770,33 +674,32 @@ def _departments_for_gross_margin():
     return [r.department for r in rows if r.get("department")]
 
 
-def _company_gross_margin_for_period(company, department, from_date, to_date):
-    where_sql, params = _invoice_conditions(
-        company=company,
-        department=department,
-        from_date=from_date,
-        to_date=to_date,
-    )
-    row = frappe.db.sql(
-        f"""
-        SELECT
+def _company_gross_margin_by_bucket(company, department, buckets):
+    where_sql, params = _invoice_conditions(company=company, department=department)
+    totals = aggregate_by_bucket(
+        buckets,
+        date_column="si.posting_date",
+        select_sql="""
             COALESCE(SUM(sii.base_net_amount), 0) AS sales,
             COALESCE(SUM(IFNULL(sii.stock_qty, 0) * IFNULL(sii.incoming_rate, 0)), 0) AS cogs
+        """,
+        from_sql="""
         FROM `tabSales Invoice` si
         INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
-        WHERE {where_sql}
         """,
-        params,
-        as_dict=True,
+        where_sql=where_sql,
+        params=params,
+        value_fields=("sales", "cogs"),
     )
-    sales = flt((row[0] or {}).get("sales", 0)) if row else 0
-    cogs = flt((row[0] or {}).get("cogs", 0)) if row else 0
-    if sales <= 0:
-        return 0.0
-    return round(((sales - cogs) / sales) * 100, 2)
+    values = []
+    for sales, cogs in zip(totals["sales"], totals["cogs"], strict=True):
+        values.append(round(((sales - cogs) / sales) * 100, 2) if sales > 0 else 0.0)
+    return values
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("company")
 def get_company_gross_margin_trend(
     company=None,
     department=None,
@@ -810,21 +713,29 @@ def get_company_gross_margin_trend(
     # - if department is selected, that department trend
     # - otherwise, overall company trend
     series_name = department or "Total"
-    values = []
-    for start_date, end_date, _ in buckets:
-        values.append(
-            _company_gross_margin_for_period(
-                company=company,
-                department=department or None,
-                from_date=start_date,
-                to_date=end_date,
-            )
+    if use_sales_fact_rollup():
+        totals = get_fact_totals_by_bucket(
+            buckets,
+            ("net_amount", "cogs"),
+            company=company,
+            owner_users=_owner_users_for_department(department) if department else None,
+            exclude_demo=True,
         )
+        values = []
+        for row in totals:
+            sales = flt(row["net_amount"])
+            cogs = flt(row["cogs"])
+            values.append(round(((sales - cogs) / sales) * 100, 2) if sales > 0 else 0.0)
+        return {"labels": labels, "datasets": [{"name": series_name, "values": values}]}
+
+    values = _company_gross_margin_by_bucket(company, department or None, buckets)
 
     return {"labels": labels, "datasets": [{"name": series_name, "values": values}]}
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("company")
 def get_company_payment_delay_cost(
     company=None,
     department=None,
@@ -850,118 +761,13 @@ def get_company_payment_delay_cost(
         to_date=None,
     )
 
-    rows = frappe.db.sql(
-        f"""
-        SELECT
-            si.name AS invoice,
-            si.customer,
-            si.outstanding_amount,
-            si.due_date,
-            DATEDIFF(%(as_of)s, si.due_date) AS days_overdue
-        FROM `tabSales Invoice` si
-        WHERE {where_sql}
-          AND si.outstanding_amount > 0
-          AND si.due_date IS NOT NULL
-          AND si.due_date < %(as_of)s
-        """,
-        {**params, "as_of": as_of},
-        as_dict=True,
-    )
-
-    if not rows:
-        return {
-            "as_of": str(as_of),
-            "annual_financing_rate": round(annual_financing_rate, 2),
-            "overdue_outstanding": 0,
-            "estimated_delay_cost": 0,
-            "cost_pct_of_overdue": 0,
-            "daily_financing_cost": 0,
-            "avg_overdue_days": 0,
-            "buckets": [
-                {"label": "0-30", "amount": 0, "cost": 0, "count": 0},
-                {"label": "31-60", "amount": 0, "cost": 0, "count": 0},
-                {"label": "61-90", "amount": 0, "cost": 0, "count": 0},
-                {"label": "90+", "amount": 0, "cost": 0, "count": 0},
-            ],
-            "top_customers": [],
-        }
-
-    rate_per_day = annual_financing_rate / 100 / 365
-    buckets = {
-        "0-30": {"label": "0-30", "amount": 0.0, "cost": 0.0, "count": 0},
-        "31-60": {"label": "31-60", "amount": 0.0, "cost": 0.0, "count": 0},
-        "61-90": {"label": "61-90", "amount": 0.0, "cost": 0.0, "count": 0},
-        "90+": {"label": "90+", "amount": 0.0, "cost": 0.0, "count": 0},
-    }
-    customer_cost = defaultdict(lambda: {"amount": 0.0, "cost": 0.0, "count": 0})
-
-    overdue_outstanding = 0.0
-    estimated_delay_cost = 0.0
-    weighted_days = 0.0
-
-    for row in rows:
-        amount = flt(row.outstanding_amount)
-        days = max(cint(row.days_overdue), 0)
-        cost = amount * rate_per_day * days
-        overdue_outstanding += amount
-        estimated_delay_cost += cost
-        weighted_days += (amount * days)
-
-        if days <= 30:
-            key = "0-30"
-        elif days <= 60:
-            key = "31-60"
-        elif days <= 90:
-            key = "61-90"
-        else:
-            key = "90+"
-
-        buckets[key]["amount"] += amount
-        buckets[key]["cost"] += cost
-        buckets[key]["count"] += 1
-
-        customer = row.customer or "Unknown"
-        customer_cost[customer]["amount"] += amount
-        customer_cost[customer]["cost"] += cost
-        customer_cost[customer]["count"] += 1
-
-    avg_overdue_days = (weighted_days / overdue_outstanding) if overdue_outstanding > 0 else 0
-    daily_financing_cost = overdue_outstanding * rate_per_day
-    cost_pct_of_overdue = (estimated_delay_cost / overdue_outstanding * 100) if overdue_outstanding > 0 else 0
-
-    bucket_rows = [buckets["0-30"], buckets["31-60"], buckets["61-90"], buckets["90+"]]
-    for b in bucket_rows:
-        b["amount"] = round(b["amount"], 2)
-        b["cost"] = round(b["cost"], 2)
-
-    top_customers = []
-    for customer, agg in customer_cost.items():
-        top_customers.append(
-            {
-                "customer": customer,
-                "amount": round(agg["amount"], 2),
-                "cost": round(agg["cost"], 2),
-                "count": int(agg["count"]),
-                "cost_pct": round((agg["cost"] / estimated_delay_cost * 100), 2) if estimated_delay_cost > 0 else 0,
-            }
-        )
-    top_customers.sort(key=lambda d: d["cost"], reverse=True)
-    top_customers = top_customers[:top_limit]
-
-    return {
-        "as_of": str(as_of),
-        "annual_financing_rate": round(annual_financing_rate, 2),
-        "overdue_outstanding": round(overdue_outstanding, 2),
-        "estimated_delay_cost": round(estimated_delay_cost, 2),
-        "cost_pct_of_overdue": round(cost_pct_of_overdue, 2),
-        "daily_financing_cost": round(daily_financing_cost, 2),
-        "avg_overdue_days": round(avg_overdue_days, 1),
-        "buckets": bucket_rows,
-        "top_customers": top_customers,
-    }
+    buckets, customers = get_overdue_aging(where_sql, params, as_of, top_limit)
+    return build_payment_delay_payload(as_of, annual_financing_rate, buckets, customers)
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("company")
 def get_company_target_slippage(
     company=None,
     department=None,
@@ -1048,6 +854,8 @@ def get_company_target_slippage(
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("company")
 def get_company_project_status_finance(
     company=None,
     department=None,
@@ -1117,12 +925,11 @@ def get_company_project_status_finance(
 
     period_invoice_where = [
         "si.docstatus = 1",
-        "si.customer NOT LIKE %(demo)s",
+        f"si.customer NOT IN ({DEMO_NAMES_SQL})",
         "si.posting_date BETWEEN %(from_date)s AND %(to_date)s",
         "(si.project IN %(projects)s OR EXISTS (SELECT 1 FROM `tabSales Invoice Item` sii WHERE sii.parent = si.name AND sii.project IN %(projects)s))",
     ]
     period_invoice_params = {
-        "demo": DEMO_PATTERN,
         "from_date": from_date,
         "to_date": to_date,
         "projects": tuple(project_names),
@@ -1149,11 +956,11 @@ def get_company_project_status_finance(
 
     outstanding_where = [
         "si.docstatus = 1",
-        "si.customer NOT LIKE %(demo)s",
+        f"si.customer NOT IN ({DEMO_NAMES_SQL})",
         "si.outstanding_amount > 0",
         "(si.project IN %(projects)s OR EXISTS (SELECT 1 FROM `tabSales Invoice Item` sii WHERE sii.parent = si.name AND sii.project IN %(projects)s))",
     ]
-    outstanding_params = {"demo": DEMO_PATTERN, "projects": tuple(project_names)}
+    outstanding_params = {"projects": tuple(project_names)}
     if company:
         outstanding_where.append("si.company = %(company)s")
         outstanding_params["company"] = company
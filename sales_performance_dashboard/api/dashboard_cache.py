@@ -0,0 +1,374 @@
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import time
+from collections import OrderedDict
+
+import frappe
+from frappe.utils import cint, cstr, getdate, nowdate
+
+from sales_performance_dashboard.api.access_settings import dashboard_cache_enabled, get_dashboard_cache_ttl
+
+VERSION_KEY = "sales_performance_dashboard:cache_version"
+LOCK_KEY = "sales_performance_dashboard:cache_lock"
+STATS_KEY = "sales_performance_dashboard:cache_stats"
+STATS_FIELDS = ("hits", "misses", "waits")
+LOCK_TTL_SEC = 30
+LOCK_WAIT_SEC = 5
+LOCK_POLL_SEC = 0.05
+RESULT_KEY = "sales_performance_dashboard:dashboard_result"
+LOCAL_CACHE_MAX_ENTRIES = 256
+SHARED_NAMESPACES = ("department", "company")
+SHARED_SCOPE = "all"
+# Company results change with any posting; department results with their own.
+COMPANY_POSTING_SCOPE = "postings"
+POSTED_SCOPES_KEY = "sales_performance_dashboard:posted_scopes"
+
+# Process-wide LRU in front of Redis: {key: (expires_at, value)}.
+_local_results = OrderedDict()
+
+
+def get_version(namespace, scope=""):
+    """Current version token of a cache scope; cached keys embed it."""
+    return frappe.cache().get_value(f"{VERSION_KEY}:{namespace}:{scope}") or "0"
+
+
+def bump_versions(namespace, scopes):
+    """Invalidate every key cached under the scopes once the transaction commits."""
+    scopes = {scope for scope in scopes if scope}
+    if not scopes:
+        return
+
+    def bump():
+        for scope in scopes:
+            frappe.cache().set_value(f"{VERSION_KEY}:{namespace}:{scope}", frappe.generate_hash(length=10))
+
+    frappe.db.after_commit.add(bump)
+
+
+def get_or_compute(key, compute, expires_in_sec=300, namespace="default"):
+    """Read `key` from Redis or compute it, letting only one worker compute at a time.
+
+    Workers that miss while another holds the lock wait for its value instead
+    of running the same queries; they compute themselves after LOCK_WAIT_SEC.
+    """
+    cache = frappe.cache()
+    value = cache.get_value(key)
+    if value is not None:
+        _count(namespace, "hits")
+        return value
+
+    _count(namespace, "misses")
+    lock_key = f"{LOCK_KEY}:{key}"
+    if not cache.set(cache.make_key(lock_key), 1, nx=True, ex=LOCK_TTL_SEC):
+        _count(namespace, "waits")
+        deadline = time.monotonic() + LOCK_WAIT_SEC
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SEC)
+            value = cache.get_value(key)
+            if value is not None:
+                return value
+        return compute()
+
+    try:
+        value = compute()
+        cache.set_value(key, value, expires_in_sec=expires_in_sec)
+        return value
+    finally:
+        cache.delete_value(lock_key)
+
+
+def get_cache_stats(namespace="default"):
+    cache = frappe.cache()
+    return {
+        field: cint(cache.get(cache.make_key(f"{STATS_KEY}:{namespace}:{field}")))
+        for field in STATS_FIELDS
+    }
+
+
+def reset_cache_stats(namespace="default"):
+    frappe.cache().delete_value([f"{STATS_KEY}:{namespace}:{field}" for field in STATS_FIELDS])
+
+
+def _count(namespace, field):
+    # Plain integer counters (not pickled) so INCR stays atomic across workers.
+    cache = frappe.cache()
+    cache.incr(cache.make_key(f"{STATS_KEY}:{namespace}:{field}"))
+
+
+def dashboard_cached(namespace, expires_in_sec=None):
+    """Cache a dashboard endpoint's result, keyed by its normalized arguments.
+
+    Entries live in Redis (TTL from settings, or `frappe.flags.spd_cache_ttl`
+    while warming) behind a bounded in-process LRU and are invalidated by
+    bumping the namespace version. Disabled by the settings toggle,
+    `frappe.flags.spd_no_cache` or a `spd_no_cache` request arg.
+    """
+
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _shared_cache_active():
+                return fn(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = _result_key(namespace, fn, bound.arguments)
+            ttl = frappe.flags.spd_cache_ttl or expires_in_sec or get_dashboard_cache_ttl()
+
+            value = _local_get(key)
+            if value is not None:
+                _count(namespace, "hits")
+                return copy.deepcopy(value)
+
+            value = get_or_compute(key, lambda: fn(*args, **kwargs), expires_in_sec=ttl, namespace=namespace)
+            _local_set(key, value, ttl)
+            return copy.deepcopy(value)
+
+        return wrapper
+
+    return decorator
+
+
+def bump_shared_versions(doc=None, method=None, *args):
+    """Invalidate every cached department and company dashboard result.
+
+    Wired to membership and target changes, which reshape whole dashboards;
+    postings only invalidate their own departments (see `mark_posted_departments`).
+    """
+    for namespace in SHARED_NAMESPACES:
+        bump_versions(namespace, [SHARED_SCOPE])
+
+
+def get_shared_version(namespace, scope=SHARED_SCOPE):
+    """Version shared results are keyed on; the generation being warmed while one is staged."""
+    staged = frappe.flags.spd_staged_versions
+    if staged and (namespace, scope) in staged["versions"]:
+        return staged["versions"][(namespace, scope)]
+    return get_version(namespace, scope)
+
+
+def get_department_version(department):
+    """Version a department's results are keyed on: shared generation plus its posting scope."""
+    return f"{get_shared_version('department')}.{get_shared_version('department', department)}"
+
+
+def mark_posted_departments(departments):
+    """Queue departments (and the company view) touched by a posting for a refresh.
+
+    Applied after commit and coalesced: the warmer picks the queue up once a
+    minute (`pop_posted_scopes`) however many postings hit a scope.
+    """
+    departments = {department for department in departments if department}
+
+    def mark():
+        frappe.cache().sadd(POSTED_SCOPES_KEY, COMPANY_POSTING_SCOPE, *departments)
+
+    frappe.db.after_commit.add(mark)
+
+
+def has_posted_scopes():
+    return bool(frappe.cache().smembers(POSTED_SCOPES_KEY))
+
+
+def pop_posted_scopes():
+    cache = frappe.cache()
+    scopes = [_decode(scope) for scope in cache.smembers(POSTED_SCOPES_KEY) or []]
+    if scopes:
+        cache.srem(POSTED_SCOPES_KEY, *scopes)
+    return scopes
+
+
+def bump_posted_scopes(scopes):
+    """Invalidate queued scopes right away instead of re-warming them."""
+    cache = frappe.cache()
+    for scope in scopes:
+        cache.set_value(f"{VERSION_KEY}:{':'.join(_posted_scope_key(scope))}", frappe.generate_hash(length=10))
+
+
+def stage_shared_versions(posted_scopes=None):
+    """Make `dashboard_cached` read and write a fresh generation until it is published.
+
+    Keys under the new versions all miss, so the warmer recomputes every payload
+    without dropping what users are served in the meantime. With `posted_scopes`
+    only those departments (or the company view) get a new generation.
+    """
+    if posted_scopes is None:
+        scopes = [(namespace, SHARED_SCOPE) for namespace in SHARED_NAMESPACES]
+    else:
+        scopes = [_posted_scope_key(scope) for scope in posted_scopes]
+
+    frappe.flags.spd_staged_versions = {
+        "base": {namespace: get_version(namespace, SHARED_SCOPE) for namespace in SHARED_NAMESPACES},
+        "versions": {scope: frappe.generate_hash(length=10) for scope in scopes},
+    }
+
+
+def publish_shared_versions():
+    """Switch readers to the staged generation; skipped if a bump happened meanwhile."""
+    staged = frappe.flags.spd_staged_versions
+    frappe.flags.spd_staged_versions = None
+    if not staged:
+        return False
+
+    current = {namespace: get_version(namespace, SHARED_SCOPE) for namespace in SHARED_NAMESPACES}
+    if current != staged["base"]:
+        # Membership or targets changed while warming; the staged payloads predate it.
+        return False
+
+    for (namespace, scope), version in staged["versions"].items():
+        frappe.cache().set_value(f"{VERSION_KEY}:{namespace}:{scope}", version)
+    return True
+
+
+def _shared_cache_active():
+    if frappe.flags.spd_no_cache or cint((frappe.form_dict or {}).get("spd_no_cache")):
+        return False
+    return dashboard_cache_enabled()
+
+
+def _result_key(namespace, fn, arguments):
+    normalized = {name: _normalize_arg(value) for name, value in arguments.items()}
+    if "reference_date" in normalized:
+        # Blank means today; pages usually send today's date explicitly.
+        normalized["reference_date"] = str(getdate(normalized["reference_date"] or nowdate()))
+    digest = hashlib.md5(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    version = get_shared_version(namespace)
+    posting_scope = _posting_scope(namespace, normalized)
+    if posting_scope:
+        version = f"{version}.{get_shared_version(namespace, posting_scope)}"
+    # The date keeps "reference_date=None" results from outliving the day.
+    return f"{RESULT_KEY}:{namespace}:{version}:{fn.__module__}.{fn.__name__}:{nowdate()}:{digest}"
+
+
+def _posted_scope_key(scope):
+    return ("company", scope) if scope == COMPANY_POSTING_SCOPE else ("department", scope)
+
+
+def _posting_scope(namespace, normalized):
+    if namespace == "company":
+        return COMPANY_POSTING_SCOPE
+    if namespace == "department":
+        return normalized.get("department")
+    return None
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _normalize_arg(value):
+    if value is None:
+        return ""
+    if isinstance(value, list | tuple | set):
+        return sorted(_normalize_arg(item) for item in value)
+    if isinstance(value, dict):
+        return {cstr(key): _normalize_arg(item) for key, item in value.items()}
+    return cstr(value).strip()
+
+
+def _local_get(key):
+    key = (frappe.local.site, key)
+    entry = _local_results.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        _local_results.pop(key, None)
+        return None
+    _local_results.move_to_end(key)
+    return entry[1]
+
+
+def _local_set(key, value, ttl):
+    _local_results[(frappe.local.site, key)] = (time.monotonic() + ttl, value)
+    _local_results.move_to_end((frappe.local.site, key))
+    while len(_local_results) > LOCAL_CACHE_MAX_ENTRIES:
+        _local_results.popitem(last=False)
+
+
+# Personal dashboard invalidation: versions are per user.
+
+PERSONAL_NAMESPACE = "personal"
+
+
+def bump_personal_versions(users):
+    bump_versions(PERSONAL_NAMESPACE, users)
+
+
+def bump_sales_invoice_users(doc, method=None):
+    """Invoice owner plus the users behind its Sales Team, and their departments."""
+    employees = _voucher_employees(doc)
+    bump_personal_versions({doc.owner, *(row.user_id for row in employees if row.user_id)})
+    mark_posted_departments(row.department for row in employees)
+
+
+def mark_sales_order_departments(doc, method=None):
+    mark_posted_departments(row.department for row in _voucher_employees(doc))
+
+
+def _voucher_employees(doc):
+    """Employees behind a voucher's owner and Sales Team."""
+    sales_persons = [row.sales_person for row in doc.get("sales_team") or [] if row.sales_person]
+    return frappe.db.sql(
+        """
+        SELECT e.user_id, e.department
+        FROM `tabEmployee` e
+        WHERE e.user_id = %(owner)s
+           OR e.name IN (
+               SELECT sp.employee FROM `tabSales Person` sp WHERE sp.name IN %(sales_persons)s
+           )
+        """,
+        {"owner": doc.owner, "sales_persons": tuple(sales_persons) or ("",)},
+        as_dict=True,
+    )
+
+
+def bump_payment_entry_users(doc, method=None):
+    """Payment owner (collected) plus owners of the allocated invoices (outstanding), and their departments."""
+    users = {doc.owner}
+    invoices = [
+        row.reference_name
+        for row in doc.get("references") or []
+        if row.reference_doctype == "Sales Invoice" and row.reference_name
+    ]
+    departments = []
+    if invoices:
+        users.update(frappe.get_all("Sales Invoice", filters={"name": ("in", invoices)}, pluck="owner"))
+        departments = frappe.get_all(
+            "Sales Attribution",
+            filters={"voucher_type": "Sales Invoice", "voucher_no": ("in", invoices)},
+            pluck="department",
+            distinct=True,
+        )
+    bump_personal_versions(users)
+    mark_posted_departments(departments)
+
+
+def bump_employee_versions(employees):
+    employees = [employee for employee in employees if employee]
+    if employees:
+        bump_personal_versions(
+            frappe.get_all("Employee", filters={"name": ("in", employees)}, pluck="user_id")
+        )
+
+
+def bump_sales_target_users(doc, method=None):
+    if doc.get("target_level") == "Individual":
+        bump_employee_versions([doc.get("employee")])
+
+
+def bump_owner_version(doc, method=None):
+    """Opportunity, Lead, Customer, Appointment and Project metrics are scoped by owner."""
+    bump_personal_versions([doc.owner])
+    mark_posted_departments(frappe.get_all("Employee", filters={"user_id": doc.owner}, pluck="department"))
+
+
+def bump_task_project_owner(doc, method=None):
+    """Delivery health counts tasks under the project owner's department."""
+    owner = doc.project and frappe.db.get_value("Project", doc.project, "owner")
+    if owner:
+        mark_posted_departments(frappe.get_all("Employee", filters={"user_id": owner}, pluck="department"))
@@ -0,0 +1,104 @@
+import hashlib
+
+import frappe
+
+DEMO_DOCTYPE = "Sales Demo Record"
+# The one definition of demo data: "DEMO" in any case in the record's name or title.
+DEMO_MARKER = "DEMO"
+DEMO_TITLE_FIELDS = {
+    "Customer": "customer_name",
+    "Lead": "lead_name",
+    "Opportunity": "party_name",
+}
+DEMO_NAMES_CACHE_KEY = "sales_performance_dashboard:demo_names"
+
+# Anti-join used by dashboard SQL: `<party column> NOT IN ({DEMO_NAMES_SQL})`.
+# Registered names are looked up through the reference_name index instead of
+# scanning every row's text with a leading-wildcard LIKE.
+DEMO_NAMES_SQL = f"SELECT demo.reference_name FROM `tab{DEMO_DOCTYPE}` demo"
+
+
+def is_demo(name, title=None):
+    return any(DEMO_MARKER in (value or "").upper() for value in (name, title))
+
+
+def get_demo_names():
+    """Registered demo names, for frappe.get_all `not in` filters."""
+    return frappe.cache().get_value(
+        DEMO_NAMES_CACHE_KEY,
+        lambda: frappe.get_all(DEMO_DOCTYPE, pluck="reference_name", distinct=True),
+    ) or []
+
+
+def not_demo_filter(fieldname):
+    return [fieldname, "not in", get_demo_names()]
+
+
+def not_demo_route_filter():
+    """List-view route option on the marker; keeps routes small instead of listing every demo name."""
+    return ["not like", f"%{DEMO_MARKER}%"]
+
+
+def sync_demo_record(doc, method=None, *args):
+    """Keep the registry in step with a Customer, Lead or Opportunity."""
+    title_field = DEMO_TITLE_FIELDS.get(doc.doctype)
+    if not title_field:
+        return
+
+    if method == "after_rename":
+        old_name = args[0] if args else None
+        if old_name:
+            _delete_demo_record(doc.doctype, old_name)
+
+    if method != "on_trash" and is_demo(doc.name, doc.get(title_field)):
+        _insert_demo_record(doc.doctype, doc.name)
+    else:
+        _delete_demo_record(doc.doctype, doc.name)
+
+
+def backfill_demo_records():
+    """Register every existing demo Customer, Lead and Opportunity (one scan per DocType)."""
+    for doctype, title_field in DEMO_TITLE_FIELDS.items():
+        frappe.db.sql(
+            f"""
+            INSERT IGNORE INTO `tab{DEMO_DOCTYPE}`
+                (name, creation, modified, modified_by, owner, docstatus, idx, reference_doctype, reference_name)
+            SELECT
+                MD5(CONCAT_WS('|', %(doctype)s, t.name)),
+                NOW(), NOW(), 'Administrator', 'Administrator', 0, 0, %(doctype)s, t.name
+            FROM `tab{doctype}` t
+            WHERE INSTR(UPPER(t.name), %(marker)s) > 0
+               OR INSTR(UPPER(IFNULL(t.`{title_field}`, '')), %(marker)s) > 0
+            """,
+            {"doctype": doctype, "marker": DEMO_MARKER},
+        )
+    _clear_demo_names()
+
+
+def _insert_demo_record(doctype, name):
+    frappe.db.sql(
+        f"""
+        INSERT IGNORE INTO `tab{DEMO_DOCTYPE}`
+            (name, creation, modified, modified_by, owner, docstatus, idx, reference_doctype, reference_name)
+        VALUES (%(key)s, NOW(), NOW(), %(user)s, %(user)s, 0, 0, %(doctype)s, %(name)s)
+        """,
+        {"key": _record_key(doctype, name), "user": frappe.session.user, "doctype": doctype, "name": name},
+    )
+    _clear_demo_names()
+
+
+def _delete_demo_record(doctype, name):
+    frappe.db.sql(
+        f"DELETE FROM `tab{DEMO_DOCTYPE}` WHERE name = %(key)s",
+        {"key": _record_key(doctype, name)},
+    )
+    _clear_demo_names()
+
+
+def _record_key(doctype, name):
+    # Same key as the backfill's MD5(CONCAT_WS('|', doctype, name)).
+    return hashlib.md5(f"{doctype}|{name}".encode()).hexdigest()
+
+
+def _clear_demo_names():
+    frappe.cache().delete_value(DEMO_NAMES_CACHE_KEY)
@@ -1,15 +1,22 @@
 # -*- coding: utf-8 -*-
 
+import heapq
 from collections import defaultdict
 from datetime import timedelta
 
 import frappe
 from frappe.utils import add_months, cint, date_diff, flt, get_first_day, get_last_day, getdate, nowdate
 
-from sales_performance_dashboard.api.access_settings import get_annual_financing_rate
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
+from sales_performance_dashboard.api.access_settings import get_annual_financing_rate, use_sales_fact_rollup
+from sales_performance_dashboard.api.chart_buckets import aggregate_by_bucket
+from sales_performance_dashboard.api.dashboard_cache import dashboard_cached
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.department_membership import get_department_membership
+from sales_performance_dashboard.api.instrumentation import instrumented, timed_pass
+from sales_performance_dashboard.api.invoice_snapshot import get_invoice_snapshot
+from sales_performance_dashboard.api.payment_delay import build_payment_delay_payload, get_overdue_aging
+from sales_performance_dashboard.api.sales_attribution import attributed_voucher_condition
+from sales_performance_dashboard.api.sales_facts import get_fact_totals, get_fact_totals_by_bucket
 
 
 def _tracked_departments():
@@ -27,43 +34,14 @@ def _tracked_departments():
 
 
 def _get_department_context(department):
-    employees = frappe.get_all(
-        "Employee",
-        filters={"department": department, "status": ["!=", "Left"]},
-        fields=["name", "user_id"],
-    )
-    employee_ids = [row.name for row in employees if row.name]
-    user_ids = [row.user_id for row in employees if row.user_id]
-    return employee_ids, user_ids
-
-
-def _build_sales_invoice_condition(employee_ids, user_ids):
-    clauses = []
-    params = {}
-
-    if employee_ids:
-        clauses.append(
-            """
-            EXISTS (
-                SELECT 1
-                FROM `tabSales Team` st
-                INNER JOIN `tabSales Person` sp ON sp.name = st.sales_person
-                WHERE st.parenttype = 'Sales Invoice'
-                  AND st.parent = si.name
-                  AND sp.employee IN %(employee_ids)s
-            )
-            """
-        )
-        params["employee_ids"] = tuple(employee_ids)
+    members = get_department_membership(department)
+    return members.employee_ids, members.user_ids
 
-    if user_ids:
-        clauses.append("si.owner IN %(user_ids)s")
-        params["user_ids"] = tuple(user_ids)
-
-    if not clauses:
-        return "1 = 0", params
 
-    return "(" + " OR ".join(clauses) + ")", params
+def _build_sales_invoice_condition(employee_ids):
+    # Owner matches are covered by the Owner rows of Sales Attribution, so a
+    # single semi-join on employee replaces the Sales Team EXISTS + owner OR.
+    return attributed_voucher_condition("si", "Sales Invoice", employee_ids)
 
 
 def _sum_value(query, params):
@@ -74,7 +52,6 @@ def _sum_value(query, params):
 def _sum_department_collected(
     si_condition,
     si_dynamic,
-    demo_pattern,
     from_date,
     to_date,
 ):
@@ -87,12 +64,11 @@ def _sum_department_collected(
         WHERE per.reference_doctype = 'Sales Invoice'
           AND pe.docstatus = 1
           AND si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND pe.posting_date BETWEEN %(from_date)s AND %(to_date)s
           AND {si_condition}
         """,
         {
-            "demo": demo_pattern,
             "from_date": from_date,
             "to_date": to_date,
             **si_dynamic,
@@ -112,7 +88,6 @@ def _month_bins(reference_date, months=12):
 def _sum_department_revenue(
     si_condition,
     si_dynamic,
-    demo_pattern,
     from_date,
     to_date,
 ):
@@ -121,12 +96,11 @@ def _sum_department_revenue(
         SELECT COALESCE(SUM(si.grand_total), 0) AS value
         FROM `tabSales Invoice` si
         WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
           AND {si_condition}
         """,
         {
-            "demo": demo_pattern,
             "from_date": from_date,
             "to_date": to_date,
             **si_dynamic,
@@ -134,6 +108,29 @@ def _sum_department_revenue(
     )
 
 
+def _get_department_fact_metrics(
+    department,
+    month_start,
+    month_end,
+    rolling_3m_start,
+    week_start,
+    week_end,
+):
+    scope = {"department": department, "exclude_demo": True}
+    month = get_fact_totals(month_start, month_end, **scope)
+    rolling_3m = get_fact_totals(rolling_3m_start, month_end, **scope)
+    week = get_fact_totals(week_start, week_end, **scope)
+    return {
+        "revenue": flt(month.get("revenue")),
+        "collected": flt(month.get("collected")),
+        "rolling_3m_invoiced": flt(rolling_3m.get("revenue")),
+        "rolling_3m_collected": flt(rolling_3m.get("collected")),
+        "total_invoices": int(round(flt(month.get("invoice_count")))),
+        "customers_served_week": int(week.get("customers") or 0),
+        "customers_served_month": int(month.get("customers") or 0),
+    }
+
+
 def _get_department_monthly_target(department, as_of_date):
     department_target = _sum_value(
         """
@@ -210,6 +207,7 @@ def _get_department_yearly_target(department, as_of_date):
 
 
 @frappe.whitelist()
+@instrumented
 def get_department_sales_target_route(department=None):
     if not department:
         return {
@@ -237,6 +235,8 @@ def get_department_sales_target_route(department=None):
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_department_weighted_pipeline_coverage(department=None, view_mode="Monthly", reference_date=None):
     if not department:
         return {
@@ -250,25 +250,23 @@ def get_department_weighted_pipeline_coverage(department=None, view_mode="Monthl
 
     ref = getdate(reference_date or nowdate())
     mode = (view_mode or "Monthly").strip().title()
-    demo_pattern = PersonalSalesDashboard().demo_pattern
 
     employee_ids, user_ids = _get_department_context(department)
     users_tuple = tuple(user_ids) if user_ids else ()
 
     if users_tuple:
         row = frappe.db.sql(
-            """
+            f"""
             SELECT COALESCE(SUM(IFNULL(opportunity_amount, 0) * IFNULL(probability, 0) / 100), 0) AS value
             FROM `tabOpportunity`
             WHERE owner IN %(user_ids)s
               AND status NOT IN ('Converted', 'Lost')
-              AND name NOT LIKE %(demo)s
-              AND party_name NOT LIKE %(demo)s
+              AND name NOT IN ({DEMO_NAMES_SQL})
+              AND party_name NOT IN ({DEMO_NAMES_SQL})
               AND creation <= %(reference_date)s
             """,
             {
                 "user_ids": users_tuple,
-                "demo": demo_pattern,
                 "reference_date": ref,
             },
             as_dict=True,
@@ -309,6 +307,8 @@ def get_department_weighted_pipeline_coverage(department=None, view_mode="Monthl
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_department_target_slippage(
     department=None,
     slippage_mode="Monthly",
@@ -353,13 +353,11 @@ def get_department_target_slippage(
         # Monthly slippage compares full-month collection against monthly target.
         effective_ref = period_end
 
-    employee_ids, user_ids = _get_department_context(department)
-    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids, user_ids)
-    demo_pattern = PersonalSalesDashboard().demo_pattern
+    employee_ids = get_department_membership(department).employee_ids
+    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids)
     actual_by_today = _sum_department_collected(
         si_condition=si_condition,
         si_dynamic=si_dynamic,
-        demo_pattern=demo_pattern,
         from_date=period_start,
         to_date=effective_ref,
     )
@@ -404,6 +402,7 @@ def get_department_target_slippage(
 
 
 @frappe.whitelist()
+@instrumented
 def get_department_options():
     tracked = set(_tracked_departments())
     all_departments = frappe.get_all(
@@ -421,7 +420,31 @@ def get_department_options():
     return tracked_existing + others
 
 
+def _department_margin_by_bucket(bins, si_condition, si_dynamic):
+    return aggregate_by_bucket(
+        bins,
+        date_column="si.posting_date",
+        select_sql="""
+            COALESCE(SUM(sii.base_net_amount), 0) AS sales,
+            COALESCE(SUM(IFNULL(sii.stock_qty, 0) * IFNULL(sii.incoming_rate, 0)), 0) AS cogs
+        """,
+        from_sql="""
+        FROM `tabSales Invoice` si
+        INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
+        """,
+        where_sql=f"""
+            si.docstatus = 1
+            AND si.customer NOT IN ({DEMO_NAMES_SQL})
+            AND {si_condition}
+        """,
+        params=si_dynamic,
+        value_fields=("sales", "cogs"),
+    )
+
+
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_department_gross_margin_trend(department=None, reference_date=None, months=12):
     months = cint(months) if months else 12
     months = max(6, min(months, 24))
@@ -430,44 +453,40 @@ def get_department_gross_margin_trend(department=None, reference_date=None, mont
     if not department:
         return {"labels": [], "datasets": [{"name": "Gross Margin %", "values": []}]}
 
-    employee_ids, user_ids = _get_department_context(department)
-    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids, user_ids)
+    if use_sales_fact_rollup():
+        bins = _month_bins(ref_date, months)
+        totals = get_fact_totals_by_bucket(
+            bins,
+            ("net_amount", "cogs"),
+            department=department,
+            exclude_demo=True,
+        )
+        values = []
+        for row in totals:
+            sales = flt(row["net_amount"])
+            cogs = flt(row["cogs"])
+            values.append(round(((sales - cogs) / sales) * 100, 2) if sales > 0 else 0)
+        return {
+            "labels": [label for _, _, label in bins],
+            "datasets": [{"name": "Gross Margin %", "values": values}],
+        }
+
+    employee_ids = get_department_membership(department).employee_ids
+    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids)
     if si_condition == "1 = 0":
         labels = [label for _, _, label in _month_bins(ref_date, months)]
         return {"labels": labels, "datasets": [{"name": "Gross Margin %", "values": [0] * len(labels)}]}
 
-    demo = PersonalSalesDashboard().demo_pattern
-    labels = []
+    bins = _month_bins(ref_date, months)
+    snapshot = get_invoice_snapshot(department, si_condition, si_dynamic, from_date=bins[0][0])
+    if snapshot is not None:
+        totals = snapshot.margin_by_bucket(bins)
+    else:
+        totals = _department_margin_by_bucket(bins, si_condition, si_dynamic)
+    labels = [label for _, _, label in bins]
     values = []
-
-    for start, end, label in _month_bins(ref_date, months):
-        row = frappe.db.sql(
-            f"""
-            SELECT
-                COALESCE(SUM(sii.base_net_amount), 0) AS sales,
-                COALESCE(SUM(IFNULL(sii.stock_qty, 0) * IFNULL(sii.incoming_rate, 0)), 0) AS cogs
-            FROM `tabSales Invoice` si
-            INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
-            WHERE si.docstatus = 1
-              AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
-              AND si.customer NOT LIKE %(demo)s
-              AND {si_condition}
-            """,
-            {
-                "from_date": start,
-                "to_date": end,
-                "demo": demo,
-                **si_dynamic,
-            },
-            as_dict=True,
-        )
-
-        sales = flt((row[0] or {}).get("sales", 0)) if row else 0
-        cogs = flt((row[0] or {}).get("cogs", 0)) if row else 0
-        gross_margin_pct = round(((sales - cogs) / sales) * 100, 2) if sales > 0 else 0
-
-        labels.append(label)
-        values.append(gross_margin_pct)
+    for sales, cogs in zip(totals["sales"], totals["cogs"], strict=True):
+        values.append(round(((sales - cogs) / sales) * 100, 2) if sales > 0 else 0)
 
     return {
         "labels": labels,
@@ -487,15 +506,9 @@ def _get_period_range(view_mode, reference_date):
     return start, end
 
 
-def _get_department_invoice_leakage_rows(department, from_date, to_date):
-    demo_pattern = PersonalSalesDashboard().demo_pattern
-    employee_ids, user_ids = _get_department_context(department)
-    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids, user_ids)
-    if si_condition == "1 = 0":
-        return []
-
-    rows = frappe.db.sql(
-        f"""
+def _leakage_invoice_sql(si_condition):
+    """Per-invoice list and billed value in the period; the base of every leakage rollup."""
+    return f"""
         SELECT
             si.name AS invoice,
             si.posting_date,
@@ -506,40 +519,60 @@ def _get_department_invoice_leakage_rows(department, from_date, to_date):
         FROM `tabSales Invoice` si
         INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
         WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
           AND {si_condition}
         GROUP BY si.name, si.posting_date, si.customer, si.owner
-        ORDER BY si.posting_date ASC
+    """
+
+
+def _get_department_invoice_leakage_rows(department, from_date, to_date, limit=None):
+    employee_ids = get_department_membership(department).employee_ids
+    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids)
+    if si_condition == "1 = 0":
+        return []
+
+    order_sql = "ORDER BY si.posting_date ASC"
+    if limit:
+        # Largest leakage first, so callers can fetch just the table rows.
+        order_sql = f"""
+        ORDER BY GREATEST(
+            COALESCE(SUM(IFNULL(sii.base_price_list_rate, 0) * IFNULL(sii.qty, 0)), 0)
+            - COALESCE(SUM(IFNULL(sii.base_net_amount, 0)), 0),
+            0
+        ) DESC
+        LIMIT {cint(limit)}
+        """
+
+    rows = frappe.db.sql(
+        f"""
+        {_leakage_invoice_sql(si_condition)}
+        {order_sql}
         """,
         {
-            "demo": demo_pattern,
             "from_date": from_date,
             "to_date": to_date,
             **si_dynamic,
         },
         as_dict=True,
     )
+    return [_leakage_row(row) for row in rows]
 
-    out = []
-    for row in rows:
-        list_value = flt(row.list_value)
-        billed_value = flt(row.billed_value)
-        leakage = max(0.0, list_value - billed_value)
-        leakage_pct = round((leakage / list_value) * 100, 2) if list_value > 0 else 0
-        out.append(
-            {
-                "invoice": row.invoice,
-                "posting_date": row.posting_date,
-                "customer": row.customer,
-                "owner": row.owner,
-                "list_value": list_value,
-                "billed_value": billed_value,
-                "leakage": leakage,
-                "leakage_pct": leakage_pct,
-            }
-        )
-    return out
+
+def _leakage_row(row):
+    list_value = flt(row.list_value)
+    billed_value = flt(row.billed_value)
+    leakage = max(0.0, list_value - billed_value)
+    return {
+        "invoice": row.invoice,
+        "posting_date": row.posting_date,
+        "customer": row.customer,
+        "owner": row.owner,
+        "list_value": list_value,
+        "billed_value": billed_value,
+        "leakage": leakage,
+        "leakage_pct": round((leakage / list_value) * 100, 2) if list_value > 0 else 0,
+    }
 
 
 def _get_invoice_rep_shares(invoice_names):
@@ -586,9 +619,8 @@ def _get_invoice_rep_shares(invoice_names):
 
 def _get_department_item_group_leakage(department, from_date, to_date, limit=8):
     limit = max(3, min(cint(limit) if limit else 8, 20))
-    demo_pattern = PersonalSalesDashboard().demo_pattern
-    employee_ids, user_ids = _get_department_context(department)
-    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids, user_ids)
+    employee_ids = get_department_membership(department).employee_ids
+    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids)
     if si_condition == "1 = 0":
         return []
 
@@ -601,7 +633,7 @@ def _get_department_item_group_leakage(department, from_date, to_date, limit=8):
         FROM `tabSales Invoice` si
         INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
         WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
           AND {si_condition}
         GROUP BY COALESCE(NULLIF(sii.item_group, ''), 'Uncategorized')
@@ -612,7 +644,6 @@ def _get_department_item_group_leakage(department, from_date, to_date, limit=8):
         LIMIT {limit}
         """,
         {
-            "demo": demo_pattern,
             "from_date": from_date,
             "to_date": to_date,
             **si_dynamic,
@@ -637,136 +668,33 @@ def _get_department_item_group_leakage(department, from_date, to_date, limit=8):
     return out
 
 
-@frappe.whitelist()
-def get_department_discount_leakage_dashboard(
-    department=None,
-    view_mode="Monthly",
-    reference_date=None,
-    limit=10,
-    table_limit=30,
-):
-    limit = max(3, min(cint(limit) if limit else 10, 25))
-    table_limit = max(10, min(cint(table_limit) if table_limit else 30, 100))
-    if not department:
-        return {
-            "kpis": {
-                "leakage_amount": 0,
-                "leakage_pct": 0,
-                "net_realization_pct": 0,
-                "avg_discount_pct": 0,
-            },
-            "top_reps": [],
-            "top_customers": [],
-            "item_groups": [],
-            "trend": {"labels": [], "amount": [], "pct": []},
-            "waterfall": {"labels": ["List Price", "Discount Leakage", "Actual Billed"], "values": [0, 0, 0]},
-            "table": [],
-            "total_leakage": 0,
-        }
-
-    from_date, to_date = _get_period_range(view_mode, reference_date)
-    rows = _get_department_invoice_leakage_rows(department, from_date, to_date)
-    if not rows:
-        return {
-            "kpis": {
-                "leakage_amount": 0,
-                "leakage_pct": 0,
-                "net_realization_pct": 0,
-                "avg_discount_pct": 0,
-            },
-            "top_reps": [],
-            "top_customers": [],
-            "item_groups": [],
-            "trend": {"labels": [], "amount": [], "pct": []},
-            "waterfall": {"labels": ["List Price", "Discount Leakage", "Actual Billed"], "values": [0, 0, 0]},
-            "table": [],
-            "total_leakage": 0,
-        }
-
-    invoice_names = [r["invoice"] for r in rows]
-    rep_shares = _get_invoice_rep_shares(invoice_names)
-
-    total_list = sum(r["list_value"] for r in rows)
-    total_billed = sum(r["billed_value"] for r in rows)
-    total_leakage = sum(r["leakage"] for r in rows)
-    leakage_pct = round((total_leakage / total_list) * 100, 2) if total_list > 0 else 0
-    net_realization_pct = round((total_billed / total_list) * 100, 2) if total_list > 0 else 0
-    avg_discount_pct = round(
-        (sum(r["leakage_pct"] for r in rows) / len(rows)) if rows else 0,
-        2,
-    )
-
-    reps = defaultdict(lambda: {"list": 0.0, "billed": 0.0, "leakage": 0.0})
-    customers = defaultdict(lambda: {"list": 0.0, "billed": 0.0, "leakage": 0.0})
-    month_agg = defaultdict(lambda: {"list": 0.0, "leakage": 0.0})
-
-    owner_names = {}
-
-    for r in rows:
-        cust = r["customer"] or "Unknown"
-        customers[cust]["list"] += r["list_value"]
-        customers[cust]["billed"] += r["billed_value"]
-        customers[cust]["leakage"] += r["leakage"]
+def _empty_leakage_payload():
+    return {
+        "kpis": {
+            "leakage_amount": 0,
+            "leakage_pct": 0,
+            "net_realization_pct": 0,
+            "avg_discount_pct": 0,
+        },
+        "top_reps": [],
+        "top_customers": [],
+        "item_groups": [],
+        "trend": {"labels": [], "amount": [], "pct": []},
+        "waterfall": {"labels": ["List Price", "Discount Leakage", "Actual Billed"], "values": [0, 0, 0]},
+        "table": [],
+        "total_leakage": 0,
+    }
 
-        month_key = getdate(r["posting_date"]).strftime("%b %Y")
-        month_agg[month_key]["list"] += r["list_value"]
-        month_agg[month_key]["leakage"] += r["leakage"]
 
-        shares = rep_shares.get(r["invoice"], [])
-        if not shares:
-            owner = r["owner"] or "Unknown"
-            if owner not in owner_names:
-                owner_names[owner] = frappe.utils.get_fullname(owner) or owner
-            shares = [(owner_names[owner], 1.0)]
-
-        for rep_name, share in shares:
-            reps[rep_name]["list"] += r["list_value"] * share
-            reps[rep_name]["billed"] += r["billed_value"] * share
-            reps[rep_name]["leakage"] += r["leakage"] * share
-
-    def _to_ranked(data_map):
-        out = []
-        for key, agg in data_map.items():
-            l = flt(agg["list"])
-            leakage = flt(agg["leakage"])
-            out.append(
-                {
-                    "name": key,
-                    "leakage": leakage,
-                    "leakage_pct": round((leakage / l) * 100, 2) if l > 0 else 0,
-                    "list_value": l,
-                    "billed_value": flt(agg["billed"]),
-                }
-            )
-        out.sort(key=lambda d: d["leakage"], reverse=True)
-        return out
-
-    top_reps = _to_ranked(reps)[:limit]
-    top_customers = _to_ranked(customers)[:limit]
-    item_groups = _get_department_item_group_leakage(
-        department=department,
-        from_date=from_date,
-        to_date=to_date,
-        limit=limit,
+def _build_leakage_table(rows, rep_shares):
+    owner_names = _user_fullnames(
+        r["owner"] or "Unknown" for r in rows if not rep_shares.get(r["invoice"])
     )
-
-    # Stable month order for trend (existing months only in selected period).
-    month_labels = sorted(month_agg.keys(), key=lambda m: getdate("01 " + m))
-    trend_amount = [round(flt(month_agg[m]["leakage"]), 2) for m in month_labels]
-    trend_pct = [
-        round((flt(month_agg[m]["leakage"]) / flt(month_agg[m]["list"])) * 100, 2)
-        if flt(month_agg[m]["list"]) > 0
-        else 0
-        for m in month_labels
-    ]
-
-    rows_sorted = sorted(rows, key=lambda d: d["leakage"], reverse=True)[:table_limit]
     table = []
-    for idx, r in enumerate(rows_sorted, start=1):
+    for idx, r in enumerate(rows, start=1):
         shares = rep_shares.get(r["invoice"], [])
         if not shares:
-            owner = r["owner"] or "Unknown"
-            rep_names = frappe.utils.get_fullname(owner) or owner
+            rep_names = owner_names[r["owner"] or "Unknown"]
         else:
             rep_names = ", ".join([name for name, _ in shares])
 
@@ -783,28 +711,579 @@ def get_department_discount_leakage_dashboard(
                 "leakage_pct": round(r["leakage_pct"], 2),
             }
         )
+    return table
+
+
+def _ranked_leakage(rows, limit):
+    out = []
+    for row in rows:
+        list_value = flt(row.list_value)
+        leakage = flt(row.leakage)
+        out.append(
+            {
+                "name": row.name,
+                "leakage": leakage,
+                "leakage_pct": round((leakage / list_value) * 100, 2) if list_value > 0 else 0,
+                "list_value": list_value,
+                "billed_value": flt(row.billed_value),
+            }
+        )
+    return heapq.nlargest(limit, out, key=lambda d: d["leakage"])
+
+
+def _user_fullnames(users):
+    """{user: full name} in one query; falls back to the user id like get_fullname."""
+    users = set(users)
+    names = {user: user for user in users}
+    if users:
+        for row in frappe.get_all(
+            "User",
+            filters={"name": ("in", list(users))},
+            fields=["name", "first_name", "last_name"],
+        ):
+            names[row.name] = " ".join(filter(None, [row.first_name, row.last_name])) or row.name
+    return names
+
+
+def _department_leakage_rollups(si_condition, params, limit, table_limit):
+    """Totals, top customers, months, per-rep leakage and table rows, grouped in SQL.
+
+    Each rollup groups the same per-invoice derived table, where leakage is
+    floored at zero per invoice before summing, as in the table. Invoices with
+    a Sales Team are split by allocated percentage (equal split when none is
+    set); the rest are credited to their owner.
+    """
+    with_inv = f"""
+        WITH invoice_values AS ({_leakage_invoice_sql(si_condition)}),
+        inv AS (
+            SELECT iv.*, GREATEST(iv.list_value - iv.billed_value, 0) AS leakage
+            FROM invoice_values iv
+        )
+    """
+
+    totals = frappe.db.sql(
+        f"""
+        {with_inv}
+        SELECT
+            COUNT(*) AS invoice_count,
+            COALESCE(SUM(inv.list_value), 0) AS list_value,
+            COALESCE(SUM(inv.billed_value), 0) AS billed_value,
+            COALESCE(SUM(inv.leakage), 0) AS leakage,
+            COALESCE(SUM(CASE
+                WHEN inv.list_value > 0 THEN ROUND(inv.leakage / inv.list_value * 100, 2)
+                ELSE 0
+            END), 0) AS leakage_pct_total
+        FROM inv
+        """,
+        params,
+        as_dict=True,
+    )[0]
+    if not cint(totals.invoice_count):
+        return totals, [], [], [], [], {}
+
+    customers = frappe.db.sql(
+        f"""
+        {with_inv}
+        SELECT
+            COALESCE(NULLIF(inv.customer, ''), 'Unknown') AS name,
+            SUM(inv.list_value) AS list_value,
+            SUM(inv.billed_value) AS billed_value,
+            SUM(inv.leakage) AS leakage
+        FROM inv
+        GROUP BY COALESCE(NULLIF(inv.customer, ''), 'Unknown')
+        ORDER BY leakage DESC
+        LIMIT {cint(limit)}
+        """,
+        params,
+        as_dict=True,
+    )
+
+    month_rows = frappe.db.sql(
+        f"""
+        {with_inv}
+        SELECT
+            DATE_FORMAT(inv.posting_date, '%%Y-%%m-01') AS month_start,
+            SUM(inv.list_value) AS list_value,
+            SUM(inv.billed_value) AS billed_value,
+            SUM(inv.leakage) AS leakage
+        FROM inv
+        GROUP BY DATE_FORMAT(inv.posting_date, '%%Y-%%m-01')
+        ORDER BY month_start ASC
+        """,
+        params,
+        as_dict=True,
+    )
+
+    rep_rows = frappe.db.sql(
+        f"""
+        {with_inv},
+        team AS (
+            SELECT
+                st.parent AS invoice,
+                COALESCE(NULLIF(e.employee_name, ''), NULLIF(e.name, ''), st.sales_person) AS rep_name,
+                GREATEST(IFNULL(st.allocated_percentage, 0), 0) AS pct,
+                SUM(GREATEST(IFNULL(st.allocated_percentage, 0), 0)) OVER (PARTITION BY st.parent) AS total_pct,
+                COUNT(*) OVER (PARTITION BY st.parent) AS member_count
+            FROM `tabSales Team` st
+            INNER JOIN inv ON inv.invoice = st.parent
+            LEFT JOIN `tabSales Person` sp ON sp.name = st.sales_person
+            LEFT JOIN `tabEmployee` e ON e.name = sp.employee
+            WHERE st.parenttype = 'Sales Invoice'
+        )
+        SELECT
+            0 AS is_owner,
+            COALESCE(shared.rep_name, 'Unknown') AS name,
+            SUM(inv.list_value * shared.share) AS list_value,
+            SUM(inv.billed_value * shared.share) AS billed_value,
+            SUM(inv.leakage * shared.share) AS leakage
+        FROM (
+            SELECT
+                team.invoice,
+                team.rep_name,
+                CASE
+                    WHEN team.total_pct > 0 THEN team.pct / team.total_pct
+                    ELSE 1 / team.member_count
+                END AS share
+            FROM team
+        ) shared
+        INNER JOIN inv ON inv.invoice = shared.invoice
+        GROUP BY COALESCE(shared.rep_name, 'Unknown')
+        UNION ALL
+        SELECT
+            1 AS is_owner,
+            COALESCE(NULLIF(inv.owner, ''), 'Unknown') AS name,
+            SUM(inv.list_value) AS list_value,
+            SUM(inv.billed_value) AS billed_value,
+            SUM(inv.leakage) AS leakage
+        FROM inv
+        WHERE NOT EXISTS (SELECT 1 FROM team WHERE team.invoice = inv.invoice)
+        GROUP BY COALESCE(NULLIF(inv.owner, ''), 'Unknown')
+        """,
+        params,
+        as_dict=True,
+    )
+    owner_names = _user_fullnames(row.name for row in rep_rows if row.is_owner)
+    reps = defaultdict(lambda: frappe._dict(list_value=0.0, billed_value=0.0, leakage=0.0))
+    for row in rep_rows:
+        rep_name = owner_names[row.name] if row.is_owner else row.name
+        reps[rep_name].list_value += flt(row.list_value)
+        reps[rep_name].billed_value += flt(row.billed_value)
+        reps[rep_name].leakage += flt(row.leakage)
+    for rep_name, agg in reps.items():
+        agg.name = rep_name
+
+    table_rows = [
+        _leakage_row(row)
+        for row in frappe.db.sql(
+            f"""
+            {with_inv}
+            SELECT inv.invoice, inv.posting_date, inv.customer, inv.owner, inv.list_value, inv.billed_value
+            FROM inv
+            ORDER BY inv.leakage DESC
+            LIMIT {cint(table_limit)}
+            """,
+            params,
+            as_dict=True,
+        )
+    ]
+    rep_shares = _get_invoice_rep_shares([row["invoice"] for row in table_rows])
+
+    return totals, customers, month_rows, list(reps.values()), table_rows, rep_shares
+
+
+def _get_department_leakage_dashboard_from_facts(department, from_date, to_date, limit, table_limit):
+    totals = get_fact_totals(from_date, to_date, department=department, exclude_demo=True)
+    invoice_count = flt(totals.get("invoice_count"))
+    if invoice_count <= 0:
+        return _empty_leakage_payload()
+
+    params = {
+        "department": department,
+        "from_date": from_date,
+        "to_date": to_date,
+    }
+    base_where = f"""
+        f.department = %(department)s
+        AND f.customer NOT IN ({DEMO_NAMES_SQL})
+        AND f.posting_date BETWEEN %(from_date)s AND %(to_date)s
+        AND f.invoice_count != 0
+    """
+
+    rep_rows = frappe.db.sql(
+        f"""
+        SELECT
+            f.employee,
+            f.owner_user,
+            SUM(f.list_value) AS list_value,
+            SUM(f.net_amount) AS billed_value,
+            SUM(f.leakage) AS leakage
+        FROM `tabSales Daily Fact` f
+        WHERE {base_where}
+        GROUP BY f.employee, f.owner_user
+        """,
+        params,
+        as_dict=True,
+    )
+    employee_names = {}
+    employees = list({row.employee for row in rep_rows if row.employee})
+    if employees:
+        employee_names = dict(
+            frappe.get_all(
+                "Employee",
+                filters={"name": ("in", employees)},
+                fields=["name", "employee_name"],
+                as_list=True,
+            )
+        )
+    owner_names = _user_fullnames(row.owner_user for row in rep_rows if not row.employee and row.owner_user)
+    reps = defaultdict(lambda: frappe._dict(list_value=0.0, billed_value=0.0, leakage=0.0))
+    for row in rep_rows:
+        if row.employee:
+            rep_name = employee_names.get(row.employee) or row.employee
+        else:
+            rep_name = owner_names.get(row.owner_user) or "Unknown"
+        reps[rep_name].list_value += flt(row.list_value)
+        reps[rep_name].billed_value += flt(row.billed_value)
+        reps[rep_name].leakage += flt(row.leakage)
+    for rep_name, agg in reps.items():
+        agg.name = rep_name
+
+    customer_rows = frappe.db.sql(
+        f"""
+        SELECT
+            COALESCE(NULLIF(f.customer, ''), 'Unknown') AS name,
+            SUM(f.list_value) AS list_value,
+            SUM(f.net_amount) AS billed_value,
+            SUM(f.leakage) AS leakage
+        FROM `tabSales Daily Fact` f
+        WHERE {base_where}
+        GROUP BY COALESCE(NULLIF(f.customer, ''), 'Unknown')
+        """,
+        params,
+        as_dict=True,
+    )
+
+    month_rows = frappe.db.sql(
+        f"""
+        SELECT
+            DATE_FORMAT(f.posting_date, '%%Y-%%m-01') AS month_start,
+            SUM(f.list_value) AS list_value,
+            SUM(f.leakage) AS leakage
+        FROM `tabSales Daily Fact` f
+        WHERE {base_where}
+        GROUP BY DATE_FORMAT(f.posting_date, '%%Y-%%m-01')
+        ORDER BY month_start ASC
+        """,
+        params,
+        as_dict=True,
+    )
+
+    total_list = flt(totals.get("list_value"))
+    total_billed = flt(totals.get("net_amount"))
+    total_leakage = flt(totals.get("leakage"))
+
+    table_rows = _get_department_invoice_leakage_rows(department, from_date, to_date, limit=table_limit)
+    rep_shares = _get_invoice_rep_shares([r["invoice"] for r in table_rows])
 
     return {
         "kpis": {
             "leakage_amount": round(total_leakage, 2),
-            "leakage_pct": leakage_pct,
-            "net_realization_pct": net_realization_pct,
-            "avg_discount_pct": avg_discount_pct,
+            "leakage_pct": round((total_leakage / total_list) * 100, 2) if total_list > 0 else 0,
+            "net_realization_pct": round((total_billed / total_list) * 100, 2) if total_list > 0 else 0,
+            "avg_discount_pct": round(flt(totals.get("leakage_pct_total")) / invoice_count, 2),
+        },
+        "top_reps": _ranked_leakage(reps.values(), limit),
+        "top_customers": _ranked_leakage(customer_rows, limit),
+        "item_groups": _get_department_item_group_leakage(
+            department=department,
+            from_date=from_date,
+            to_date=to_date,
+            limit=limit,
+        ),
+        "trend": {
+            "labels": [getdate(row.month_start).strftime("%b %Y") for row in month_rows],
+            "amount": [round(flt(row.leakage), 2) for row in month_rows],
+            "pct": [
+                round((flt(row.leakage) / flt(row.list_value)) * 100, 2) if flt(row.list_value) > 0 else 0
+                for row in month_rows
+            ],
         },
-        "top_reps": top_reps,
-        "top_customers": top_customers,
-        "item_groups": item_groups,
-        "trend": {"labels": month_labels, "amount": trend_amount, "pct": trend_pct},
         "waterfall": {
             "labels": ["List Price", "Discount Leakage", "Actual Billed"],
             "values": [round(total_list, 2), round(-total_leakage, 2), round(total_billed, 2)],
         },
-        "table": table,
+        "table": _build_leakage_table(table_rows, rep_shares),
         "total_leakage": round(total_leakage, 2),
     }
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
+def get_department_discount_leakage_dashboard(
+    department=None,
+    view_mode="Monthly",
+    reference_date=None,
+    limit=10,
+    table_limit=30,
+):
+    limit = max(3, min(cint(limit) if limit else 10, 25))
+    table_limit = max(10, min(cint(table_limit) if table_limit else 30, 100))
+    if not department:
+        return _empty_leakage_payload()
+
+    from_date, to_date = _get_period_range(view_mode, reference_date)
+    if use_sales_fact_rollup():
+        return _get_department_leakage_dashboard_from_facts(
+            department, from_date, to_date, limit, table_limit
+        )
+
+    employee_ids = get_department_membership(department).employee_ids
+    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids)
+    if si_condition == "1 = 0":
+        return _empty_leakage_payload()
+
+    params = {"from_date": from_date, "to_date": to_date, **si_dynamic}
+    totals, customer_rows, month_rows, rep_rows, table_rows, rep_shares = _department_leakage_rollups(
+        si_condition, params, limit, table_limit
+    )
+    invoice_count = cint(totals.invoice_count)
+    if not invoice_count:
+        return _empty_leakage_payload()
+
+    total_list = flt(totals.list_value)
+    total_billed = flt(totals.billed_value)
+    total_leakage = flt(totals.leakage)
+
+    return {
+        "kpis": {
+            "leakage_amount": round(total_leakage, 2),
+            "leakage_pct": round((total_leakage / total_list) * 100, 2) if total_list > 0 else 0,
+            "net_realization_pct": round((total_billed / total_list) * 100, 2) if total_list > 0 else 0,
+            "avg_discount_pct": round(flt(totals.leakage_pct_total) / invoice_count, 2),
+        },
+        "top_reps": _ranked_leakage(rep_rows, limit),
+        "top_customers": _ranked_leakage(customer_rows, limit),
+        "item_groups": _get_department_item_group_leakage(
+            department=department,
+            from_date=from_date,
+            to_date=to_date,
+            limit=limit,
+        ),
+        "trend": {
+            "labels": [getdate(row.month_start).strftime("%b %Y") for row in month_rows],
+            "amount": [round(flt(row.leakage), 2) for row in month_rows],
+            "pct": [
+                round((flt(row.leakage) / flt(row.list_value)) * 100, 2) if flt(row.list_value) > 0 else 0
+                for row in month_rows
+            ],
+        },
+        "waterfall": {
+            "labels": ["List Price", "Discount Leakage", "Actual Billed"],
+            "values": [round(total_list, 2), round(-total_leakage, 2), round(total_billed, 2)],
+        },
+        "table": _build_leakage_table(table_rows, rep_shares),
+        "total_leakage": round(total_leakage, 2),
+    }
+
+
+def _department_invoice_kpis(si_condition, si_dynamic, dates, risk_window_days):
+    """Revenue, outstanding, risk, invoice and customer counts in one Sales Invoice pass."""
+    row = frappe.db.sql(
+        f"""
+        SELECT
+            COALESCE(SUM(CASE
+                WHEN si.posting_date BETWEEN %(month_start)s AND %(month_end)s THEN si.grand_total
+            END), 0) AS revenue,
+            COALESCE(SUM(CASE
+                WHEN si.posting_date BETWEEN %(rolling_3m_start)s AND %(month_end)s THEN si.grand_total
+            END), 0) AS rolling_3m_invoiced,
+            COALESCE(SUM(CASE
+                WHEN si.outstanding_amount > 0 THEN si.outstanding_amount
+            END), 0) AS outstanding,
+            COALESCE(SUM(CASE
+                WHEN si.outstanding_amount > 0
+                 AND si.due_date <= DATE_ADD(%(today)s, INTERVAL %(risk_window_days)s DAY)
+                THEN si.outstanding_amount
+            END), 0) AS revenue_at_risk,
+            COUNT(DISTINCT CASE
+                WHEN si.posting_date BETWEEN %(month_start)s AND %(month_end)s THEN si.name
+            END) AS total_invoices,
+            COUNT(DISTINCT CASE
+                WHEN si.posting_date BETWEEN %(week_start)s AND %(week_end)s THEN si.customer
+            END) AS customers_served_week,
+            COUNT(DISTINCT CASE
+                WHEN si.posting_date BETWEEN %(month_start)s AND %(month_end)s THEN si.customer
+            END) AS customers_served_month
+        FROM `tabSales Invoice` si
+        WHERE si.docstatus = 1
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
+          AND (
+                si.outstanding_amount > 0
+                OR si.posting_date BETWEEN %(scan_start)s AND %(scan_end)s
+          )
+          AND {si_condition}
+        """,
+        {
+            **dates,
+            **si_dynamic,
+            "risk_window_days": risk_window_days,
+            "scan_start": min(dates["rolling_3m_start"], dates["week_start"]),
+            "scan_end": max(dates["month_end"], dates["week_end"]),
+        },
+        as_dict=True,
+    )
+    row = row[0] if row else frappe._dict()
+    return {
+        "revenue": flt(row.get("revenue")),
+        "rolling_3m_invoiced": flt(row.get("rolling_3m_invoiced")),
+        "outstanding": flt(row.get("outstanding")),
+        "revenue_at_risk": flt(row.get("revenue_at_risk")),
+        "total_invoices": cint(row.get("total_invoices")),
+        "customers_served_week": cint(row.get("customers_served_week")),
+        "customers_served_month": cint(row.get("customers_served_month")),
+    }
+
+
+def _department_outstanding_kpis(si_condition, si_dynamic, dates, risk_window_days):
+    """Outstanding and revenue at risk over open invoices only; the rollup has no balances."""
+    row = frappe.db.sql(
+        f"""
+        SELECT
+            COALESCE(SUM(si.outstanding_amount), 0) AS outstanding,
+            COALESCE(SUM(CASE
+                WHEN si.due_date <= DATE_ADD(%(today)s, INTERVAL %(risk_window_days)s DAY)
+                THEN si.outstanding_amount
+            END), 0) AS revenue_at_risk
+        FROM `tabSales Invoice` si
+        WHERE si.docstatus = 1
+          AND si.outstanding_amount > 0
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
+          AND {si_condition}
+        """,
+        {**si_dynamic, "today": dates["today"], "risk_window_days": risk_window_days},
+        as_dict=True,
+    )
+    row = row[0] if row else frappe._dict()
+    return {
+        "outstanding": flt(row.get("outstanding")),
+        "revenue_at_risk": flt(row.get("revenue_at_risk")),
+    }
+
+
+def _department_collection_kpis(si_condition, si_dynamic, dates):
+    """Collected this month and over the rolling 3 months in one Payment Entry pass."""
+    row = frappe.db.sql(
+        f"""
+        SELECT
+            COALESCE(SUM(CASE
+                WHEN pe.posting_date BETWEEN %(month_start)s AND %(month_end)s THEN per.allocated_amount
+            END), 0) AS collected,
+            COALESCE(SUM(per.allocated_amount), 0) AS rolling_3m_collected
+        FROM `tabPayment Entry Reference` per
+        INNER JOIN `tabPayment Entry` pe ON pe.name = per.parent
+        INNER JOIN `tabSales Invoice` si ON si.name = per.reference_name
+        WHERE per.reference_doctype = 'Sales Invoice'
+          AND pe.docstatus = 1
+          AND si.docstatus = 1
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
+          AND pe.posting_date BETWEEN %(rolling_3m_start)s AND %(month_end)s
+          AND {si_condition}
+        """,
+        {**dates, **si_dynamic},
+        as_dict=True,
+    )
+    row = row[0] if row else frappe._dict()
+    return {
+        "collected": flt(row.get("collected")),
+        "rolling_3m_collected": flt(row.get("rolling_3m_collected")),
+    }
+
+
+def _department_opportunity_kpis(user_ids, dates):
+    """Pipeline, win/loss and cycle-time metrics in one Opportunity pass.
+
+    Counts run to the end of the last day like `frappe.db.count`'s between
+    filter; sums and averages keep the plain date bounds of the old queries.
+    """
+    row = frappe.db.sql(
+        f"""
+        SELECT
+            COALESCE(SUM(CASE WHEN o.creation BETWEEN %(month_start)s AND %(month_end)s
+                THEN o.opportunity_amount END), 0) AS opportunities_value,
+            COUNT(CASE WHEN o.creation BETWEEN %(month_start)s AND %(month_end_eod)s
+                THEN 1 END) AS total_opportunities,
+            COUNT(CASE WHEN o.creation BETWEEN %(month_start)s AND %(month_end_eod)s
+                AND o.status NOT IN ('Converted', 'Lost') THEN 1 END) AS ongoing_deals,
+            COUNT(CASE WHEN o.status = 'Converted' AND o.modified BETWEEN %(month_start)s AND %(month_end_eod)s
+                THEN 1 END) AS won_deals,
+            COUNT(CASE WHEN o.status = 'Lost' AND o.modified BETWEEN %(month_start)s AND %(month_end_eod)s
+                THEN 1 END) AS lost_deals,
+            COALESCE(AVG(CASE WHEN o.creation BETWEEN %(month_start)s AND %(month_end)s
+                THEN o.opportunity_amount END), 0) AS avg_deal_value,
+            COALESCE(AVG(CASE WHEN o.status = 'Converted' AND o.modified BETWEEN %(month_start)s AND %(month_end)s
+                THEN o.opportunity_amount END), 0) AS avg_won_deal_value,
+            COALESCE(AVG(CASE WHEN o.status = 'Converted' AND o.modified BETWEEN %(month_start)s AND %(month_end)s
+                THEN DATEDIFF(o.modified, o.creation) END), 0) AS avg_time_to_close_deal,
+            COALESCE(AVG(CASE WHEN o.status = 'Converted' AND o.modified BETWEEN %(month_start)s AND %(month_end)s
+                AND l.name IS NOT NULL THEN DATEDIFF(o.modified, l.creation) END), 0) AS avg_time_lead_to_deal
+        FROM `tabOpportunity` o
+        LEFT JOIN `tabLead` l
+            ON o.opportunity_from = 'Lead'
+           AND l.name = o.party_name
+           AND l.name NOT IN ({DEMO_NAMES_SQL})
+        WHERE o.owner IN %(user_ids)s
+          AND o.name NOT IN ({DEMO_NAMES_SQL})
+          AND o.party_name NOT IN ({DEMO_NAMES_SQL})
+          AND (
+                o.creation BETWEEN %(month_start)s AND %(month_end_eod)s
+                OR o.modified BETWEEN %(month_start)s AND %(month_end_eod)s
+          )
+        """,
+        {**dates, "user_ids": tuple(user_ids)},
+        as_dict=True,
+    )
+    row = row[0] if row else frappe._dict()
+    return {
+        "opportunities_value": flt(row.get("opportunities_value")),
+        "total_opportunities": cint(row.get("total_opportunities")),
+        "ongoing_deals": cint(row.get("ongoing_deals")),
+        "won_deals": cint(row.get("won_deals")),
+        "lost_deals": cint(row.get("lost_deals")),
+        "avg_deal_value": flt(row.get("avg_deal_value")),
+        "avg_won_deal_value": flt(row.get("avg_won_deal_value")),
+        "avg_time_to_close_deal": int(round(flt(row.get("avg_time_to_close_deal")))),
+        "avg_time_lead_to_deal": int(round(flt(row.get("avg_time_lead_to_deal")))),
+    }
+
+
+def _department_customer_kpis(user_ids, dates):
+    row = frappe.db.sql(
+        f"""
+        SELECT
+            COUNT(CASE WHEN creation BETWEEN %(week_start)s AND %(week_end_eod)s THEN 1 END) AS new_customers_week,
+            COUNT(CASE WHEN creation BETWEEN %(month_start)s AND %(month_end_eod)s THEN 1 END) AS new_customers_month
+        FROM `tabCustomer`
+        WHERE owner IN %(user_ids)s
+          AND name NOT IN ({DEMO_NAMES_SQL})
+          AND (
+                creation BETWEEN %(week_start)s AND %(week_end_eod)s
+                OR creation BETWEEN %(month_start)s AND %(month_end_eod)s
+          )
+        """,
+        {**dates, "user_ids": tuple(user_ids)},
+        as_dict=True,
+    )
+    row = row[0] if row else frappe._dict()
+    return {
+        "new_customers_week": cint(row.get("new_customers_week")),
+        "new_customers_month": cint(row.get("new_customers_month")),
+    }
+
+
+@frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_department_kpis(department=None, risk_window_days=14, reference_date=None):
     risk_window_days = cint(risk_window_days) if risk_window_days else 14
     if risk_window_days not in (7, 14):
@@ -839,88 +1318,53 @@ def get_department_kpis(department=None, risk_window_days=14, reference_date=Non
 
     today = getdate(reference_date or nowdate())
     month_start = get_first_day(today)
-    month_end = get_last_day(today)
-    rolling_3m_start = get_first_day(add_months(today, -2))
     week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=6)
-    demo_pattern = PersonalSalesDashboard().demo_pattern
+    dates = {
+        "today": today,
+        "month_start": month_start,
+        "month_end": get_last_day(today),
+        "rolling_3m_start": get_first_day(add_months(today, -2)),
+        "week_start": week_start,
+        "week_end": week_start + timedelta(days=6),
+    }
+    dates["month_end_eod"] = f"{dates['month_end']} 23:59:59.999999"
+    dates["week_end_eod"] = f"{dates['week_end']} 23:59:59.999999"
 
     employee_ids, user_ids = _get_department_context(department)
-    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids, user_ids)
-
-    base_params = {"demo": demo_pattern}
-    base_params.update(si_dynamic)
-
-    revenue = _sum_value(
-        f"""
-        SELECT COALESCE(SUM(si.grand_total), 0) AS value
-        FROM `tabSales Invoice` si
-        WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
-          AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
-          AND {si_condition}
-        """,
-        {**base_params, "from_date": month_start, "to_date": month_end},
-    )
-
-    outstanding = _sum_value(
-        f"""
-        SELECT COALESCE(SUM(si.outstanding_amount), 0) AS value
-        FROM `tabSales Invoice` si
-        WHERE si.docstatus = 1
-          AND si.outstanding_amount > 0
-          AND si.customer NOT LIKE %(demo)s
-          AND {si_condition}
-        """,
-        base_params,
-    )
-
-    revenue_at_risk = _sum_value(
-        f"""
-        SELECT COALESCE(SUM(si.outstanding_amount), 0) AS value
-        FROM `tabSales Invoice` si
-        WHERE si.docstatus = 1
-          AND si.outstanding_amount > 0
-          AND si.customer NOT LIKE %(demo)s
-          AND (
-                si.due_date < %(today)s
-                OR si.due_date BETWEEN %(today)s AND DATE_ADD(%(today)s, INTERVAL %(risk_window_days)s DAY)
-          )
-          AND {si_condition}
-        """,
-        {
-            **base_params,
-            "today": today,
-            "risk_window_days": risk_window_days,
-        },
-    )
-
-    collected = _sum_department_collected(
-        si_condition=si_condition,
-        si_dynamic=si_dynamic,
-        demo_pattern=demo_pattern,
-        from_date=month_start,
-        to_date=month_end,
-    )
-
-    rolling_3m_invoiced = _sum_value(
-        f"""
-        SELECT COALESCE(SUM(si.grand_total), 0) AS value
-        FROM `tabSales Invoice` si
-        WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
-          AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
-          AND {si_condition}
-        """,
-        {**base_params, "from_date": rolling_3m_start, "to_date": month_end},
-    )
-    rolling_3m_collected = _sum_department_collected(
-        si_condition=si_condition,
-        si_dynamic=si_dynamic,
-        demo_pattern=demo_pattern,
-        from_date=rolling_3m_start,
-        to_date=month_end,
-    )
+    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids)
+
+    # Pick one source for the invoice and collection KPIs: rollup, else the
+    # cached snapshot, else the raw passes.
+    if use_sales_fact_rollup():
+        with timed_pass("invoices"):
+            metrics = _get_department_fact_metrics(
+                department,
+                month_start=dates["month_start"],
+                month_end=dates["month_end"],
+                rolling_3m_start=dates["rolling_3m_start"],
+                week_start=dates["week_start"],
+                week_end=dates["week_end"],
+            )
+            metrics.update(_department_outstanding_kpis(si_condition, si_dynamic, dates, risk_window_days))
+    else:
+        with timed_pass("invoices"):
+            snapshot = get_invoice_snapshot(
+                department, si_condition, si_dynamic, from_date=dates["rolling_3m_start"]
+            )
+            if snapshot is not None:
+                metrics = snapshot.invoice_kpis(dates, risk_window_days)
+            else:
+                metrics = _department_invoice_kpis(si_condition, si_dynamic, dates, risk_window_days)
+        with timed_pass("collections"):
+            if snapshot is not None:
+                metrics.update(snapshot.collection_kpis(dates))
+            else:
+                metrics.update(_department_collection_kpis(si_condition, si_dynamic, dates))
+
+    revenue = metrics["revenue"]
+    collected = metrics["collected"]
+    rolling_3m_invoiced = metrics["rolling_3m_invoiced"]
+    rolling_3m_collected = metrics["rolling_3m_collected"]
     collection_efficiency_month = round((collected / revenue) * 100, 2) if revenue > 0 else 0
     collection_efficiency_3m = (
         round((rolling_3m_collected / rolling_3m_invoiced) * 100, 2) if rolling_3m_invoiced > 0 else 0
@@ -932,258 +1376,51 @@ def get_department_kpis(department=None, risk_window_days=14, reference_date=Non
     else:
         cash_conversion_flag = "Healthy"
 
-    invoice_rows = frappe.db.sql(
-        f"""
-        SELECT COUNT(DISTINCT si.name) AS value
-        FROM `tabSales Invoice` si
-        WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
-          AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
-          AND {si_condition}
-        """,
-        {**base_params, "from_date": month_start, "to_date": month_end},
-        as_dict=True,
-    )
-    total_invoices = int(invoice_rows[0].value) if invoice_rows else 0
-
-    served_week_rows = frappe.db.sql(
-        f"""
-        SELECT COUNT(DISTINCT si.customer) AS value
-        FROM `tabSales Invoice` si
-        WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
-          AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
-          AND {si_condition}
-        """,
-        {**base_params, "from_date": week_start, "to_date": week_end},
-        as_dict=True,
-    )
-    customers_served_week = int(served_week_rows[0].value) if served_week_rows else 0
-
-    served_month_rows = frappe.db.sql(
-        f"""
-        SELECT COUNT(DISTINCT si.customer) AS value
-        FROM `tabSales Invoice` si
-        WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
-          AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
-          AND {si_condition}
-        """,
-        {**base_params, "from_date": month_start, "to_date": month_end},
-        as_dict=True,
-    )
-    customers_served_month = int(served_month_rows[0].value) if served_month_rows else 0
-
-    monthly_target = _get_department_monthly_target(department, today)
-
+    with timed_pass("targets"):
+        monthly_target = _get_department_monthly_target(department, today)
     target_pct = round((revenue / monthly_target) * 100, 3) if monthly_target > 0 else 0
 
     if user_ids:
-        users_tuple = tuple(user_ids)
-        opp_rows = frappe.db.sql(
-            """
-            SELECT COALESCE(SUM(opportunity_amount), 0) AS value
-            FROM `tabOpportunity`
-            WHERE owner IN %(user_ids)s
-              AND name NOT LIKE %(demo)s
-              AND party_name NOT LIKE %(demo)s
-              AND creation BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                "user_ids": users_tuple,
-                "demo": demo_pattern,
-                "from_date": month_start,
-                "to_date": month_end,
-            },
-            as_dict=True,
-        )
-        opportunities_value = flt(opp_rows[0].value) if opp_rows else 0
-
-        total_opportunities = frappe.db.count(
-            "Opportunity",
-            {
-                "owner": ["in", users_tuple],
-                "name": ["not like", demo_pattern],
-                "party_name": ["not like", demo_pattern],
-                "creation": ["between", [month_start, month_end]],
-            },
-        )
-        ongoing_deals = frappe.db.count(
-            "Opportunity",
-            {
-                "owner": ["in", users_tuple],
-                "status": ["not in", ["Converted", "Lost"]],
-                "name": ["not like", demo_pattern],
-                "party_name": ["not like", demo_pattern],
-                "creation": ["between", [month_start, month_end]],
-            },
-        )
-        won_deals = frappe.db.count(
-            "Opportunity",
-            {
-                "owner": ["in", users_tuple],
-                "status": "Converted",
-                "name": ["not like", demo_pattern],
-                "party_name": ["not like", demo_pattern],
-                "modified": ["between", [month_start, month_end]],
-            },
-        )
-        lost_deals = frappe.db.count(
-            "Opportunity",
-            {
-                "owner": ["in", users_tuple],
-                "status": "Lost",
-                "name": ["not like", demo_pattern],
-                "party_name": ["not like", demo_pattern],
-                "modified": ["between", [month_start, month_end]],
-            },
-        )
-
-        avg_deal_rows = frappe.db.sql(
-            """
-            SELECT COALESCE(AVG(opportunity_amount), 0) AS value
-            FROM `tabOpportunity`
-            WHERE owner IN %(user_ids)s
-              AND name NOT LIKE %(demo)s
-              AND party_name NOT LIKE %(demo)s
-              AND creation BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                "user_ids": users_tuple,
-                "demo": demo_pattern,
-                "from_date": month_start,
-                "to_date": month_end,
-            },
-            as_dict=True,
-        )
-        avg_deal_value = flt(avg_deal_rows[0].value) if avg_deal_rows else 0
-
-        avg_won_rows = frappe.db.sql(
-            """
-            SELECT COALESCE(AVG(opportunity_amount), 0) AS value
-            FROM `tabOpportunity`
-            WHERE owner IN %(user_ids)s
-              AND status = 'Converted'
-              AND name NOT LIKE %(demo)s
-              AND party_name NOT LIKE %(demo)s
-              AND modified BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                "user_ids": users_tuple,
-                "demo": demo_pattern,
-                "from_date": month_start,
-                "to_date": month_end,
-            },
-            as_dict=True,
-        )
-        avg_won_deal_value = flt(avg_won_rows[0].value) if avg_won_rows else 0
-
-        close_days_rows = frappe.db.sql(
-            """
-            SELECT DATEDIFF(modified, creation) AS days
-            FROM `tabOpportunity`
-            WHERE owner IN %(user_ids)s
-              AND status = 'Converted'
-              AND name NOT LIKE %(demo)s
-              AND party_name NOT LIKE %(demo)s
-              AND modified BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                "user_ids": users_tuple,
-                "demo": demo_pattern,
-                "from_date": month_start,
-                "to_date": month_end,
-            },
-            as_dict=True,
-        )
-        if close_days_rows:
-            avg_time_to_close_deal = round(
-                sum((row.days or 0) for row in close_days_rows) / max(len(close_days_rows), 1)
-            )
-        else:
-            avg_time_to_close_deal = 0
-
-        lead_days_rows = frappe.db.sql(
-            """
-            SELECT DATEDIFF(o.modified, l.creation) AS days
-            FROM `tabOpportunity` o
-            INNER JOIN `tabLead` l ON l.name = o.party_name
-            WHERE o.owner IN %(user_ids)s
-              AND o.opportunity_from = 'Lead'
-              AND o.status = 'Converted'
-              AND o.name NOT LIKE %(demo)s
-              AND o.party_name NOT LIKE %(demo)s
-              AND l.name NOT LIKE %(demo)s
-              AND o.modified BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                "user_ids": users_tuple,
-                "demo": demo_pattern,
-                "from_date": month_start,
-                "to_date": month_end,
-            },
-            as_dict=True,
-        )
-        if lead_days_rows:
-            avg_time_lead_to_deal = round(
-                sum((row.days or 0) for row in lead_days_rows) / max(len(lead_days_rows), 1)
-            )
-        else:
-            avg_time_lead_to_deal = 0
-
-        new_cust_week = frappe.db.count(
-            "Customer",
-            {
-                "owner": ["in", users_tuple],
-                "name": ["not like", demo_pattern],
-                "customer_name": ["not like", demo_pattern],
-                "creation": ["between", [week_start, week_end]],
-            },
-        )
-        new_cust_month = frappe.db.count(
-            "Customer",
-            {
-                "owner": ["in", users_tuple],
-                "name": ["not like", demo_pattern],
-                "customer_name": ["not like", demo_pattern],
-                "creation": ["between", [month_start, month_end]],
-            },
-        )
+        with timed_pass("opportunities"):
+            opportunity_metrics = _department_opportunity_kpis(user_ids, dates)
+        with timed_pass("customers"):
+            customer_metrics = _department_customer_kpis(user_ids, dates)
     else:
-        opportunities_value = 0
-        total_opportunities = 0
-        ongoing_deals = 0
-        won_deals = 0
-        lost_deals = 0
-        avg_deal_value = 0
-        avg_won_deal_value = 0
-        avg_time_to_close_deal = 0
-        avg_time_lead_to_deal = 0
-        new_cust_week = 0
-        new_cust_month = 0
+        opportunity_metrics = {
+            "opportunities_value": 0,
+            "total_opportunities": 0,
+            "ongoing_deals": 0,
+            "won_deals": 0,
+            "lost_deals": 0,
+            "avg_deal_value": 0,
+            "avg_won_deal_value": 0,
+            "avg_time_to_close_deal": 0,
+            "avg_time_lead_to_deal": 0,
+        }
+        customer_metrics = {"new_customers_week": 0, "new_customers_month": 0}
 
     return {
         "department": department,
         "revenue": revenue,
         "collected": collected,
-        "outstanding": outstanding,
+        "outstanding": metrics["outstanding"],
         "monthly_target": monthly_target,
-        "revenue_at_risk": revenue_at_risk,
+        "revenue_at_risk": metrics["revenue_at_risk"],
         "target_pct": target_pct,
-        "total_invoices": total_invoices,
-        "opportunities_value": opportunities_value,
-        "total_opportunities": int(total_opportunities),
-        "ongoing_deals": int(ongoing_deals),
-        "won_deals": int(won_deals),
-        "lost_deals": int(lost_deals),
-        "avg_deal_value": avg_deal_value,
-        "avg_won_deal_value": avg_won_deal_value,
-        "avg_time_to_close_deal": int(avg_time_to_close_deal),
-        "avg_time_lead_to_deal": int(avg_time_lead_to_deal),
-        "new_customers_week": int(new_cust_week),
-        "customers_served_week": customers_served_week,
-        "new_customers_month": int(new_cust_month),
-        "customers_served_month": customers_served_month,
+        "total_invoices": metrics["total_invoices"],
+        "opportunities_value": opportunity_metrics["opportunities_value"],
+        "total_opportunities": opportunity_metrics["total_opportunities"],
+        "ongoing_deals": opportunity_metrics["ongoing_deals"],
+        "won_deals": opportunity_metrics["won_deals"],
+        "lost_deals": opportunity_metrics["lost_deals"],
+        "avg_deal_value": opportunity_metrics["avg_deal_value"],
+        "avg_won_deal_value": opportunity_metrics["avg_won_deal_value"],
+        "avg_time_to_close_deal": opportunity_metrics["avg_time_to_close_deal"],
+        "avg_time_lead_to_deal": opportunity_metrics["avg_time_lead_to_deal"],
+        "new_customers_week": customer_metrics["new_customers_week"],
+        "customers_served_week": metrics["customers_served_week"],
+        "new_customers_month": customer_metrics["new_customers_month"],
+        "customers_served_month": metrics["customers_served_month"],
         "collection_efficiency_month": collection_efficiency_month,
         "collection_efficiency_3m": collection_efficiency_3m,
         "cash_conversion_flag": cash_conversion_flag,
@@ -1191,6 +1428,8 @@ def get_department_kpis(department=None, risk_window_days=14, reference_date=Non
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_department_payment_delay_cost(
     department=None,
     reference_date=None,
@@ -1218,9 +1457,8 @@ def get_department_payment_delay_cost(
             "top_customers": [],
         }
 
-    demo_pattern = PersonalSalesDashboard().demo_pattern
-    employee_ids, user_ids = _get_department_context(department)
-    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids, user_ids)
+    employee_ids = get_department_membership(department).employee_ids
+    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids)
     if si_condition == "1 = 0":
         return {
             "as_of": str(as_of),
@@ -1233,139 +1471,41 @@ def get_department_payment_delay_cost(
             "top_customers": [],
         }
 
-    rows = frappe.db.sql(
-        f"""
-        SELECT
-            si.name AS invoice,
-            si.customer,
-            si.outstanding_amount,
-            si.due_date,
-            DATEDIFF(%(as_of)s, si.due_date) AS days_overdue
-        FROM `tabSales Invoice` si
-        WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
-          AND si.outstanding_amount > 0
-          AND si.due_date < %(as_of)s
-          AND {si_condition}
-        """,
-        {"as_of": as_of, "demo": demo_pattern, **si_dynamic},
-        as_dict=True,
-    )
-
-    if not rows:
-        return {
-            "as_of": str(as_of),
-            "annual_financing_rate": annual_financing_rate,
-            "overdue_outstanding": 0,
-            "estimated_delay_cost": 0,
-            "cost_pct_of_overdue": 0,
-            "daily_financing_cost": 0,
-            "buckets": [
-                {"label": "0-30", "amount": 0, "cost": 0, "count": 0},
-                {"label": "31-60", "amount": 0, "cost": 0, "count": 0},
-                {"label": "61-90", "amount": 0, "cost": 0, "count": 0},
-                {"label": "90+", "amount": 0, "cost": 0, "count": 0},
-            ],
-            "top_customers": [],
-        }
-
-    rate_per_day = annual_financing_rate / 100 / 365
-    buckets = {
-        "0-30": {"label": "0-30", "amount": 0.0, "cost": 0.0, "count": 0},
-        "31-60": {"label": "31-60", "amount": 0.0, "cost": 0.0, "count": 0},
-        "61-90": {"label": "61-90", "amount": 0.0, "cost": 0.0, "count": 0},
-        "90+": {"label": "90+", "amount": 0.0, "cost": 0.0, "count": 0},
-    }
-    customer_cost = defaultdict(lambda: {"amount": 0.0, "cost": 0.0, "count": 0})
-
-    overdue_outstanding = 0.0
-    estimated_delay_cost = 0.0
-    weighted_days = 0.0
-
-    for row in rows:
-        amount = flt(row.outstanding_amount)
-        days = max(cint(row.days_overdue), 0)
-        cost = amount * rate_per_day * days
-        overdue_outstanding += amount
-        estimated_delay_cost += cost
-        weighted_days += (amount * days)
-
-        if days <= 30:
-            key = "0-30"
-        elif days <= 60:
-            key = "31-60"
-        elif days <= 90:
-            key = "61-90"
-        else:
-            key = "90+"
-
-        buckets[key]["amount"] += amount
-        buckets[key]["cost"] += cost
-        buckets[key]["count"] += 1
-
-        customer = row.customer or "Unknown"
-        customer_cost[customer]["amount"] += amount
-        customer_cost[customer]["cost"] += cost
-        customer_cost[customer]["count"] += 1
-
-    avg_overdue_days = (weighted_days / overdue_outstanding) if overdue_outstanding > 0 else 0
-    daily_financing_cost = overdue_outstanding * rate_per_day
-    cost_pct_of_overdue = (estimated_delay_cost / overdue_outstanding * 100) if overdue_outstanding > 0 else 0
-
-    bucket_rows = [buckets["0-30"], buckets["31-60"], buckets["61-90"], buckets["90+"]]
-    for b in bucket_rows:
-        b["amount"] = round(b["amount"], 2)
-        b["cost"] = round(b["cost"], 2)
-
-    top_customers = []
-    for customer, agg in customer_cost.items():
-        top_customers.append(
-            {
-                "customer": customer,
-                "amount": round(agg["amount"], 2),
-                "cost": round(agg["cost"], 2),
-                "count": int(agg["count"]),
-                "cost_pct": round((agg["cost"] / estimated_delay_cost * 100), 2) if estimated_delay_cost > 0 else 0,
-            }
+    snapshot = get_invoice_snapshot(department, si_condition, si_dynamic)
+    if snapshot is not None:
+        buckets, customers = snapshot.overdue_aging(as_of, top_limit)
+    else:
+        where_sql = f"si.docstatus = 1 AND si.customer NOT IN ({DEMO_NAMES_SQL}) AND {si_condition}"
+        buckets, customers = get_overdue_aging(
+            where_sql, si_dynamic, as_of, top_limit
         )
-    top_customers.sort(key=lambda d: d["cost"], reverse=True)
-    top_customers = top_customers[:top_limit]
-
-    return {
-        "as_of": str(as_of),
-        "annual_financing_rate": round(annual_financing_rate, 2),
-        "overdue_outstanding": round(overdue_outstanding, 2),
-        "estimated_delay_cost": round(estimated_delay_cost, 2),
-        "cost_pct_of_overdue": round(cost_pct_of_overdue, 2),
-        "daily_financing_cost": round(daily_financing_cost, 2),
-        "avg_overdue_days": round(avg_overdue_days, 1),
-        "buckets": bucket_rows,
-        "top_customers": top_customers,
-    }
+    return build_payment_delay_payload(as_of, annual_financing_rate, buckets, customers)
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_department_top_customers_table(department=None, limit=20):
     limit = cint(limit) if limit else 20
     limit = max(1, min(limit, 100))
     if not department:
         return {"rows": [], "total": 0}
 
-    demo_pattern = PersonalSalesDashboard().demo_pattern
-    employee_ids, user_ids = _get_department_context(department)
-    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids, user_ids)
+    employee_ids = get_department_membership(department).employee_ids
+    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids)
     if si_condition == "1 = 0":
         return {"rows": [], "total": 0}
 
+    # All-time ranking, so it reads Sales Invoice rather than the windowed snapshot.
     rows = frappe.db.sql(
         f"""
         SELECT si.name, si.customer, si.grand_total, si.owner
         FROM `tabSales Invoice` si
         WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND {si_condition}
         """,
-        {"demo": demo_pattern, **si_dynamic},
+        si_dynamic,
         as_dict=True,
     )
     if not rows:
@@ -1428,6 +1568,7 @@ def get_department_top_customers_table(department=None, limit=20):
 
 
 @frappe.whitelist()
+@instrumented
 def get_department_owner_users(department=None):
     if not department:
         return []
@@ -1436,6 +1577,8 @@ def get_department_owner_users(department=None):
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_department_project_pipeline(department=None):
     """Project status split for selected department owners."""
     statuses = ["Open", "In Progress", "Completed", "Cancelled"]
@@ -1483,6 +1626,8 @@ def get_department_project_pipeline(department=None):
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_department_project_status_finance(
     department=None,
     view_mode="Monthly",
@@ -1491,7 +1636,6 @@ def get_department_project_status_finance(
     """Department projects status + finance + aging buckets for compact dashboard cards."""
     from_date, to_date = _get_period_range(view_mode, reference_date)
     as_of = getdate(reference_date or nowdate())
-    demo_pattern = PersonalSalesDashboard().demo_pattern
 
     if not department:
         return {
@@ -1558,13 +1702,13 @@ def get_department_project_status_finance(
         }
 
     period_invoice_rows = frappe.db.sql(
-        """
+        f"""
         SELECT
             si.name,
             si.grand_total
         FROM `tabSales Invoice` si
         WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
           AND (
             si.project IN %(projects)s
@@ -1577,7 +1721,6 @@ def get_department_project_status_finance(
           )
         """,
         {
-            "demo": demo_pattern,
             "from_date": from_date,
             "to_date": to_date,
             "projects": tuple(project_names),
@@ -1588,14 +1731,14 @@ def get_department_project_status_finance(
     invoice_names_period = [r.name for r in period_invoice_rows]
 
     outstanding_rows = frappe.db.sql(
-        """
+        f"""
         SELECT
             si.name,
             si.outstanding_amount,
             si.due_date
         FROM `tabSales Invoice` si
         WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND si.outstanding_amount > 0
           AND (
             si.project IN %(projects)s
@@ -1608,7 +1751,6 @@ def get_department_project_status_finance(
           )
         """,
         {
-            "demo": demo_pattern,
             "projects": tuple(project_names),
         },
         as_dict=True,
@@ -1672,6 +1814,8 @@ def _owner_initials(display_name):
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_department_project_delivery_health(department=None, limit=5):
     """Execution view for department projects with owner initials in each row."""
     limit = max(1, min(cint(limit or 5), 100))
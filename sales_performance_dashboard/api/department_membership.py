@@ -0,0 +1,98 @@
+import frappe
+
+MEMBERSHIP_CACHE_KEY = "sales_performance_dashboard:department_membership"
+
+
+def get_department_membership(department, include_children=False):
+    """Employees, users and sales persons of a department (optionally with its sub-departments).
+
+    Matches the department exactly by default, like Department targets do;
+    pass include_children=True to roll sub-departments up.
+
+    `employee_ids`, `user_ids` and `sales_persons` cover active employees;
+    the `all_*` variants also include employees who have Left. Results are
+    cached in Redis until an Employee, Sales Person or Department changes.
+    """
+    if not department:
+        return _empty_membership()
+
+    memo = getattr(frappe.local, "spd_department_membership", None)
+    if memo is None:
+        memo = frappe.local.spd_department_membership = {}
+
+    key = f"{department}|{int(bool(include_children))}"
+    if key not in memo:
+        data = frappe.cache().hget(
+            MEMBERSHIP_CACHE_KEY,
+            key,
+            lambda: _build_membership(department, include_children),
+        )
+        memo[key] = frappe._dict(data or _empty_membership())
+    return memo[key]
+
+
+def get_department_tree(department):
+    """The department followed by every descendant (via the Department nested set)."""
+    bounds = frappe.db.get_value("Department", department, ["lft", "rgt"], as_dict=True)
+    if not bounds or not bounds.lft or not bounds.rgt:
+        return [department]
+
+    descendants = frappe.get_all(
+        "Department",
+        filters={"lft": (">", bounds.lft), "rgt": ("<", bounds.rgt)},
+        pluck="name",
+        order_by="lft asc",
+    )
+    return [department, *descendants]
+
+
+def clear_department_membership_cache(doc=None, method=None, *args):
+    """Drop cached memberships; wired to Employee, Sales Person and Department changes."""
+    frappe.cache().delete_value(MEMBERSHIP_CACHE_KEY)
+    if hasattr(frappe.local, "spd_department_membership"):
+        del frappe.local.spd_department_membership
+
+
+def _build_membership(department, include_children):
+    departments = get_department_tree(department) if include_children else [department]
+    employees = frappe.get_all(
+        "Employee",
+        filters={"department": ("in", departments)},
+        fields=["name", "user_id", "status"],
+    )
+    active = [row for row in employees if row.status != "Left"]
+
+    sales_person_rows = []
+    if employees:
+        sales_person_rows = frappe.get_all(
+            "Sales Person",
+            filters={"employee": ("in", [row.name for row in employees])},
+            fields=["name", "employee"],
+        )
+    active_ids = {row.name for row in active}
+
+    return {
+        "departments": departments,
+        "employee_ids": [row.name for row in active],
+        "user_ids": _unique(row.user_id for row in active if row.user_id),
+        "sales_persons": [row.name for row in sales_person_rows if row.employee in active_ids],
+        "all_employee_ids": [row.name for row in employees],
+        "all_user_ids": _unique(row.user_id for row in employees if row.user_id),
+        "all_sales_persons": [row.name for row in sales_person_rows],
+    }
+
+
+def _empty_membership():
+    return frappe._dict(
+        departments=[],
+        employee_ids=[],
+        user_ids=[],
+        sales_persons=[],
+        all_employee_ids=[],
+        all_user_ids=[],
+        all_sales_persons=[],
+    )
+
+
+def _unique(values):
+    return list(dict.fromkeys(values))
@@ -0,0 +1,254 @@
+import contextlib
+import functools
+import json
+import math
+import time
+
+import frappe
+from frappe.utils import cint, flt, now_datetime
+
+from sales_performance_dashboard.api.access_settings import (
+    instrument_dashboard_apis,
+    persist_dashboard_api_metrics,
+)
+
+SAMPLES_KEY = "sales_performance_dashboard:api_samples"
+ENDPOINTS_KEY = "sales_performance_dashboard:api_endpoints"
+PASSES_KEY = "sales_performance_dashboard:api_passes"
+LOG_QUEUE_KEY = "sales_performance_dashboard:api_log_queue"
+LOG_DOCTYPE = "Sales Dashboard API Log"
+# Most recent calls per endpoint that the percentiles are computed over.
+SAMPLE_WINDOW = 500
+LOG_FLUSH_CHUNK = 500
+PERCENTILES = (50, 90, 99)
+METRICS = ("total_ms", "sql_ms", "python_ms", "queries", "rows_read", "payload_bytes")
+COUNT_METRICS = ("queries", "rows_read", "payload_bytes")
+
+
+def instrumented(fn):
+    """Record query count, SQL and Python time, rows read and payload size per call.
+
+    Does nothing unless **Instrument Dashboard APIs** is on. Calls are kept as
+    a rolling window per endpoint in Redis (see `get_api_stats`) and, with
+    **Save Instrumented Calls to Sales Dashboard API Log**, queued for the log.
+    Only the outermost instrumented call is recorded; nested ones count towards it.
+    """
+    endpoint = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # Nested calls (e.g. a module endpoint calling another) run inside the
+        # outer sample, so each request is recorded once.
+        if not _instrumentation_enabled() or _active_samples():
+            return fn(*args, **kwargs)
+
+        sample = {"queries": 0, "sql_ms": 0.0, "rows_read": 0}
+        stack = _active_samples()
+        stack.append(sample)
+        _count_sql()
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            stack.pop()
+            _stop_counting_sql()
+
+        total_ms = (time.perf_counter() - started) * 1000
+        sample.update(
+            total_ms=total_ms,
+            python_ms=max(total_ms - sample["sql_ms"], 0),
+            payload_bytes=_payload_size(result),
+        )
+        record_sample(endpoint, sample)
+        if sample.get("passes"):
+            frappe.logger("sales_performance_dashboard").info(
+                f"{endpoint}: {round(total_ms, 1)} ms, passes "
+                + ", ".join(f"{name}={round(ms, 1)} ms" for name, ms in sample["passes"].items())
+            )
+        return result
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def timed_pass(name):
+    """Time one pass of the running instrumented call (e.g. the invoice query).
+
+    Pass timings are kept next to the call's sample, reported per endpoint by
+    `get_api_stats` and logged; never part of the response.
+    """
+    stack = _active_samples()
+    if not stack:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        passes = stack[-1].setdefault("passes", {})
+        passes[name] = passes.get(name, 0) + (time.perf_counter() - started) * 1000
+
+
+def record_sample(endpoint, sample):
+    cache = frappe.cache()
+    key = f"{SAMPLES_KEY}:{endpoint}"
+    cache.lpush(key, json.dumps([round(flt(sample[metric]), 3) for metric in METRICS]))
+    cache.ltrim(key, 0, SAMPLE_WINDOW - 1)
+    cache.sadd(ENDPOINTS_KEY, endpoint)
+    if sample.get("passes"):
+        passes_key = f"{PASSES_KEY}:{endpoint}"
+        cache.lpush(passes_key, json.dumps({name: round(ms, 3) for name, ms in sample["passes"].items()}))
+        cache.ltrim(passes_key, 0, SAMPLE_WINDOW - 1)
+
+    if persist_dashboard_api_metrics():
+        cache.rpush(
+            LOG_QUEUE_KEY,
+            json.dumps(
+                {
+                    "endpoint": endpoint,
+                    "user": frappe.session.user,
+                    "called_at": str(now_datetime()),
+                    **{metric: sample[metric] for metric in METRICS},
+                }
+            ),
+        )
+
+
+@frappe.whitelist()
+def get_api_stats(endpoint=None):
+    """Percentiles of each metric over the last SAMPLE_WINDOW calls, slowest endpoints (p90) first."""
+    frappe.only_for("System Manager")
+
+    cache = frappe.cache()
+    endpoints = [endpoint] if endpoint else sorted(_decode(name) for name in cache.smembers(ENDPOINTS_KEY) or [])
+    rows = []
+    for name in endpoints:
+        samples = [json.loads(_decode(value)) for value in cache.lrange(f"{SAMPLES_KEY}:{name}", 0, -1) or []]
+        if not samples:
+            continue
+
+        row = {"endpoint": name, "calls": len(samples)}
+        for idx, metric in enumerate(METRICS):
+            values = sorted(flt(sample[idx]) for sample in samples)
+            row[metric] = {
+                **{f"p{pct}": round(_percentile(values, pct), 2) for pct in PERCENTILES},
+                "avg": round(sum(values) / len(values), 2),
+                "max": round(values[-1], 2),
+            }
+
+        passes = [json.loads(_decode(value)) for value in cache.lrange(f"{PASSES_KEY}:{name}", 0, -1) or []]
+        if passes:
+            row["passes"] = {}
+            for pass_name in sorted({key for entry in passes for key in entry}):
+                values = sorted(flt(entry[pass_name]) for entry in passes if pass_name in entry)
+                row["passes"][pass_name] = {
+                    **{f"p{pct}": round(_percentile(values, pct), 2) for pct in PERCENTILES},
+                    "avg": round(sum(values) / len(values), 2),
+                }
+        rows.append(row)
+
+    rows.sort(key=lambda row: row["total_ms"]["p90"], reverse=True)
+    return {"window": SAMPLE_WINDOW, "endpoints": rows}
+
+
+@frappe.whitelist()
+def reset_api_stats():
+    frappe.only_for("System Manager")
+
+    cache = frappe.cache()
+    names = [_decode(name) for name in cache.smembers(ENDPOINTS_KEY) or []]
+    cache.delete_value(
+        [f"{SAMPLES_KEY}:{name}" for name in names] + [f"{PASSES_KEY}:{name}" for name in names] + [ENDPOINTS_KEY]
+    )
+    return {"ok": True}
+
+
+def flush_api_log():
+    """Scheduled: move queued calls into the Sales Dashboard API Log, one INSERT per chunk."""
+    cache = frappe.cache()
+    while True:
+        queued = cache.lrange(LOG_QUEUE_KEY, 0, LOG_FLUSH_CHUNK - 1) or []
+        if not queued:
+            return
+        cache.ltrim(LOG_QUEUE_KEY, len(queued), -1)
+
+        now = now_datetime()
+        columns = ["name", "creation", "modified", "modified_by", "owner", "docstatus", "idx"]
+        columns += ["endpoint", "user", "called_at", *METRICS]
+        values = []
+        for entry in queued:
+            entry = json.loads(_decode(entry))
+            values.extend([frappe.generate_hash(length=12), now, now, "Administrator", entry["user"], 0, 0])
+            values.extend([entry["endpoint"], entry["user"], entry["called_at"]])
+            values.extend(
+                cint(entry[metric]) if metric in COUNT_METRICS else flt(entry[metric], 3) for metric in METRICS
+            )
+
+        row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        frappe.db.sql(
+            f"""
+            INSERT INTO `tab{LOG_DOCTYPE}` ({", ".join(f"`{col}`" for col in columns)})
+            VALUES {", ".join([row_placeholder] * len(queued))}
+            """,
+            values,
+        )
+        frappe.db.commit()
+
+
+def _instrumentation_enabled():
+    # Read once per request; a page render calls many instrumented endpoints.
+    enabled = getattr(frappe.local, "spd_instrumentation_enabled", None)
+    if enabled is None:
+        enabled = frappe.local.spd_instrumentation_enabled = instrument_dashboard_apis()
+    return enabled
+
+
+def _active_samples():
+    stack = getattr(frappe.local, "spd_instrumented_samples", None)
+    if stack is None:
+        stack = frappe.local.spd_instrumented_samples = []
+    return stack
+
+
+def _count_sql():
+    """Shadow this request's frappe.db.sql with a counting wrapper."""
+    db = frappe.db
+    original = db.sql
+
+    def sql(*args, **kwargs):
+        started = time.perf_counter()
+        result = original(*args, **kwargs)
+        elapsed = (time.perf_counter() - started) * 1000
+        rows = len(result) if isinstance(result, list | tuple) else 0
+        for sample in _active_samples():
+            sample["queries"] += 1
+            sample["sql_ms"] += elapsed
+            sample["rows_read"] += rows
+        return result
+
+    db.sql = sql
+    frappe.local.spd_instrumented_db = db
+
+
+def _stop_counting_sql():
+    db = getattr(frappe.local, "spd_instrumented_db", None)
+    if db is not None:
+        db.__dict__.pop("sql", None)
+        frappe.local.spd_instrumented_db = None
+
+
+def _payload_size(result):
+    try:
+        return len(json.dumps(result, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _percentile(values, pct):
+    # Nearest rank on an ascending list.
+    return values[min(len(values) - 1, max(math.ceil(pct / 100 * len(values)) - 1, 0))]
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
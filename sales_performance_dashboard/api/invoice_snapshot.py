@@ -0,0 +1,226 @@
+import heapq
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+import frappe
+from frappe.utils import add_months, get_first_day, getdate, nowdate
+
+from sales_performance_dashboard.api.access_settings import use_invoice_snapshot
+from sales_performance_dashboard.api.dashboard_cache import get_department_version
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+
+# Widest window a snapshot widget reads: the 24-month gross margin trend.
+SNAPSHOT_MONTHS = 24
+# Short: the snapshot only has to outlive one workspace render.
+SNAPSHOT_TTL_SEC = 120
+SNAPSHOT_MAX_ENTRIES = 16
+
+# Per-process snapshots: {(site, department): (expires_at, version, snapshot)}.
+_snapshots = OrderedDict()
+
+
+class InvoiceSnapshot:
+    """Columnar copy of a department's recent and open invoices and recent payments.
+
+    Invoices posted since `window_start`, plus older ones still outstanding,
+    sit in parallel typed arrays sorted by posting date, so date ranges are
+    bisected slices. Dates are ordinals (0 when empty); customers are indexes
+    into `customer_values`. Payments are summed per posting date, sorted.
+    """
+
+    def __init__(self, window_start):
+        self.window_start = _ordinal(window_start)
+        self.customer_values = []
+        self.customer = array("l")
+        self.posting = array("l")
+        self.due = array("l")
+        self.grand_total = array("d")
+        self.outstanding = array("d")
+        self.net_sales = array("d")
+        self.cogs = array("d")
+        self.open_invoices = array("l")
+        self.payment_posting = array("l")
+        self.payment_amount = array("d")
+
+    def __len__(self):
+        return len(self.posting)
+
+    def covers(self, from_date):
+        return _ordinal(from_date) >= self.window_start
+
+    def invoice_kpis(self, dates, risk_window_days):
+        """Same figures as the department KPI invoice query."""
+        month = self._invoice_range(dates["month_start"], dates["month_end"])
+        week = self._invoice_range(dates["week_start"], dates["week_end"])
+        rolling_3m = self._invoice_range(dates["rolling_3m_start"], dates["month_end"])
+        risk_limit = _ordinal(dates["today"]) + risk_window_days
+
+        outstanding = revenue_at_risk = 0.0
+        for idx in self.open_invoices:
+            outstanding += self.outstanding[idx]
+            if self.due[idx] and self.due[idx] <= risk_limit:
+                revenue_at_risk += self.outstanding[idx]
+
+        return {
+            "revenue": sum(self.grand_total[month]),
+            "rolling_3m_invoiced": sum(self.grand_total[rolling_3m]),
+            "outstanding": outstanding,
+            "revenue_at_risk": revenue_at_risk,
+            "total_invoices": month.stop - month.start,
+            "customers_served_week": len(set(self.customer[week])),
+            "customers_served_month": len(set(self.customer[month])),
+        }
+
+    def collection_kpis(self, dates):
+        month = _range(self.payment_posting, dates["month_start"], dates["month_end"])
+        rolling_3m = _range(self.payment_posting, dates["rolling_3m_start"], dates["month_end"])
+        return {
+            "collected": sum(self.payment_amount[month]),
+            "rolling_3m_collected": sum(self.payment_amount[rolling_3m]),
+        }
+
+    def margin_by_bucket(self, buckets):
+        """Net sales and COGS per (start, end, label) bucket, by posting date."""
+        ranges = [self._invoice_range(start, end) for start, end, _ in buckets]
+        return {
+            "sales": [sum(self.net_sales[bucket]) for bucket in ranges],
+            "cogs": [sum(self.cogs[bucket]) for bucket in ranges],
+        }
+
+    def overdue_aging(self, as_of, top_limit):
+        """Same aggregates as payment_delay.get_overdue_aging, from the snapshot."""
+        as_of = _ordinal(as_of)
+        buckets = {}
+        customers = {}
+        for idx in self.open_invoices:
+            due = self.due[idx]
+            if not due or due >= as_of:
+                continue
+            amount = self.outstanding[idx]
+            days = as_of - due
+            label = "0-30" if days <= 30 else "31-60" if days <= 60 else "61-90" if days <= 90 else "90+"
+            for agg in (
+                buckets.setdefault(label, {"amount": 0.0, "amount_days": 0.0, "count": 0}),
+                customers.setdefault(
+                    self.customer[idx], {"amount": 0.0, "amount_days": 0.0, "count": 0}
+                ),
+            ):
+                agg["amount"] += amount
+                agg["amount_days"] += amount * days
+                agg["count"] += 1
+
+        top = heapq.nlargest(top_limit, customers.items(), key=lambda item: item[1]["amount_days"])
+        return buckets, [{"customer": self.customer_values[code], **agg} for code, agg in top]
+
+    def _invoice_range(self, start, end):
+        return _range(self.posting, start, end)
+
+
+def get_invoice_snapshot(department, si_condition, si_dynamic, from_date=None):
+    """The department's snapshot, or None when the setting is off or it does not reach `from_date`.
+
+    Kept per process for SNAPSHOT_TTL_SEC and keyed on the department's cache
+    version, so membership changes and the department's postings (once the
+    minute's queue is processed) make the next call rebuild it.
+    """
+    if not department or not use_invoice_snapshot():
+        return None
+
+    key = (frappe.local.site, department)
+    version = get_department_version(department)
+    entry = _snapshots.get(key)
+    if entry is None or entry[0] < time.monotonic() or entry[1] != version:
+        window_start = get_first_day(add_months(getdate(nowdate()), -(SNAPSHOT_MONTHS - 1)))
+        entry = (
+            time.monotonic() + SNAPSHOT_TTL_SEC,
+            version,
+            build_invoice_snapshot(si_condition, si_dynamic, window_start),
+        )
+        _snapshots[key] = entry
+    _snapshots.move_to_end(key)
+    while len(_snapshots) > SNAPSHOT_MAX_ENTRIES:
+        _snapshots.popitem(last=False)
+
+    snapshot = entry[2]
+    if from_date and not snapshot.covers(from_date):
+        return None
+    return snapshot
+
+
+def build_invoice_snapshot(si_condition, si_dynamic, window_start):
+    snapshot = InvoiceSnapshot(window_start)
+    params = {**si_dynamic, "window_start": window_start}
+
+    invoices = frappe.db.sql(
+        f"""
+        SELECT
+            si.customer, si.posting_date, si.due_date,
+            si.grand_total, si.outstanding_amount,
+            COALESCE(SUM(sii.base_net_amount), 0) AS net_sales,
+            COALESCE(SUM(IFNULL(sii.stock_qty, 0) * IFNULL(sii.incoming_rate, 0)), 0) AS cogs
+        FROM `tabSales Invoice` si
+        LEFT JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
+        WHERE si.docstatus = 1
+          AND (si.posting_date >= %(window_start)s OR si.outstanding_amount > 0)
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
+          AND {si_condition}
+        GROUP BY si.name
+        ORDER BY si.posting_date
+        """,
+        params,
+        as_list=True,
+    )
+    customer_index = {}
+    for idx, (customer, posting_date, due_date, grand_total, outstanding, net_sales, cogs) in enumerate(invoices):
+        snapshot.customer.append(_encode(customer or "Unknown", customer_index, snapshot.customer_values))
+        snapshot.posting.append(_ordinal(posting_date))
+        snapshot.due.append(_ordinal(due_date))
+        snapshot.grand_total.append(float(grand_total or 0))
+        snapshot.outstanding.append(float(outstanding or 0))
+        snapshot.net_sales.append(float(net_sales or 0))
+        snapshot.cogs.append(float(cogs or 0))
+        if outstanding and outstanding > 0:
+            snapshot.open_invoices.append(idx)
+
+    # Collections count by payment date, whatever the invoice's age.
+    payments = frappe.db.sql(
+        f"""
+        SELECT pe.posting_date, SUM(per.allocated_amount)
+        FROM `tabPayment Entry Reference` per
+        INNER JOIN `tabPayment Entry` pe ON pe.name = per.parent
+        INNER JOIN `tabSales Invoice` si ON si.name = per.reference_name
+        WHERE per.reference_doctype = 'Sales Invoice'
+          AND pe.docstatus = 1
+          AND pe.posting_date >= %(window_start)s
+          AND si.docstatus = 1
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
+          AND {si_condition}
+        GROUP BY pe.posting_date
+        ORDER BY pe.posting_date
+        """,
+        params,
+        as_list=True,
+    )
+    for posting_date, amount in payments:
+        snapshot.payment_posting.append(_ordinal(posting_date))
+        snapshot.payment_amount.append(float(amount or 0))
+
+    return snapshot
+
+
+def _range(ordinals, start, end):
+    """Slice of the ascending `ordinals` falling within [start, end]."""
+    return slice(bisect_left(ordinals, _ordinal(start)), bisect_right(ordinals, _ordinal(end)))
+
+
+def _encode(value, index, values):
+    if value not in index:
+        index[value] = len(values)
+        values.append(value)
+    return index[value]
+
+
+def _ordinal(value):
+    return getdate(value).toordinal() if value else 0
@@ -0,0 +1,115 @@
+import frappe
+from frappe.utils import cint, flt
+
+AGING_BUCKETS = ("0-30", "31-60", "61-90", "90+")
+
+
+def get_overdue_aging(where_sql, params, as_of, top_limit):
+    """Overdue outstanding per aging bucket and for the top customers, grouped in SQL.
+
+    `where_sql` filters `tabSales Invoice` aliased `si`. Returns
+    ({bucket: row}, [customer rows]) where each row carries amount,
+    amount_days (outstanding x days overdue) and count; customers are the
+    `top_limit` largest by amount_days, i.e. by delay cost.
+    """
+    overdue_sql = f"""
+        SELECT
+            si.customer,
+            si.outstanding_amount AS amount,
+            GREATEST(DATEDIFF(%(as_of)s, si.due_date), 0) AS days
+        FROM `tabSales Invoice` si
+        WHERE {where_sql}
+          AND si.outstanding_amount > 0
+          AND si.due_date < %(as_of)s
+    """
+    params = {**params, "as_of": as_of}
+
+    bucket_rows = frappe.db.sql(
+        f"""
+        SELECT
+            CASE
+                WHEN d.days <= 30 THEN '0-30'
+                WHEN d.days <= 60 THEN '31-60'
+                WHEN d.days <= 90 THEN '61-90'
+                ELSE '90+'
+            END AS bucket,
+            SUM(d.amount) AS amount,
+            SUM(d.amount * d.days) AS amount_days,
+            COUNT(*) AS count
+        FROM ({overdue_sql}) d
+        GROUP BY bucket
+        """,
+        params,
+        as_dict=True,
+    )
+
+    customer_rows = frappe.db.sql(
+        f"""
+        SELECT
+            COALESCE(NULLIF(d.customer, ''), 'Unknown') AS customer,
+            SUM(d.amount) AS amount,
+            SUM(d.amount * d.days) AS amount_days,
+            COUNT(*) AS count
+        FROM ({overdue_sql}) d
+        GROUP BY COALESCE(NULLIF(d.customer, ''), 'Unknown')
+        ORDER BY amount_days DESC
+        LIMIT {cint(top_limit)}
+        """,
+        params,
+        as_dict=True,
+    )
+
+    return {row.bucket: row for row in bucket_rows}, customer_rows
+
+
+def build_payment_delay_payload(as_of, annual_financing_rate, buckets, customers):
+    """Payment delay cost response from aging aggregates; cost = amount x days x daily rate."""
+    rate_per_day = annual_financing_rate / 100 / 365
+
+    bucket_rows = []
+    overdue_outstanding = 0.0
+    weighted_days = 0.0
+    for label in AGING_BUCKETS:
+        row = buckets.get(label) or {}
+        amount = flt(row.get("amount"))
+        amount_days = flt(row.get("amount_days"))
+        overdue_outstanding += amount
+        weighted_days += amount_days
+        bucket_rows.append(
+            {
+                "label": label,
+                "amount": round(amount, 2),
+                "cost": round(amount_days * rate_per_day, 2),
+                "count": cint(row.get("count")),
+            }
+        )
+
+    estimated_delay_cost = weighted_days * rate_per_day
+    avg_overdue_days = (weighted_days / overdue_outstanding) if overdue_outstanding > 0 else 0
+    daily_financing_cost = overdue_outstanding * rate_per_day
+    cost_pct_of_overdue = (estimated_delay_cost / overdue_outstanding * 100) if overdue_outstanding > 0 else 0
+
+    top_customers = []
+    for row in customers:
+        cost = flt(row.get("amount_days")) * rate_per_day
+        top_customers.append(
+            {
+                "customer": row.get("customer"),
+                "amount": round(flt(row.get("amount")), 2),
+                "cost": round(cost, 2),
+                "count": cint(row.get("count")),
+                "cost_pct": round((cost / estimated_delay_cost * 100), 2) if estimated_delay_cost > 0 else 0,
+            }
+        )
+
+    return {
+        "as_of": str(as_of),
+        "annual_financing_rate": round(annual_financing_rate, 2),
+        "overdue_outstanding": round(overdue_outstanding, 2),
+        "estimated_delay_cost": round(estimated_delay_cost, 2),
+        "cost_pct_of_overdue": round(cost_pct_of_overdue, 2),
+        "daily_financing_cost": round(daily_financing_cost, 2),
+        "avg_overdue_days": round(avg_overdue_days, 1),
+        "buckets": bucket_rows,
+        "top_customers": top_customers,
+    }
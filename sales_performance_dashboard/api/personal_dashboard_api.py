@@ -5,12 +5,13 @@
 import frappe
 from frappe.utils import add_months, cint, date_diff, flt, get_first_day, get_last_day, getdate, nowdate
 
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.instrumentation import instrumented
 from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
+    get_dashboard_context,
 )
 
 ELEVATED_ROLES = {"Sales Manager", "System Manager", "Administrator"}
-DEMO_PATTERN = "SPD-DEMO-%"
 
 
 def _is_elevated_user(user=None):
@@ -112,6 +113,7 @@ def _personal_view_range(view_mode=None, reference_date=None):
 
 
 @frappe.whitelist()
+@instrumented
 def get_personal_dashboard_filter_options(department=None):
     scope = resolve_personal_scope(department=department)
     current_user = frappe.session.user
@@ -169,21 +171,24 @@ def get_personal_dashboard_filter_options(department=None):
 
 
 @frappe.whitelist()
+@instrumented
 def get_personal_dashboard_data(user=None, department=None, employee=None):
     """Get all metrics for personal sales dashboard."""
     scope = resolve_personal_scope(department=department, employee=employee, user=user)
-    dashboard = PersonalSalesDashboard(scope["user"])
+    dashboard = get_dashboard_context(scope["user"])
     return dashboard.get_all_metrics()
 
 
 @frappe.whitelist()
+@instrumented
 def get_personal_revenue_metric(department=None, employee=None):
     scope = resolve_personal_scope(department=department, employee=employee)
-    dashboard = PersonalSalesDashboard(scope["user"])
+    dashboard = get_dashboard_context(scope["user"])
     return {"value": dashboard.get_total_revenue(), "scope": scope}
 
 
 @frappe.whitelist()
+@instrumented
 def get_my_sales_target_route(department=None, employee=None):
     """Return route info for selected scope's Sales Target."""
     scope = resolve_personal_scope(department=department, employee=employee)
@@ -215,6 +220,7 @@ def get_my_sales_target_route(department=None, employee=None):
 
 
 @frappe.whitelist()
+@instrumented
 def get_personal_project_pipeline(department=None, employee=None):
     """Project status split for personal dashboard donut."""
     scope = resolve_personal_scope(department=department, employee=employee)
@@ -256,6 +262,7 @@ def get_personal_project_pipeline(department=None, employee=None):
 
 
 @frappe.whitelist()
+@instrumented
 def get_personal_project_delivery_health(department=None, employee=None, limit=5):
     """Execution view for personal projects: health, completion, and task load."""
     scope = resolve_personal_scope(department=department, employee=employee)
@@ -363,6 +370,7 @@ def get_personal_project_delivery_health(department=None, employee=None, limit=5
 
 
 @frappe.whitelist()
+@instrumented
 def get_personal_project_value_billing(department=None, employee=None, limit=20):
     """Project value vs billing metrics for personal dashboard."""
     scope = resolve_personal_scope(department=department, employee=employee)
@@ -476,6 +484,7 @@ def get_personal_project_value_billing(department=None, employee=None, limit=20)
 
 
 @frappe.whitelist()
+@instrumented
 def get_personal_project_status_finance(
     department=None,
     employee=None,
@@ -521,14 +530,14 @@ def get_personal_project_status_finance(
     completed = sum(1 for p in project_rows if (p.status or "") in completed_statuses)
 
     period_invoice_rows = frappe.db.sql(
-        """
+        f"""
         SELECT
             si.name,
             si.grand_total,
             si.outstanding_amount
         FROM `tabSales Invoice` si
         WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
           AND (
             si.project IN %(projects)s
@@ -541,7 +550,6 @@ def get_personal_project_status_finance(
           )
         """,
         {
-            "demo": DEMO_PATTERN,
             "from_date": from_date,
             "to_date": to_date,
             "projects": tuple(project_names),
@@ -553,14 +561,14 @@ def get_personal_project_status_finance(
     invoice_names_period = [r.name for r in period_invoice_rows]
 
     outstanding_invoice_rows = frappe.db.sql(
-        """
+        f"""
         SELECT
             si.name,
             si.outstanding_amount,
             si.due_date
         FROM `tabSales Invoice` si
         WHERE si.docstatus = 1
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND si.outstanding_amount > 0
           AND (
             si.project IN %(projects)s
@@ -573,7 +581,6 @@ def get_personal_project_status_finance(
           )
         """,
         {
-            "demo": DEMO_PATTERN,
             "projects": tuple(project_names),
         },
         as_dict=True,
@@ -0,0 +1,193 @@
+import frappe
+
+ATTRIBUTION_DOCTYPE = "Sales Attribution"
+VOUCHER_DATE_FIELDS = {
+    "Sales Invoice": "posting_date",
+    "Sales Order": "transaction_date",
+}
+RESYNC_CHUNK_SIZE = 500
+
+
+def sync_sales_attribution(doc, method=None):
+    """Rewrite a voucher's attribution rows on submit; drop them on cancel."""
+    if doc.doctype not in VOUCHER_DATE_FIELDS:
+        return
+
+    delete_attribution(doc.doctype, doc.name)
+    if method != "on_cancel" and doc.docstatus == 1:
+        insert_attribution(doc.doctype, voucher_no=doc.name)
+
+
+def resync_sales_person_attribution(doc, method=None):
+    """Re-attribute vouchers of a Sales Person whose linked employee changed."""
+    if not doc.has_value_changed("employee"):
+        return
+
+    for voucher_type in VOUCHER_DATE_FIELDS:
+        vouchers = frappe.db.sql_list(
+            """
+            SELECT DISTINCT parent
+            FROM `tabSales Team`
+            WHERE parenttype = %(voucher_type)s
+              AND sales_person = %(sales_person)s
+            """,
+            {"voucher_type": voucher_type, "sales_person": doc.name},
+        )
+        resync_attribution(voucher_type, vouchers)
+
+
+def resync_employee_attribution(doc, method=None):
+    """Re-attribute vouchers of an Employee whose department or user changed.
+
+    Existing rows cover the old department and the old user's vouchers; the
+    owner match picks up vouchers of the new user.
+    """
+    if not (doc.has_value_changed("department") or doc.has_value_changed("user_id")):
+        return
+
+    for voucher_type in VOUCHER_DATE_FIELDS:
+        vouchers = frappe.db.sql_list(
+            f"""
+            SELECT voucher_no
+            FROM `tab{ATTRIBUTION_DOCTYPE}`
+            WHERE voucher_type = %(voucher_type)s
+              AND employee = %(employee)s
+            UNION
+            SELECT name
+            FROM `tab{voucher_type}`
+            WHERE docstatus = 1
+              AND owner = %(user_id)s
+            """,
+            {"voucher_type": voucher_type, "employee": doc.name, "user_id": doc.user_id or ""},
+        )
+        resync_attribution(voucher_type, vouchers)
+
+
+def resync_attribution(voucher_type, voucher_nos, chunk_size=RESYNC_CHUNK_SIZE):
+    """Rewrite the attribution rows of the given vouchers in chunks."""
+    voucher_nos = list(voucher_nos)
+    for start in range(0, len(voucher_nos), chunk_size):
+        chunk = tuple(voucher_nos[start : start + chunk_size])
+        delete_attribution(voucher_type, voucher_nos=chunk)
+        insert_attribution(voucher_type, voucher_nos=chunk)
+
+
+def delete_attribution(voucher_type, voucher_no=None, voucher_nos=None):
+    conditions = ["voucher_type = %(voucher_type)s"]
+    params = {"voucher_type": voucher_type}
+    if voucher_no:
+        conditions.append("voucher_no = %(voucher_no)s")
+        params["voucher_no"] = voucher_no
+    if voucher_nos:
+        conditions.append("voucher_no IN %(voucher_nos)s")
+        params["voucher_nos"] = tuple(voucher_nos)
+
+    frappe.db.sql(
+        f"DELETE FROM `tab{ATTRIBUTION_DOCTYPE}` WHERE {' AND '.join(conditions)}",
+        params,
+    )
+
+
+def insert_attribution(voucher_type, voucher_no=None, voucher_nos=None):
+    """Set-based insert of Sales Team and Owner attribution rows for submitted vouchers."""
+    date_field = VOUCHER_DATE_FIELDS[voucher_type]
+    voucher_condition = ""
+    totals_condition = ""
+    params = {"voucher_type": voucher_type, "user": frappe.session.user}
+    if voucher_no:
+        voucher_condition = "AND v.name = %(voucher_no)s"
+        totals_condition = "AND parent = %(voucher_no)s"
+        params["voucher_no"] = voucher_no
+    elif voucher_nos:
+        voucher_condition = "AND v.name IN %(voucher_nos)s"
+        totals_condition = "AND parent IN %(voucher_nos)s"
+        params["voucher_nos"] = tuple(voucher_nos)
+
+    common_columns = """
+        name, creation, modified, modified_by, owner, docstatus, idx,
+        voucher_type, voucher_no, posting_date, source, department, employee, sales_person, share
+    """
+
+    # One row per Sales Team line, share normalised by allocated percentage.
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{ATTRIBUTION_DOCTYPE}` ({common_columns})
+        SELECT
+            MD5(CONCAT_WS('|', %(voucher_type)s, v.name, 'Sales Team', st.name)),
+            NOW(), NOW(), %(user)s, %(user)s, 0, 0,
+            %(voucher_type)s, v.name, v.{date_field}, 'Sales Team',
+            IFNULL(e.department, ''), IFNULL(sp.employee, ''), st.sales_person,
+            CASE
+                WHEN totals.total_pct > 0 THEN GREATEST(IFNULL(st.allocated_percentage, 0), 0) / totals.total_pct
+                ELSE 1 / totals.member_count
+            END
+        FROM `tabSales Team` st
+        INNER JOIN `tab{voucher_type}` v ON v.name = st.parent
+        INNER JOIN (
+            SELECT
+                parent,
+                SUM(GREATEST(IFNULL(allocated_percentage, 0), 0)) AS total_pct,
+                COUNT(*) AS member_count
+            FROM `tabSales Team`
+            WHERE parenttype = %(voucher_type)s
+              {totals_condition}
+            GROUP BY parent
+        ) totals ON totals.parent = st.parent
+        LEFT JOIN `tabSales Person` sp ON sp.name = st.sales_person
+        LEFT JOIN `tabEmployee` e ON e.name = sp.employee
+        WHERE st.parenttype = %(voucher_type)s
+          AND v.docstatus = 1
+          {voucher_condition}
+        """,
+        params,
+    )
+
+    # One row per employee linked to the voucher owner; carries the share only without a Sales Team.
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{ATTRIBUTION_DOCTYPE}` ({common_columns})
+        SELECT
+            MD5(CONCAT_WS('|', %(voucher_type)s, v.name, 'Owner', e.name)),
+            NOW(), NOW(), %(user)s, %(user)s, 0, 0,
+            %(voucher_type)s, v.name, v.{date_field}, 'Owner',
+            IFNULL(e.department, ''), e.name, '',
+            CASE
+                WHEN EXISTS (
+                    SELECT 1 FROM `tabSales Team` st
+                    WHERE st.parenttype = %(voucher_type)s AND st.parent = v.name
+                ) THEN 0
+                ELSE 1
+            END
+        FROM `tab{voucher_type}` v
+        INNER JOIN `tabEmployee` e ON e.user_id = v.owner
+        WHERE v.docstatus = 1
+          {voucher_condition}
+        """,
+        params,
+    )
+
+
+def backfill_sales_attribution(voucher_types=None):
+    """Rebuild the attribution table for every submitted voucher of the given types."""
+    for voucher_type in voucher_types or VOUCHER_DATE_FIELDS:
+        delete_attribution(voucher_type)
+        insert_attribution(voucher_type)
+        frappe.db.commit()
+
+
+def attributed_voucher_condition(voucher_alias, voucher_type, employee_ids, param_name="employee_ids"):
+    """Semi-join keeping vouchers attributed (Sales Team or owner) to any of the employees."""
+    if not employee_ids:
+        return "1 = 0", {}
+
+    return (
+        f"""
+        {voucher_alias}.name IN (
+            SELECT sa.voucher_no
+            FROM `tab{ATTRIBUTION_DOCTYPE}` sa
+            WHERE sa.voucher_type = '{voucher_type}'
+              AND sa.employee IN %({param_name})s
+        )
+        """,
+        {param_name: tuple(employee_ids)},
+    )
@@ -0,0 +1,374 @@
+import hashlib
+from collections import defaultdict
+
+import frappe
+from frappe.utils import add_months, flt, get_first_day, get_last_day, getdate, now_datetime
+
+from sales_performance_dashboard.api.chart_buckets import bins_span, scatter_into_bins
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+
+FACT_DOCTYPE = "Sales Daily Fact"
+# Months before the current one that the nightly rebuild recomputes; older
+# rows only change through submit/cancel deltas or a manual full rebuild.
+REBUILD_WINDOW_MONTHS = 3
+KEY_FIELDS = ("posting_date", "company", "department", "employee", "owner_user", "customer")
+MEASURE_FIELDS = (
+    "invoice_count",
+    "revenue",
+    "net_amount",
+    "cogs",
+    "list_value",
+    "leakage",
+    "leakage_pct_total",
+    "collected",
+    "outstanding_delta",
+)
+
+
+def apply_sales_invoice(doc, method=None):
+    """Add (submit) or subtract (cancel) an invoice's contribution to the daily rollup."""
+    sign = -1 if method == "on_cancel" else 1
+    upsert_facts(get_invoice_facts([doc.name], sign=sign))
+
+
+def unapply_invoice_payments(doc, method=None):
+    """Subtract payments allocated to an invoice before its cancel unlinks them."""
+    upsert_facts(get_payment_facts(None, sign=-1, invoice_names=[doc.name]))
+
+
+def apply_payment_entry(doc, method=None):
+    """Add (submit) or subtract (cancel) Sales Invoice allocations of a payment."""
+    sign = -1 if method == "on_cancel" else 1
+    upsert_facts(get_payment_facts([doc.name], sign=sign))
+
+
+def get_invoice_facts(invoice_names, sign=1, facts=None):
+    facts = facts if facts is not None else defaultdict(lambda: defaultdict(float))
+    if not invoice_names:
+        return facts
+
+    params = {"invoice_names": tuple(invoice_names)}
+    headers = frappe.db.sql(
+        """
+        SELECT
+            si.name,
+            si.posting_date,
+            si.company,
+            si.customer,
+            si.owner,
+            COALESCE(si.grand_total, 0) AS grand_total
+        FROM `tabSales Invoice` si
+        WHERE si.name IN %(invoice_names)s
+        """,
+        params,
+        as_dict=True,
+    )
+    items = {
+        row.parent: row
+        for row in frappe.db.sql(
+            """
+            SELECT
+                sii.parent,
+                COALESCE(SUM(IFNULL(sii.base_net_amount, 0)), 0) AS net_amount,
+                COALESCE(SUM(IFNULL(sii.stock_qty, 0) * IFNULL(sii.incoming_rate, 0)), 0) AS cogs,
+                COALESCE(SUM(IFNULL(sii.base_price_list_rate, 0) * IFNULL(sii.qty, 0)), 0) AS list_value
+            FROM `tabSales Invoice Item` sii
+            WHERE sii.parenttype = 'Sales Invoice'
+              AND sii.parent IN %(invoice_names)s
+            GROUP BY sii.parent
+            """,
+            params,
+            as_dict=True,
+        )
+    }
+    attributions = get_invoice_attributions(headers)
+
+    for header in headers:
+        item = items.get(header.name) or frappe._dict()
+        list_value = flt(item.get("list_value"))
+        net_amount = flt(item.get("net_amount"))
+        leakage = max(0.0, list_value - net_amount)
+        measures = {
+            "invoice_count": 1,
+            "revenue": flt(header.grand_total),
+            "net_amount": net_amount,
+            "cogs": flt(item.get("cogs")),
+            "list_value": list_value,
+            "leakage": leakage,
+            "leakage_pct_total": (leakage / list_value) * 100 if list_value > 0 else 0,
+            "outstanding_delta": flt(header.grand_total),
+        }
+        _add_attributed(facts, header, header.posting_date, measures, attributions, sign)
+    return facts
+
+
+def get_payment_facts(payment_entries, sign=1, facts=None, from_date=None, to_date=None, invoice_names=None):
+    facts = facts if facts is not None else defaultdict(lambda: defaultdict(float))
+    conditions = ["per.reference_doctype = 'Sales Invoice'", "si.docstatus = 1"]
+    params = {}
+    if payment_entries is not None:
+        if not payment_entries:
+            return facts
+        conditions.append("pe.name IN %(payment_entries)s")
+        params["payment_entries"] = tuple(payment_entries)
+    elif invoice_names is not None:
+        if not invoice_names:
+            return facts
+        conditions.append("pe.docstatus = 1")
+        conditions.append("si.name IN %(invoice_names)s")
+        params["invoice_names"] = tuple(invoice_names)
+    else:
+        conditions.append("pe.docstatus = 1")
+        conditions.append("pe.posting_date BETWEEN %(from_date)s AND %(to_date)s")
+        params.update({"from_date": from_date, "to_date": to_date})
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            si.name,
+            si.company,
+            si.customer,
+            si.owner,
+            pe.posting_date AS payment_date,
+            COALESCE(per.allocated_amount, 0) AS allocated_amount
+        FROM `tabPayment Entry Reference` per
+        INNER JOIN `tabPayment Entry` pe ON pe.name = per.parent
+        INNER JOIN `tabSales Invoice` si ON si.name = per.reference_name
+        WHERE {' AND '.join(conditions)}
+        """,
+        params,
+        as_dict=True,
+    )
+    attributions = get_invoice_attributions(rows)
+    for row in rows:
+        amount = flt(row.allocated_amount)
+        measures = {"collected": amount, "outstanding_delta": -amount}
+        _add_attributed(facts, row, row.payment_date, measures, attributions, sign)
+    return facts
+
+
+def get_invoice_attributions(invoices):
+    """Map invoice -> [(department, employee, share)] using the raw dashboard attribution.
+
+    Every invoice gets one company-level entry (department ""). It is also
+    credited in full to each department of an active attributed employee
+    (Sales Team or owner), as `_build_sales_invoice_condition` does.
+    Within a department the invoice is split between its Sales Team reps by
+    allocation % (the owner without one), so shares still sum to 1 there.
+    """
+    invoice_names = tuple({row.name for row in invoices})
+    if not invoice_names:
+        return {}
+
+    team_rows = frappe.db.sql(
+        """
+        SELECT
+            st.parent AS invoice,
+            IFNULL(st.allocated_percentage, 0) AS allocated_percentage,
+            IFNULL(sp.employee, '') AS employee,
+            IFNULL(e.department, '') AS department,
+            IFNULL(e.status, '') AS status
+        FROM `tabSales Team` st
+        LEFT JOIN `tabSales Person` sp ON sp.name = st.sales_person
+        LEFT JOIN `tabEmployee` e ON e.name = sp.employee
+        WHERE st.parenttype = 'Sales Invoice'
+          AND st.parent IN %(invoice_names)s
+        """,
+        {"invoice_names": invoice_names},
+        as_dict=True,
+    )
+    team_by_invoice = defaultdict(list)
+    for row in team_rows:
+        team_by_invoice[row.invoice].append(row)
+
+    owner_departments = defaultdict(set)
+    owners = {row.owner for row in invoices if row.owner}
+    if owners:
+        for row in frappe.get_all(
+            "Employee",
+            filters={"user_id": ("in", list(owners)), "status": ("!=", "Left")},
+            fields=["user_id", "department"],
+        ):
+            if row.department:
+                owner_departments[row.user_id].add(row.department)
+
+    departments_by_invoice = {}
+    for row in invoices:
+        departments = set(owner_departments.get(row.owner) or ())
+        departments.update(
+            member.department
+            for member in team_by_invoice.get(row.name) or ()
+            if member.department and member.status != "Left"
+        )
+        departments_by_invoice[row.name] = departments
+
+    attributions = {}
+    for row in invoices:
+        if row.name in attributions:
+            continue
+        team = team_by_invoice.get(row.name) or []
+        total = sum(max(flt(member.allocated_percentage), 0) for member in team)
+        reps = [
+            (
+                member.employee,
+                (max(flt(member.allocated_percentage), 0) / total) if total > 0 else 1 / len(team),
+            )
+            for member in team
+        ] or [("", 1.0)]
+        attributions[row.name] = [("", "", 1.0)] + [
+            (department, employee, share)
+            for department in sorted(departments_by_invoice[row.name])
+            for employee, share in reps
+        ]
+    return attributions
+
+
+def _add_attributed(facts, row, posting_date, measures, attributions, sign):
+    for department, employee, share in attributions.get(row.name) or [("", "", 1.0)]:
+        key = (
+            getdate(posting_date),
+            row.company or "",
+            department or "",
+            employee or "",
+            row.owner or "",
+            row.customer or "",
+        )
+        target = facts[key]
+        for fieldname, value in measures.items():
+            target[fieldname] += sign * share * flt(value)
+
+
+def upsert_facts(facts, chunk_size=500):
+    """Accumulate measure deltas into the rollup (insert or add)."""
+    if not facts:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    columns = ["name", "creation", "modified", "modified_by", "owner", "docstatus", "idx"]
+    columns += list(KEY_FIELDS) + list(MEASURE_FIELDS)
+    updates = ", ".join(f"`{field}` = `{field}` + VALUES(`{field}`)" for field in MEASURE_FIELDS)
+    row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+
+    items = list(facts.items())
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start : start + chunk_size]
+        values = []
+        for key, measures in chunk:
+            values.extend([_fact_name(key), now, now, user, user, 0, 0])
+            values.extend(key)
+            values.extend(flt(measures.get(field), 6) for field in MEASURE_FIELDS)
+
+        frappe.db.sql(
+            f"""
+            INSERT INTO `tab{FACT_DOCTYPE}` ({", ".join(f"`{col}`" for col in columns)})
+            VALUES {", ".join([row_placeholder] * len(chunk))}
+            ON DUPLICATE KEY UPDATE {updates}, `modified` = VALUES(`modified`)
+            """,
+            values,
+        )
+
+
+def rebuild_sales_daily_facts(from_date=None, to_date=None):
+    """Recompute the rollup month by month from submitted invoices and payments."""
+    if not from_date:
+        from_date = frappe.db.sql(
+            """
+            SELECT LEAST(
+                COALESCE((SELECT MIN(posting_date) FROM `tabSales Invoice` WHERE docstatus = 1), CURDATE()),
+                COALESCE((SELECT MIN(posting_date) FROM `tabPayment Entry` WHERE docstatus = 1), CURDATE())
+            )
+            """
+        )[0][0]
+    from_date = getdate(from_date)
+    to_date = getdate(to_date or now_datetime().date())
+
+    month_start = get_first_day(from_date)
+    rebuilt = 0
+    while month_start <= to_date:
+        start = max(month_start, from_date)
+        end = min(get_last_day(month_start), to_date)
+        frappe.db.sql(
+            f"DELETE FROM `tab{FACT_DOCTYPE}` WHERE posting_date BETWEEN %(from_date)s AND %(to_date)s",
+            {"from_date": start, "to_date": end},
+        )
+
+        facts = defaultdict(lambda: defaultdict(float))
+        invoice_names = frappe.get_all(
+            "Sales Invoice",
+            filters={"docstatus": 1, "posting_date": ("between", [start, end])},
+            pluck="name",
+        )
+        get_invoice_facts(invoice_names, facts=facts)
+        get_payment_facts(None, facts=facts, from_date=start, to_date=end)
+        upsert_facts(facts)
+        frappe.db.commit()
+
+        rebuilt += len(facts)
+        month_start = add_months(month_start, 1)
+    return rebuilt
+
+
+def fact_scope_conditions(company=None, department=None, owner_users=None, exclude_demo=False):
+    """WHERE fragment over `tabSales Daily Fact` f for the dashboard scopes."""
+    where = ["1 = 1"]
+    params = {}
+    if exclude_demo:
+        where.append(f"f.customer NOT IN ({DEMO_NAMES_SQL})")
+    if company:
+        where.append("f.company = %(company)s")
+        params["company"] = company
+    # Department rows repeat the invoice per enclosing department; the "" rows
+    # hold each invoice once for company and owner scopes.
+    where.append("f.department = %(department)s")
+    params["department"] = department or ""
+    if owner_users is not None:
+        if not owner_users:
+            where.append("1 = 0")
+        else:
+            where.append("f.owner_user IN %(owner_users)s")
+            params["owner_users"] = tuple(owner_users)
+    return " AND ".join(where), params
+
+
+def get_fact_totals(from_date, to_date, **scope):
+    where_sql, params = fact_scope_conditions(**scope)
+    row = frappe.db.sql(
+        f"""
+        SELECT
+            {", ".join(f"COALESCE(SUM(f.{field}), 0) AS {field}" for field in MEASURE_FIELDS)},
+            COUNT(DISTINCT CASE WHEN f.invoice_count > 0 THEN f.customer END) AS customers
+        FROM `tab{FACT_DOCTYPE}` f
+        WHERE f.posting_date BETWEEN %(from_date)s AND %(to_date)s
+          AND {where_sql}
+        """,
+        {**params, "from_date": from_date, "to_date": to_date},
+        as_dict=True,
+    )
+    return row[0] if row else frappe._dict()
+
+
+def get_fact_totals_by_bucket(buckets, fields, **scope):
+    """Sum measures per (start, end, label) bucket with one grouped query."""
+    if not buckets:
+        return []
+
+    from_date, to_date = bins_span(buckets)
+    where_sql, params = fact_scope_conditions(**scope)
+    rows = frappe.db.sql(
+        f"""
+        SELECT f.posting_date AS bucket_date, {", ".join(f"COALESCE(SUM(f.{field}), 0) AS {field}" for field in fields)}
+        FROM `tab{FACT_DOCTYPE}` f
+        WHERE f.posting_date BETWEEN %(from_date)s AND %(to_date)s
+          AND {where_sql}
+        GROUP BY f.posting_date
+        """,
+        {**params, "from_date": from_date, "to_date": to_date},
+        as_dict=True,
+    )
+    totals = scatter_into_bins(rows, buckets, fields)
+    return [{field: totals[field][idx] for field in fields} for idx in range(len(buckets))]
+
+
+def _fact_name(key):
+    return hashlib.md5("|".join(str(part) for part in key).encode()).hexdigest()
@@ -0,0 +1,117 @@
+import frappe
+from frappe.utils import cint, flt
+
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+
+FUNNEL_STAGES = ("Lead", "Opportunity", "Quotation", "Customer", "Sales Order", "Delivery Note", "Sales Invoice")
+DOCUMENT_STAGES = {
+    # stage: (alias, party field, date field)
+    "Quotation": ("q", "party_name", "transaction_date"),
+    "Sales Order": ("so", "customer", "transaction_date"),
+    "Delivery Note": ("dn", "customer", "posting_date"),
+    "Sales Invoice": ("si", "customer", "posting_date"),
+}
+
+
+def get_sales_funnel(
+    owner_users=None,
+    company=None,
+    from_date=None,
+    to_date=None,
+    lead_source=None,
+    lead_origin=True,
+    owner_stages=FUNNEL_STAGES,
+):
+    """Stage counts (in FUNNEL_STAGES order) and stage-to-stage conversion, counted in SQL.
+
+    Scope is a company, a list of owner users (department) or a single user.
+    With `lead_origin`, Opportunity and Customer only count records that came
+    from the scoped leads, and document stages only count those customers;
+    otherwise every stage is counted independently. `owner_stages` limits
+    which stages the owner filter applies to.
+    """
+    if owner_users is not None and not owner_users:
+        return _funnel_result({stage: 0 for stage in FUNNEL_STAGES})
+
+    params = {}
+    if owner_users:
+        params["owner_users"] = tuple(owner_users)
+    if from_date and to_date:
+        params["from_date"] = from_date
+        params["to_date"] = to_date
+        # Datetime columns: include the whole last day, like frappe's between filter.
+        params["to_datetime"] = f"{to_date} 23:59:59.999999"
+
+    def scoped(stage, alias, conditions, creation_field=None, date_field=None):
+        conditions = list(conditions)
+        if owner_users and stage in owner_stages:
+            conditions.append(f"{alias}.owner IN %(owner_users)s")
+        if company and stage not in ("Lead", "Customer") and frappe.get_meta(stage).has_field("company"):
+            conditions.append(f"{alias}.company = %(company)s")
+            params["company"] = company
+        if "from_date" in params:
+            if creation_field:
+                conditions.append(f"{alias}.{creation_field} BETWEEN %(from_date)s AND %(to_datetime)s")
+            if date_field:
+                conditions.append(f"{alias}.{date_field} BETWEEN %(from_date)s AND %(to_date)s")
+        return " AND ".join(conditions)
+
+    lead_conditions = [f"l.name NOT IN ({DEMO_NAMES_SQL})"]
+    if lead_source and frappe.get_meta("Lead").has_field("source"):
+        lead_conditions.append("l.source = %(lead_source)s")
+        params["lead_source"] = lead_source
+    lead_sql = scoped("Lead", "l", lead_conditions, creation_field="creation")
+
+    opportunity_conditions = [f"o.name NOT IN ({DEMO_NAMES_SQL})", f"IFNULL(o.party_name, '') NOT IN ({DEMO_NAMES_SQL})"]
+    if lead_origin:
+        opportunity_conditions += [
+            "o.opportunity_from = 'Lead'",
+            f"o.party_name IN (SELECT l.name FROM `tabLead` l WHERE {lead_sql})",
+        ]
+    source_field = _opportunity_source_field()
+    if lead_source and source_field:
+        opportunity_conditions.append(f"o.`{source_field}` = %(lead_source)s")
+        params["lead_source"] = lead_source
+    opportunity_sql = scoped("Opportunity", "o", opportunity_conditions, creation_field="creation")
+
+    customer_conditions = [f"c.name NOT IN ({DEMO_NAMES_SQL})"]
+    if lead_origin:
+        customer_conditions.append(f"c.lead_name IN (SELECT l.name FROM `tabLead` l WHERE {lead_sql})")
+    customer_sql = scoped("Customer", "c", customer_conditions, creation_field="creation")
+
+    selects = [
+        f"(SELECT COUNT(*) FROM `tabLead` l WHERE {lead_sql}) AS `Lead`",
+        f"(SELECT COUNT(*) FROM `tabOpportunity` o WHERE {opportunity_sql}) AS `Opportunity`",
+        f"(SELECT COUNT(*) FROM `tabCustomer` c WHERE {customer_sql}) AS `Customer`",
+    ]
+    for stage, (alias, party_field, date_field) in DOCUMENT_STAGES.items():
+        conditions = [f"{alias}.docstatus = 1", f"IFNULL({alias}.{party_field}, '') NOT IN ({DEMO_NAMES_SQL})"]
+        if lead_origin:
+            conditions.append(f"{alias}.{party_field} IN (SELECT c.name FROM `tabCustomer` c WHERE {customer_sql})")
+        document_sql = scoped(stage, alias, conditions, date_field=date_field)
+        selects.append(f"(SELECT COUNT(*) FROM `tab{stage}` {alias} WHERE {document_sql}) AS `{stage}`")
+
+    row = frappe.db.sql(f"SELECT {', '.join(selects)}", params, as_dict=True)
+    row = row[0] if row else {}
+    return _funnel_result({stage: cint(row.get(stage)) for stage in FUNNEL_STAGES})
+
+
+def _funnel_result(by_stage):
+    counts = [by_stage[stage] for stage in FUNNEL_STAGES]
+    return frappe._dict(stages=list(FUNNEL_STAGES), counts=counts, conversion=funnel_conversion(counts))
+
+
+def funnel_conversion(counts):
+    """Percent of each stage carried into the next one (one entry per stage pair)."""
+    return [
+        round(flt(counts[idx]) / counts[idx - 1] * 100, 2) if counts[idx - 1] else 0
+        for idx in range(1, len(counts))
+    ]
+
+
+def _opportunity_source_field():
+    meta = frappe.get_meta("Opportunity")
+    for candidate in ("source", "opportunity_source", "lead_source"):
+        if meta.has_field(candidate):
+            return candidate
+    return None
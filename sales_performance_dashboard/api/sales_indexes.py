@@ -0,0 +1,241 @@
+import frappe
+from frappe.utils import add_days, get_first_day, get_last_day, nowdate
+
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+
+# Composite indexes shaped on the dashboard predicates: equality columns first,
+# the range column (date, amount) last. Index names are fixed so the set can be
+# checked and re-created on every migrate.
+MANAGED_INDEXES = [
+    # Personal/department invoice KPIs; covers the revenue and customer counts.
+    ("Sales Invoice", ("docstatus", "owner", "posting_date", "customer", "grand_total"), "spd_si_owner_posting"),
+    # Outstanding, revenue at risk and payment delay aging.
+    ("Sales Invoice", ("docstatus", "outstanding_amount", "due_date"), "spd_si_outstanding_due"),
+    # Company-scoped invoice totals and trends.
+    ("Sales Invoice", ("docstatus", "company", "posting_date"), "spd_si_company_posting"),
+    # Sales Person attribution of invoices and orders.
+    ("Sales Team", ("parenttype", "parent", "sales_person"), "spd_st_parent_person"),
+    ("Sales Team", ("sales_person", "parenttype"), "spd_st_person"),
+    # Pipeline, won/lost and forecast cards.
+    ("Opportunity", ("owner", "status", "modified"), "spd_opp_owner_status"),
+    ("Opportunity", ("owner", "creation"), "spd_opp_owner_creation"),
+    ("Lead", ("owner", "creation"), "spd_lead_owner_creation"),
+    ("Customer", ("owner", "creation"), "spd_customer_owner_creation"),
+    # Collections.
+    ("Payment Entry", ("docstatus", "owner", "posting_date"), "spd_pe_owner_posting"),
+    ("Payment Entry Reference", ("reference_doctype", "reference_name"), "spd_per_reference"),
+    # Sales order trend and analysis.
+    ("Sales Order", ("docstatus", "owner", "transaction_date"), "spd_so_owner_transaction"),
+]
+
+# EXPLAIN row types that read every row of the table or index.
+FULL_SCAN_TYPES = {"ALL": "full table scan", "index": "full index scan"}
+# The demo registry is small and read whole by the NOT IN anti-join by design.
+IGNORED_TABLES = {"demo"}
+
+
+def ensure_sales_indexes():
+    """Create any managed index the site is missing; returns (created, failed) index names."""
+    created, failed = [], []
+    for doctype, fields, index_name in MANAGED_INDEXES:
+        if has_sales_index(doctype, index_name):
+            continue
+        try:
+            frappe.db.add_index(doctype, list(fields), index_name)
+        except Exception:
+            failed.append(index_name)
+            frappe.log_error(title=f"Sales index {index_name} on {doctype} failed")
+            continue
+        created.append(index_name)
+
+    if created:
+        frappe.logger("sales_performance_dashboard").info(f"Sales indexes created: {', '.join(created)}")
+    return created, failed
+
+
+def has_sales_index(doctype, index_name):
+    return bool(frappe.db.has_index(f"tab{doctype}", index_name))
+
+
+def missing_sales_indexes():
+    return [
+        {"doctype": doctype, "fields": list(fields), "index": index_name}
+        for doctype, fields, index_name in MANAGED_INDEXES
+        if not has_sales_index(doctype, index_name)
+    ]
+
+
+def get_dashboard_queries(user=None):
+    """(name, sql, params) for the hot dashboard query shapes, with current-month parameters."""
+    today = nowdate()
+    params = {
+        "user": user or "Administrator",
+        "company": frappe.defaults.get_global_default("company"),
+        "month_start": get_first_day(today),
+        "month_end": get_last_day(today),
+        "month_end_eod": f"{get_last_day(today)} 23:59:59.999999",
+        "risk_date": add_days(today, 30),
+        "as_of": today,
+    }
+    return [
+        (
+            "Invoice KPIs by owner",
+            f"""
+            SELECT COALESCE(SUM(grand_total), 0), COUNT(DISTINCT customer)
+            FROM `tabSales Invoice`
+            WHERE docstatus = 1
+              AND owner = %(user)s
+              AND customer NOT IN ({DEMO_NAMES_SQL})
+              AND posting_date BETWEEN %(month_start)s AND %(month_end)s
+            """,
+            params,
+        ),
+        (
+            "Outstanding and revenue at risk",
+            f"""
+            SELECT COALESCE(SUM(outstanding_amount), 0)
+            FROM `tabSales Invoice`
+            WHERE docstatus = 1
+              AND outstanding_amount > 0
+              AND due_date <= %(risk_date)s
+              AND customer NOT IN ({DEMO_NAMES_SQL})
+            """,
+            params,
+        ),
+        (
+            "Overdue aging",
+            f"""
+            SELECT si.customer, SUM(si.outstanding_amount), SUM(DATEDIFF(%(as_of)s, si.due_date))
+            FROM `tabSales Invoice` si
+            WHERE si.docstatus = 1
+              AND si.outstanding_amount > 0
+              AND si.due_date < %(as_of)s
+              AND si.customer NOT IN ({DEMO_NAMES_SQL})
+            GROUP BY si.customer
+            """,
+            params,
+        ),
+        (
+            "Company revenue trend",
+            """
+            SELECT si.posting_date, SUM(si.grand_total)
+            FROM `tabSales Invoice` si
+            WHERE si.docstatus = 1
+              AND si.company = %(company)s
+              AND si.posting_date BETWEEN %(month_start)s AND %(month_end)s
+            GROUP BY si.posting_date
+            """,
+            params,
+        ),
+        (
+            "Sales Team attribution",
+            """
+            SELECT sp.employee, SUM(st.allocated_amount)
+            FROM `tabSales Invoice` si
+            JOIN `tabSales Team` st ON st.parenttype = 'Sales Invoice' AND st.parent = si.name
+            JOIN `tabSales Person` sp ON sp.name = st.sales_person
+            WHERE si.docstatus = 1
+              AND si.posting_date BETWEEN %(month_start)s AND %(month_end)s
+            GROUP BY sp.employee
+            """,
+            params,
+        ),
+        (
+            "Opportunity pipeline by owner",
+            f"""
+            SELECT status, COUNT(*), COALESCE(SUM(opportunity_amount), 0)
+            FROM `tabOpportunity`
+            WHERE owner = %(user)s
+              AND status IN ('Converted', 'Lost')
+              AND modified BETWEEN %(month_start)s AND %(month_end_eod)s
+              AND name NOT IN ({DEMO_NAMES_SQL})
+            GROUP BY status
+            """,
+            params,
+        ),
+        (
+            "New leads by owner",
+            f"""
+            SELECT COUNT(*)
+            FROM `tabLead`
+            WHERE owner = %(user)s
+              AND creation BETWEEN %(month_start)s AND %(month_end_eod)s
+              AND name NOT IN ({DEMO_NAMES_SQL})
+            """,
+            params,
+        ),
+        (
+            "Collections by owner",
+            f"""
+            SELECT COALESCE(SUM(paid_amount), 0)
+            FROM `tabPayment Entry`
+            WHERE docstatus = 1
+              AND owner = %(user)s
+              AND posting_date BETWEEN %(month_start)s AND %(month_end)s
+              AND payment_type = 'Receive'
+              AND party NOT IN ({DEMO_NAMES_SQL})
+            """,
+            params,
+        ),
+        (
+            "Collections by invoice",
+            """
+            SELECT COALESCE(SUM(per.allocated_amount), 0)
+            FROM `tabPayment Entry Reference` per
+            JOIN `tabPayment Entry` pe ON pe.name = per.parent
+            JOIN `tabSales Invoice` si ON si.name = per.reference_name
+            WHERE per.reference_doctype = 'Sales Invoice'
+              AND pe.docstatus = 1
+              AND si.docstatus = 1
+              AND si.owner = %(user)s
+              AND pe.posting_date BETWEEN %(month_start)s AND %(month_end)s
+            """,
+            params,
+        ),
+        (
+            "Sales order trend by owner",
+            f"""
+            SELECT transaction_date, SUM(base_grand_total)
+            FROM `tabSales Order`
+            WHERE docstatus = 1
+              AND owner = %(user)s
+              AND transaction_date BETWEEN %(month_start)s AND %(month_end)s
+              AND customer NOT IN ({DEMO_NAMES_SQL})
+            GROUP BY transaction_date
+            """,
+            params,
+        ),
+    ]
+
+
+def advise_sales_indexes(user=None):
+    """EXPLAIN every dashboard query on this site and report scans and missing managed indexes."""
+    findings = []
+    for name, sql, params in get_dashboard_queries(user):
+        try:
+            plan = frappe.db.sql(f"EXPLAIN {sql}", params, as_dict=True)
+        except Exception as exc:
+            findings.append({"query": name, "table": None, "issue": f"EXPLAIN failed: {exc}"})
+            continue
+
+        for row in plan:
+            table = row.get("table") or ""
+            if table in IGNORED_TABLES or table.startswith("<"):
+                continue
+            issue = FULL_SCAN_TYPES.get(row.get("type"))
+            if not issue and not row.get("key"):
+                issue = "no index used"
+            if issue:
+                findings.append(
+                    {
+                        "query": name,
+                        "table": table,
+                        "type": row.get("type"),
+                        "key": row.get("key"),
+                        "rows": row.get("rows"),
+                        "extra": row.get("Extra"),
+                        "issue": issue,
+                    }
+                )
+
+    return frappe._dict(findings=findings, missing=missing_sales_indexes())
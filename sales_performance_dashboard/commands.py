@@ -0,0 +1,38 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("spd-index-advisor")
+@click.option("--user", help="Owner used for the per-user dashboard queries (default: Administrator)")
+@click.option("--apply", is_flag=True, default=False, help="Create missing managed indexes before explaining")
+@pass_context
+def index_advisor(context, user=None, apply=False):
+    """EXPLAIN the dashboard queries and report full scans and missing indexes."""
+    import frappe
+
+    from sales_performance_dashboard.api.sales_indexes import advise_sales_indexes, ensure_sales_indexes
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        if apply:
+            created, failed = ensure_sales_indexes()
+            frappe.db.commit()
+            click.echo(f"Created {len(created)} index(es), {len(failed)} failed")
+
+        report = advise_sales_indexes(user)
+        for row in report.missing:
+            click.echo(f"MISSING  {row['doctype']}: {row['index']} ({', '.join(row['fields'])})")
+        for row in report.findings:
+            click.echo(
+                f"SCAN     {row['query']}: {row['table']} {row['issue']}"
+                + (f" (rows={row.get('rows')}, key={row.get('key')})" if row.get("table") else "")
+            )
+        if not report.missing and not report.findings:
+            click.echo("All dashboard queries use indexes and every managed index exists.")
+    finally:
+        frappe.destroy()
+
+
+commands = [index_advisor]
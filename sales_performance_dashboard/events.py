@@ -0,0 +1,85 @@
+import frappe
+from frappe.utils import getdate
+
+DIRTY_TARGETS_KEY = "sales_performance_dashboard:dirty_sales_targets"
+
+
+def mark_sales_targets_dirty(doc, method=None):
+    """Queue the targets affected by a submitted/cancelled Sales Invoice for refresh."""
+    if not doc.posting_date:
+        return
+
+    targets = get_affected_sales_targets(doc)
+    if not targets:
+        return
+
+    # Publish only after commit so the refresher never reads pre-submit totals.
+    frappe.db.after_commit.add(lambda: add_dirty_targets(targets))
+
+
+def get_affected_sales_targets(doc):
+    posting_date = getdate(doc.posting_date)
+    rows = frappe.get_all(
+        "Sales Targets",
+        filters={
+            "start_date": ("<=", posting_date),
+            "end_date": (">=", posting_date),
+        },
+        fields=["name", "target_level", "company", "department", "employee"],
+    )
+    if not rows:
+        return set()
+
+    employees = set(_get_invoice_employees(doc))
+    departments = set()
+    if employees:
+        departments = set(
+            frappe.get_all(
+                "Employee",
+                filters={"name": ("in", list(employees)), "department": ("is", "set")},
+                pluck="department",
+            )
+        )
+
+    targets = set()
+    for row in rows:
+        if row.target_level == "Company":
+            if not row.company or row.company == doc.company:
+                targets.add(row.name)
+        elif row.target_level == "Department":
+            if row.department in departments:
+                targets.add(row.name)
+        elif row.target_level == "Individual":
+            if row.employee in employees:
+                targets.add(row.name)
+    return targets
+
+
+def _get_invoice_employees(doc):
+    sales_people = [row.sales_person for row in (doc.get("sales_team") or []) if row.sales_person]
+    if not sales_people:
+        return []
+
+    return frappe.get_all(
+        "Sales Person",
+        filters={"name": ("in", sales_people), "employee": ("is", "set")},
+        pluck="employee",
+    )
+
+
+def add_dirty_targets(names):
+    names = [name for name in names if name]
+    if names:
+        frappe.cache().sadd(DIRTY_TARGETS_KEY, *names)
+
+
+def pop_dirty_targets():
+    cache = frappe.cache()
+    members = cache.smembers(DIRTY_TARGETS_KEY) or set()
+    names = sorted(
+        member.decode() if isinstance(member, bytes) else member for member in members
+    )
+    if names:
+        # Remove only what we read, so marks added while refreshing survive to the next run.
+        cache.srem(DIRTY_TARGETS_KEY, *names)
+    return names
@@ -137,6 +137,148 @@ fixtures = ["Module Def"]
 # 		"on_trash": "method"
 # 	}
 # }
+doc_events = {
+    "Sales Invoice": {
+        "on_submit": [
+            "sales_performance_dashboard.events.mark_sales_targets_dirty",
+            "sales_performance_dashboard.api.sales_facts.apply_sales_invoice",
+            "sales_performance_dashboard.api.sales_attribution.sync_sales_attribution",
+            "sales_performance_dashboard.api.dashboard_cache.bump_sales_invoice_users",
+        ],
+        "before_cancel": "sales_performance_dashboard.api.sales_facts.unapply_invoice_payments",
+        "on_cancel": [
+            "sales_performance_dashboard.events.mark_sales_targets_dirty",
+            "sales_performance_dashboard.api.sales_facts.apply_sales_invoice",
+            "sales_performance_dashboard.api.sales_attribution.sync_sales_attribution",
+            "sales_performance_dashboard.api.dashboard_cache.bump_sales_invoice_users",
+        ],
+        "on_update_after_submit": [
+            "sales_performance_dashboard.api.sales_attribution.sync_sales_attribution",
+            "sales_performance_dashboard.api.dashboard_cache.bump_sales_invoice_users",
+        ],
+    },
+    "Sales Order": {
+        "on_submit": [
+            "sales_performance_dashboard.api.sales_attribution.sync_sales_attribution",
+            "sales_performance_dashboard.api.dashboard_cache.mark_sales_order_departments",
+        ],
+        "on_cancel": [
+            "sales_performance_dashboard.api.sales_attribution.sync_sales_attribution",
+            "sales_performance_dashboard.api.dashboard_cache.mark_sales_order_departments",
+        ],
+        "on_update_after_submit": [
+            "sales_performance_dashboard.api.sales_attribution.sync_sales_attribution",
+            "sales_performance_dashboard.api.dashboard_cache.mark_sales_order_departments",
+        ],
+    },
+    "Payment Entry": {
+        "on_submit": [
+            "sales_performance_dashboard.api.sales_facts.apply_payment_entry",
+            "sales_performance_dashboard.api.dashboard_cache.bump_payment_entry_users",
+        ],
+        "on_cancel": [
+            "sales_performance_dashboard.api.sales_facts.apply_payment_entry",
+            "sales_performance_dashboard.api.dashboard_cache.bump_payment_entry_users",
+        ],
+    },
+    "Sales Targets": {
+        "on_update": "sales_performance_dashboard.api.dashboard_cache.bump_sales_target_users",
+        "on_trash": "sales_performance_dashboard.api.dashboard_cache.bump_sales_target_users",
+    },
+    "Opportunity": {
+        "on_update": [
+            "sales_performance_dashboard.api.demo_data.sync_demo_record",
+            "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+        ],
+        "on_trash": [
+            "sales_performance_dashboard.api.demo_data.sync_demo_record",
+            "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+        ],
+        "after_rename": "sales_performance_dashboard.api.demo_data.sync_demo_record",
+    },
+    "Lead": {
+        "on_update": [
+            "sales_performance_dashboard.api.demo_data.sync_demo_record",
+            "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+        ],
+        "on_trash": [
+            "sales_performance_dashboard.api.demo_data.sync_demo_record",
+            "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+        ],
+        "after_rename": "sales_performance_dashboard.api.demo_data.sync_demo_record",
+    },
+    "Customer": {
+        "on_update": [
+            "sales_performance_dashboard.api.demo_data.sync_demo_record",
+            "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+        ],
+        "on_trash": [
+            "sales_performance_dashboard.api.demo_data.sync_demo_record",
+            "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+        ],
+        "after_rename": "sales_performance_dashboard.api.demo_data.sync_demo_record",
+    },
+    "Appointment": {
+        "on_update": "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+        "on_trash": "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+    },
+    "Project": {
+        "on_update": "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+        "on_trash": "sales_performance_dashboard.api.dashboard_cache.bump_owner_version",
+    },
+    "Task": {
+        "on_update": "sales_performance_dashboard.api.dashboard_cache.bump_task_project_owner",
+        "on_trash": "sales_performance_dashboard.api.dashboard_cache.bump_task_project_owner",
+    },
+    "Employee": {
+        "on_update": [
+            "sales_performance_dashboard.api.department_membership.clear_department_membership_cache",
+            "sales_performance_dashboard.api.dashboard_cache.bump_shared_versions",
+            "sales_performance_dashboard.api.sales_attribution.resync_employee_attribution",
+        ],
+        "on_trash": [
+            "sales_performance_dashboard.api.department_membership.clear_department_membership_cache",
+            "sales_performance_dashboard.api.dashboard_cache.bump_shared_versions",
+        ],
+        "after_rename": [
+            "sales_performance_dashboard.api.department_membership.clear_department_membership_cache",
+            "sales_performance_dashboard.api.dashboard_cache.bump_shared_versions",
+        ],
+    },
+    "Sales Person": {
+        "on_update": [
+            "sales_performance_dashboard.api.department_membership.clear_department_membership_cache",
+            "sales_performance_dashboard.api.dashboard_cache.bump_shared_versions",
+            "sales_performance_dashboard.api.sales_attribution.resync_sales_person_attribution",
+        ],
+        "on_trash": [
+            "sales_performance_dashboard.api.department_membership.clear_department_membership_cache",
+            "sales_performance_dashboard.api.dashboard_cache.bump_shared_versions",
+        ],
+        "after_rename": [
+            "sales_performance_dashboard.api.department_membership.clear_department_membership_cache",
+            "sales_performance_dashboard.api.dashboard_cache.bump_shared_versions",
+        ],
+    },
+    "Department": {
+        "on_update": [
+            "sales_performance_dashboard.api.department_membership.clear_department_membership_cache",
+            "sales_performance_dashboard.api.dashboard_cache.bump_shared_versions",
+        ],
+        "on_trash": [
+            "sales_performance_dashboard.api.department_membership.clear_department_membership_cache",
+            "sales_performance_dashboard.api.dashboard_cache.bump_shared_versions",
+        ],
+        "after_rename": [
+            "sales_performance_dashboard.api.department_membership.clear_department_membership_cache",
+            "sales_performance_dashboard.api.dashboard_cache.bump_shared_versions",
+        ],
+    },
+    "Holiday List": {
+        "on_update": "sales_performance_dashboard.sales_performance_dashboard.doctype.sales_targets.working_calendar.clear_holiday_cache",
+        "on_trash": "sales_performance_dashboard.sales_performance_dashboard.doctype.sales_targets.working_calendar.clear_holiday_cache",
+    },
+}
 
 # Scheduled Tasks
 # ---------------
@@ -159,11 +301,28 @@ fixtures = ["Module Def"]
 # 	],
 # }
 scheduler_events = {
+    "hourly": [
+        "sales_performance_dashboard.tasks.reconcile_sales_targets",
+    ],
+    "daily_long": [
+        "sales_performance_dashboard.tasks.rebuild_sales_daily_facts",
+    ],
+    "weekly_long": [
+        "sales_performance_dashboard.api.sales_attribution.backfill_sales_attribution",
+    ],
     "cron": {
         "*/1 * * * *": [
             "sales_performance_dashboard.tasks.update_sales_targets",
-        ]
-    }
+            "sales_performance_dashboard.api.cache_warmer.enqueue_posted_warm",
+        ],
+        # Before business hours; postings re-warm their departments every minute.
+        "30 6 * * *": [
+            "sales_performance_dashboard.api.cache_warmer.enqueue_dashboard_warm",
+        ],
+        "*/5 * * * *": [
+            "sales_performance_dashboard.api.instrumentation.flush_api_log",
+        ],
+    },
 }
 
 # Testing
@@ -241,6 +400,9 @@ scheduler_events = {
 # default_log_clearing_doctypes = {
 # 	"Logging DocType Name": 30  # days to retain logs
 # }
+default_log_clearing_doctypes = {
+    "Sales Dashboard API Log": 14,
+}
 # Installation
 # ------------
 
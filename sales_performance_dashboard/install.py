@@ -2,14 +2,18 @@ import frappe
 
 
 def after_install():
+    from sales_performance_dashboard.api.sales_indexes import ensure_sales_indexes
     from sales_performance_dashboard.sales_performance_dashboard.setup.create_dashboard import sync_all_dashboards
 
+    ensure_sales_indexes()
     sync_all_dashboards()
     frappe.clear_cache()
 
 
 def after_migrate():
+    from sales_performance_dashboard.api.sales_indexes import ensure_sales_indexes
     from sales_performance_dashboard.sales_performance_dashboard.setup.create_dashboard import sync_all_dashboards
 
+    ensure_sales_indexes()
     sync_all_dashboards()
     frappe.clear_cache()
@@ -0,0 +1,5 @@
+from sales_performance_dashboard.api.demo_data import backfill_demo_records
+
+
+def execute():
+    backfill_demo_records()
@@ -0,0 +1,15 @@
+import frappe
+
+from sales_performance_dashboard.api.sales_attribution import ATTRIBUTION_DOCTYPE, backfill_sales_attribution
+
+INDEX_FIELDS = ["voucher_type", "employee", "voucher_no"]
+INDEX_NAME = "voucher_type_employee_voucher_no_index"
+
+
+def execute():
+    if not frappe.db.has_index(f"tab{ATTRIBUTION_DOCTYPE}", INDEX_NAME):
+        try:
+            frappe.db.add_index(ATTRIBUTION_DOCTYPE, INDEX_FIELDS, INDEX_NAME)
+        except Exception:
+            frappe.log_error(title=f"Sales index {INDEX_NAME} on {ATTRIBUTION_DOCTYPE} failed")
+    backfill_sales_attribution()
@@ -0,0 +1,6 @@
+from sales_performance_dashboard.api.sales_facts import rebuild_sales_daily_facts
+
+
+def execute():
+    # Facts follow the raw (exact-department) attribution; rebuild every month.
+    rebuild_sales_daily_facts()
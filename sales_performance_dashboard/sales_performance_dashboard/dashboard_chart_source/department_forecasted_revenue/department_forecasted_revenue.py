@@ -5,13 +5,14 @@ from frappe import _
 from frappe.utils import add_months, get_first_day, get_last_day, getdate, nowdate
 from frappe.utils.dashboard import cache_source
 
+from sales_performance_dashboard.api.chart_buckets import bins_span, month_start_sql, scatter_into_bins
+from sales_performance_dashboard.api.dashboard_cache import dashboard_cached
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
 from sales_performance_dashboard.api.department_dashboard_api import (
     _build_sales_invoice_condition,
     _get_department_context,
 )
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
+from sales_performance_dashboard.api.instrumentation import instrumented
 
 
 def _month_bins(reference_date):
@@ -38,7 +39,7 @@ def _compute_data(filters):
         }
 
     employee_ids, user_ids = _get_department_context(department)
-    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids, user_ids)
+    si_condition, si_dynamic = _build_sales_invoice_condition(employee_ids)
     if si_condition == "1 = 0":
         return {
             "labels": [get_first_day(add_months(reference_date, -i)).strftime("%b %Y") for i in range(5, -1, -1)],
@@ -51,50 +52,49 @@ def _compute_data(filters):
 
     months = _month_bins(reference_date)
     labels = [start.strftime("%b %Y") for start, _ in months]
-    forecasted = []
-    actual = []
-
-    demo = PersonalSalesDashboard().demo_pattern
     users_tuple = tuple(user_ids)
+    from_date, to_date = bins_span(months)
 
-    for start, end in months:
-        if users_tuple:
-            forecast_row = frappe.db.sql(
-                """
-                SELECT COALESCE(SUM(opportunity_amount * probability / 100), 0) AS total
-                FROM `tabOpportunity`
-                WHERE docstatus < 2
-                  AND owner IN %(users)s
-                  AND IFNULL(transaction_date, DATE(creation)) BETWEEN %(from_date)s AND %(to_date)s
-                  AND name NOT LIKE %(demo)s
-                  AND party_name NOT LIKE %(demo)s
-                """,
-                {"users": users_tuple, "from_date": start, "to_date": end, "demo": demo},
-                as_dict=True,
-            )
-        else:
-            forecast_row = [{"total": 0}]
-
-        actual_row = frappe.db.sql(
+    forecast_rows = []
+    if users_tuple:
+        opportunity_date = "IFNULL(transaction_date, DATE(creation))"
+        forecast_rows = frappe.db.sql(
             f"""
-            SELECT COALESCE(SUM(si.grand_total), 0) AS total
-            FROM `tabSales Invoice` si
-            WHERE si.docstatus = 1
-              AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
-              AND si.customer NOT LIKE %(demo)s
-              AND {si_condition}
+            SELECT
+                {month_start_sql(opportunity_date)} AS bucket_date,
+                COALESCE(SUM(opportunity_amount * probability / 100), 0) AS total
+            FROM `tabOpportunity`
+            WHERE docstatus < 2
+              AND owner IN %(users)s
+              AND {opportunity_date} BETWEEN %(from_date)s AND %(to_date)s
+              AND name NOT IN ({DEMO_NAMES_SQL})
+              AND party_name NOT IN ({DEMO_NAMES_SQL})
+            GROUP BY bucket_date
             """,
-            {
-                "from_date": start,
-                "to_date": end,
-                "demo": demo,
-                **si_dynamic,
-            },
+            {"users": users_tuple, "from_date": from_date, "to_date": to_date},
             as_dict=True,
         )
 
-        forecasted.append(float((forecast_row[0] or {}).get("total", 0) or 0) if forecast_row else 0.0)
-        actual.append(float((actual_row[0] or {}).get("total", 0) or 0) if actual_row else 0.0)
+    actual_rows = frappe.db.sql(
+        f"""
+        SELECT {month_start_sql("si.posting_date")} AS bucket_date, COALESCE(SUM(si.grand_total), 0) AS total
+        FROM `tabSales Invoice` si
+        WHERE si.docstatus = 1
+          AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
+          AND {si_condition}
+        GROUP BY bucket_date
+        """,
+        {
+            "from_date": from_date,
+            "to_date": to_date,
+            **si_dynamic,
+        },
+        as_dict=True,
+    )
+
+    forecasted = scatter_into_bins(forecast_rows, months, ("total",))["total"]
+    actual = scatter_into_bins(actual_rows, months, ("total",))["total"]
 
     return {
         "labels": labels,
@@ -107,6 +107,7 @@ def _compute_data(filters):
 
 
 @frappe.whitelist()
+@instrumented
 @cache_source
 def get_data(
     chart_name=None,
@@ -124,6 +125,8 @@ def get_data(
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_data_for_custom(department=None, reference_date=None):
     filters = {
         "department": department,
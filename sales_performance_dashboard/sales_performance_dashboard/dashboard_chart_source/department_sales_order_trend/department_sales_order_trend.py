@@ -8,9 +8,12 @@ from frappe import _
 from frappe.utils import getdate, nowdate
 from frappe.utils.dashboard import cache_source
 
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
+from sales_performance_dashboard.api.chart_buckets import bins_span, month_start_sql, scatter_into_bins
+from sales_performance_dashboard.api.dashboard_cache import dashboard_cached
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.department_membership import get_department_membership
+from sales_performance_dashboard.api.instrumentation import instrumented
+from sales_performance_dashboard.api.sales_attribution import attributed_voucher_condition
 
 
 def _month_day_bins(ref_date: date):
@@ -52,44 +55,14 @@ def _year_month_bins(ref_date: date):
     return labels, bins
 
 
-def _get_department_people(department):
-    employees = frappe.get_all(
-        "Employee",
-        filters={"department": department},
-        fields=["name", "user_id"],
-    )
-    employee_ids = [row.name for row in employees if row.name]
-    user_ids = [row.user_id for row in employees if row.user_id]
-    return employee_ids, user_ids
-
-
-def _build_sales_order_condition(employee_ids, user_ids):
-    clauses = []
-    params = {}
-
-    if employee_ids:
-        clauses.append(
-            """
-            EXISTS (
-                SELECT 1
-                FROM `tabSales Team` st
-                INNER JOIN `tabSales Person` sp ON sp.name = st.sales_person
-                WHERE st.parenttype = 'Sales Order'
-                  AND st.parent = so.name
-                  AND sp.employee IN %(employee_ids)s
-            )
-            """
-        )
-        params["employee_ids"] = tuple(employee_ids)
-
-    if user_ids:
-        clauses.append("so.owner IN %(user_ids)s")
-        params["user_ids"] = tuple(user_ids)
+def _get_department_employees(department):
+    # Includes employees who have Left, so historical orders stay attributed.
+    return get_department_membership(department).all_employee_ids
 
-    if not clauses:
-        return "1 = 0", params
 
-    return "(" + " OR ".join(clauses) + ")", params
+def _build_sales_order_condition(employee_ids):
+    # Owner matches are covered by the Owner rows of Sales Attribution.
+    return attributed_voucher_condition("so", "Sales Order", employee_ids)
 
 
 def _compute_data(filters):
@@ -113,40 +86,36 @@ def _compute_data(filters):
         labels, bins = _month_day_bins(reference_date)
         labels = _sparsify_month_labels(labels)
 
-    employee_ids, user_ids = _get_department_people(department)
-    person_condition, dynamic_params = _build_sales_order_condition(employee_ids, user_ids)
+    employee_ids = _get_department_employees(department)
+    person_condition, dynamic_params = _build_sales_order_condition(employee_ids)
 
-    dash = PersonalSalesDashboard()
-    demo = dash.demo_pattern
-
-    amounts = []
-    counts = []
-
-    for start, end in bins:
-        params = {
-            "from_date": start,
-            "to_date": end,
-            "demo": demo,
-        }
-        params.update(dynamic_params)
-
-        row = frappe.db.sql(
-            f"""
-            SELECT
-                COALESCE(SUM(so.grand_total), 0) AS amount,
-                COUNT(DISTINCT so.name) AS order_count
-            FROM `tabSales Order` so
-            WHERE so.docstatus = 1
-              AND so.transaction_date BETWEEN %(from_date)s AND %(to_date)s
-              AND so.customer NOT LIKE %(demo)s
-              AND {person_condition}
-            """,
-            params,
-            as_dict=True,
-        )[0]
-
-        amounts.append(float(row.amount or 0))
-        counts.append(int(row.order_count or 0))
+    from_date, to_date = bins_span(bins)
+    bucket_sql = month_start_sql("so.transaction_date") if view_mode == "Yearly" else "so.transaction_date"
+    params = {
+        "from_date": from_date,
+        "to_date": to_date,
+    }
+    params.update(dynamic_params)
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            {bucket_sql} AS bucket_date,
+            COALESCE(SUM(so.grand_total), 0) AS amount,
+            COUNT(DISTINCT so.name) AS order_count
+        FROM `tabSales Order` so
+        WHERE so.docstatus = 1
+          AND so.transaction_date BETWEEN %(from_date)s AND %(to_date)s
+          AND so.customer NOT IN ({DEMO_NAMES_SQL})
+          AND {person_condition}
+        GROUP BY bucket_date
+        """,
+        params,
+        as_dict=True,
+    )
+    totals = scatter_into_bins(rows, bins, ("amount", "order_count"))
+    amounts = [float(value) for value in totals["amount"]]
+    counts = [int(value) for value in totals["order_count"]]
 
     return {
         "labels": labels,
@@ -159,6 +128,7 @@ def _compute_data(filters):
 
 
 @frappe.whitelist()
+@instrumented
 @cache_source
 def get_data(
     chart_name=None,
@@ -176,6 +146,8 @@ def get_data(
 
 
 @frappe.whitelist()
+@instrumented
+@dashboard_cached("department")
 def get_data_for_custom(department=None, view_mode="Monthly", reference_date=None):
     filters = {
         "department": department,
@@ -7,10 +7,10 @@ from frappe import _
 from frappe.utils import add_months, get_first_day, get_last_day, getdate, nowdate
 from frappe.utils.dashboard import cache_source
 
+from sales_performance_dashboard.api.chart_buckets import month_start_sql, scatter_into_bins
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.instrumentation import instrumented
 from sales_performance_dashboard.api.personal_dashboard_api import resolve_personal_scope
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
 
 
 def _get_scope(filters=None, department=None, employee=None):
@@ -24,6 +24,7 @@ def _get_scope(filters=None, department=None, employee=None):
 
 
 @frappe.whitelist()
+@instrumented
 @cache_source
 def get_data(
     chart_name=None,
@@ -39,9 +40,7 @@ def get_data(
     employee=None,
 ):
     scope = _get_scope(filters=filters, department=department, employee=employee)
-    dash = PersonalSalesDashboard(scope["user"])
     user = scope["user"]
-    demo = dash.demo_pattern
 
     today = getdate(nowdate())
     months = []
@@ -51,38 +50,40 @@ def get_data(
         months.append((start, end))
 
     labels = [start.strftime("%b %Y") for start, _ in months]
-    forecasted = []
-    actual = []
-
-    for start, end in months:
-        forecast_row = frappe.db.sql(
-            """
-            SELECT COALESCE(SUM(opportunity_amount * probability / 100), 0) as total
-            FROM `tabOpportunity`
-            WHERE docstatus < 2
-              AND owner = %(user)s
-              AND IFNULL(transaction_date, DATE(creation)) BETWEEN %(from_date)s AND %(to_date)s
-              AND name NOT LIKE %(demo)s
-              AND party_name NOT LIKE %(demo)s
-            """,
-            {"user": user, "from_date": start, "to_date": end, "demo": demo},
-            as_dict=True,
-        )
-        actual_row = frappe.db.sql(
-            """
-            SELECT COALESCE(SUM(grand_total), 0) as total
-            FROM `tabSales Invoice`
-            WHERE docstatus = 1
-              AND owner = %(user)s
-              AND posting_date BETWEEN %(from_date)s AND %(to_date)s
-              AND customer NOT LIKE %(demo)s
-            """,
-            {"user": user, "from_date": start, "to_date": end, "demo": demo},
-            as_dict=True,
-        )
+    params = {"user": user, "from_date": months[0][0], "to_date": months[-1][1]}
+    opportunity_date = "IFNULL(transaction_date, DATE(creation))"
+    forecast_rows = frappe.db.sql(
+        f"""
+        SELECT
+            {month_start_sql(opportunity_date)} AS bucket_date,
+            COALESCE(SUM(opportunity_amount * probability / 100), 0) as total
+        FROM `tabOpportunity`
+        WHERE docstatus < 2
+          AND owner = %(user)s
+          AND {opportunity_date} BETWEEN %(from_date)s AND %(to_date)s
+          AND name NOT IN ({DEMO_NAMES_SQL})
+          AND party_name NOT IN ({DEMO_NAMES_SQL})
+        GROUP BY bucket_date
+        """,
+        params,
+        as_dict=True,
+    )
+    actual_rows = frappe.db.sql(
+        f"""
+        SELECT {month_start_sql("posting_date")} AS bucket_date, COALESCE(SUM(grand_total), 0) as total
+        FROM `tabSales Invoice`
+        WHERE docstatus = 1
+          AND owner = %(user)s
+          AND posting_date BETWEEN %(from_date)s AND %(to_date)s
+          AND customer NOT IN ({DEMO_NAMES_SQL})
+        GROUP BY bucket_date
+        """,
+        params,
+        as_dict=True,
+    )
 
-        forecasted.append(float(forecast_row[0].total) if forecast_row else 0.0)
-        actual.append(float(actual_row[0].total) if actual_row else 0.0)
+    forecasted = scatter_into_bins(forecast_rows, months, ("total",))["total"]
+    actual = scatter_into_bins(actual_rows, months, ("total",))["total"]
 
     return {
         "labels": labels,
@@ -7,12 +7,12 @@ from frappe import _
 from frappe.utils import get_first_day, get_last_day, getdate, nowdate
 from frappe.utils.dashboard import cache_source
 
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.instrumentation import instrumented
 
 
 @frappe.whitelist()
+@instrumented
 @cache_source
 def get_data(
     chart_name=None,
@@ -29,22 +29,20 @@ def get_data(
     from_date = getdate(from_date) if from_date else get_first_day(today)
     to_date = getdate(to_date) if to_date else get_last_day(today)
 
-    dash = PersonalSalesDashboard()
-    demo = dash.demo_pattern
     rows = frappe.db.sql(
-        """
+        f"""
         SELECT sii.item_name as item_name, SUM(sii.base_amount) as total
         FROM `tabSales Invoice` si
         INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
         WHERE si.docstatus = 1
           AND si.owner = %(user)s
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
         GROUP BY sii.item_name
         ORDER BY total DESC
         LIMIT 10
         """,
-        {"user": frappe.session.user, "demo": demo, "from_date": from_date, "to_date": to_date},
+        {"user": frappe.session.user, "from_date": from_date, "to_date": to_date},
         as_dict=True,
     )
 
@@ -7,10 +7,9 @@ from frappe import _
 from frappe.utils import get_first_day, get_last_day, getdate, nowdate
 from frappe.utils.dashboard import cache_source
 
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.instrumentation import instrumented
 from sales_performance_dashboard.api.personal_dashboard_api import resolve_personal_scope
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
 
 def _get_scope(filters=None, department=None, employee=None):
     parsed = frappe.parse_json(filters) if filters else {}
@@ -34,16 +33,14 @@ def _get_rows(scope, from_date=None, to_date=None, start=0, page_length=None):
     from_date = getdate(from_date) if from_date else get_first_day(today)
     to_date = getdate(to_date) if to_date else get_last_day(today)
 
-    dash = PersonalSalesDashboard(scope["user"])
-    demo = dash.demo_pattern
-    params = {"user": scope["user"], "demo": demo, "from_date": from_date, "to_date": to_date}
-    query = """
+    params = {"user": scope["user"], "from_date": from_date, "to_date": to_date}
+    query = f"""
         SELECT sii.item_code as item_code, sii.item_name as item_name, SUM(sii.base_amount) as total
         FROM `tabSales Invoice` si
         INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
         WHERE si.docstatus = 1
           AND si.owner = %(user)s
-          AND si.customer NOT LIKE %(demo)s
+          AND si.customer NOT IN ({DEMO_NAMES_SQL})
           AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
         GROUP BY sii.item_code, sii.item_name
         ORDER BY total DESC
@@ -60,10 +57,8 @@ def _get_total_item_count(scope, from_date=None, to_date=None):
     from_date = getdate(from_date) if from_date else get_first_day(today)
     to_date = getdate(to_date) if to_date else get_last_day(today)
 
-    dash = PersonalSalesDashboard(scope["user"])
-    demo = dash.demo_pattern
     row = frappe.db.sql(
-        """
+        f"""
         SELECT COUNT(*) AS total_count
         FROM (
             SELECT sii.item_code
@@ -71,18 +66,19 @@ def _get_total_item_count(scope, from_date=None, to_date=None):
             INNER JOIN `tabSales Invoice Item` sii ON sii.parent = si.name
             WHERE si.docstatus = 1
               AND si.owner = %(user)s
-              AND si.customer NOT LIKE %(demo)s
+              AND si.customer NOT IN ({DEMO_NAMES_SQL})
               AND si.posting_date BETWEEN %(from_date)s AND %(to_date)s
             GROUP BY sii.item_code, sii.item_name
         ) AS grouped_items
         """,
-        {"user": scope["user"], "demo": demo, "from_date": from_date, "to_date": to_date},
+        {"user": scope["user"], "from_date": from_date, "to_date": to_date},
         as_dict=True,
     )
     return int((row[0].total_count if row else 0) or 0)
 
 
 @frappe.whitelist()
+@instrumented
 @cache_source
 def get_data(
     chart_name=None,
@@ -111,6 +107,7 @@ def get_data(
 
 
 @frappe.whitelist()
+@instrumented
 def get_table_data_for_custom(
     from_date=None,
     to_date=None,
@@ -6,10 +6,9 @@ import frappe
 from frappe import _
 from frappe.utils.dashboard import cache_source
 
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.instrumentation import instrumented
 from sales_performance_dashboard.api.personal_dashboard_api import resolve_personal_scope
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
 
 
 def _get_scope(filters=None, department=None, employee=None):
@@ -23,6 +22,7 @@ def _get_scope(filters=None, department=None, employee=None):
 
 
 @frappe.whitelist()
+@instrumented
 @cache_source
 def get_data(
     chart_name=None,
@@ -38,22 +38,20 @@ def get_data(
     employee=None,
 ):
     scope = _get_scope(filters=filters, department=department, employee=employee)
-    dash = PersonalSalesDashboard(scope["user"])
     user = scope["user"]
 
     rows = frappe.db.sql(
-        """
+        f"""
         SELECT
             COALESCE(NULLIF(TRIM(source), ''), 'Unknown') as source,
             COUNT(*) as total
         FROM `tabLead`
         WHERE (owner = %(user)s OR lead_owner = %(user)s)
-          AND name NOT LIKE %(demo)s
-          AND (lead_name IS NULL OR lead_name NOT LIKE %(demo)s)
+          AND name NOT IN ({DEMO_NAMES_SQL})
         GROUP BY source
         ORDER BY total DESC
         """,
-        {"user": user, "demo": dash.demo_pattern},
+        {"user": user},
         as_dict=True,
     )
 
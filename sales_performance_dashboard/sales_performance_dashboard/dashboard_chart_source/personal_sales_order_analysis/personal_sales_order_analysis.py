@@ -6,10 +6,9 @@ import frappe
 from frappe import _
 from frappe.utils.dashboard import cache_source
 
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.instrumentation import instrumented
 from sales_performance_dashboard.api.personal_dashboard_api import resolve_personal_scope
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
 
 def _get_scope(filters=None, department=None, employee=None):
     parsed = frappe.parse_json(filters) if filters else {}
@@ -22,6 +21,7 @@ def _get_scope(filters=None, department=None, employee=None):
 
 
 @frappe.whitelist()
+@instrumented
 @cache_source
 def get_data(
     chart_name=None,
@@ -37,18 +37,16 @@ def get_data(
     employee=None,
 ):
     scope = _get_scope(filters=filters, department=department, employee=employee)
-    dash = PersonalSalesDashboard(scope["user"])
-    demo = dash.demo_pattern
     rows = frappe.db.sql(
-        """
+        f"""
         SELECT SUM(grand_total) as total_amount,
                SUM(grand_total * (per_billed / 100)) as billed_amount
         FROM `tabSales Order`
         WHERE docstatus = 1
           AND owner = %(user)s
-          AND customer NOT LIKE %(demo)s
+          AND customer NOT IN ({DEMO_NAMES_SQL})
         """,
-        {"user": scope["user"], "demo": demo},
+        {"user": scope["user"]},
         as_dict=True,
     )
 
@@ -65,20 +63,19 @@ def get_data(
 
 
 @frappe.whitelist()
+@instrumented
 def get_data_for_custom(department=None, employee=None):
     scope = _get_scope(department=department, employee=employee)
-    dash = PersonalSalesDashboard(scope["user"])
-    demo = dash.demo_pattern
     rows = frappe.db.sql(
-        """
+        f"""
         SELECT SUM(grand_total) as total_amount,
                SUM(grand_total * (per_billed / 100)) as billed_amount
         FROM `tabSales Order`
         WHERE docstatus = 1
           AND owner = %(user)s
-          AND customer NOT LIKE %(demo)s
+          AND customer NOT IN ({DEMO_NAMES_SQL})
         """,
-        {"user": scope["user"], "demo": demo},
+        {"user": scope["user"]},
         as_dict=True,
     )
 
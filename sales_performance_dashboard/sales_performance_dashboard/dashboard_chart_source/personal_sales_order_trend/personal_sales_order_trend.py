@@ -7,10 +7,10 @@ from frappe import _
 from frappe.utils import add_months, get_first_day, get_last_day, getdate, nowdate
 from frappe.utils.dashboard import cache_source
 
+from sales_performance_dashboard.api.chart_buckets import month_start_sql, scatter_into_bins
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.instrumentation import instrumented
 from sales_performance_dashboard.api.personal_dashboard_api import resolve_personal_scope
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
 
 
 def _month_bins(from_date, to_date):
@@ -40,6 +40,7 @@ def _get_scope(filters=None, department=None, employee=None):
 
 
 @frappe.whitelist()
+@instrumented
 @cache_source
 def get_data(
     chart_name=None,
@@ -67,26 +68,22 @@ def get_data(
 
     labels, bins = _month_bins(from_date, to_date)
 
-    dash = PersonalSalesDashboard(scope["user"])
-    demo = dash.demo_pattern
-    values = []
-
-    for start, end in bins:
-        result = frappe.db.sql(
-            """
-            SELECT SUM(grand_total) as total
+    rows = []
+    if bins:
+        rows = frappe.db.sql(
+            f"""
+            SELECT {month_start_sql("transaction_date")} AS bucket_date, SUM(grand_total) AS total
             FROM `tabSales Order`
             WHERE docstatus = 1
               AND owner = %(user)s
-              AND customer NOT LIKE %(demo)s
+              AND customer NOT IN ({DEMO_NAMES_SQL})
               AND transaction_date BETWEEN %(from_date)s AND %(to_date)s
+            GROUP BY bucket_date
             """,
-            {"user": scope["user"], "demo": demo, "from_date": start, "to_date": end},
+            {"user": scope["user"], "from_date": bins[0][0], "to_date": bins[-1][1]},
             as_dict=True,
         )
-
-        total = (result[0].total or 0) if result else 0
-        values.append(total)
+    values = scatter_into_bins(rows, bins, ("total",))["total"]
 
     return {
         "labels": labels,
@@ -6,10 +6,9 @@ import frappe
 from frappe import _
 from frappe.utils.dashboard import cache_source
 
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL
+from sales_performance_dashboard.api.instrumentation import instrumented
 from sales_performance_dashboard.api.personal_dashboard_api import resolve_personal_scope
-from sales_performance_dashboard.sales_performance_dashboard.dashboards.personal_dashboard import (
-    PersonalSalesDashboard,
-)
 
 def _get_scope(filters=None, department=None, employee=None):
     parsed = frappe.parse_json(filters) if filters else {}
@@ -22,15 +21,13 @@ def _get_scope(filters=None, department=None, employee=None):
 
 
 def _get_rows(scope, start=0, page_length=None):
-    dash = PersonalSalesDashboard(scope["user"])
-    demo = dash.demo_pattern
-    params = {"user": scope["user"], "demo": demo}
-    query = """
+    params = {"user": scope["user"]}
+    query = f"""
         SELECT customer, SUM(grand_total) as total
         FROM `tabSales Invoice`
         WHERE docstatus = 1
           AND owner = %(user)s
-          AND customer NOT LIKE %(demo)s
+          AND customer NOT IN ({DEMO_NAMES_SQL})
         GROUP BY customer
         ORDER BY total DESC
     """
@@ -43,21 +40,19 @@ def _get_rows(scope, start=0, page_length=None):
 
 
 def _get_total_customer_count(scope):
-    dash = PersonalSalesDashboard(scope["user"])
-    demo = dash.demo_pattern
     row = frappe.db.sql(
-        """
+        f"""
         SELECT COUNT(*) AS total_count
         FROM (
             SELECT customer
             FROM `tabSales Invoice`
             WHERE docstatus = 1
               AND owner = %(user)s
-              AND customer NOT LIKE %(demo)s
+              AND customer NOT IN ({DEMO_NAMES_SQL})
             GROUP BY customer
         ) AS grouped_customers
         """,
-        {"user": scope["user"], "demo": demo},
+        {"user": scope["user"]},
         as_dict=True,
     )
     return int((row[0].total_count if row else 0) or 0)
@@ -71,6 +66,7 @@ def _coerce_int(value, default):
 
 
 @frappe.whitelist()
+@instrumented
 @cache_source
 def get_data(
     chart_name=None,
@@ -99,6 +95,7 @@ def get_data(
 
 
 @frappe.whitelist()
+@instrumented
 def get_table_data_for_custom(department=None, employee=None, start=0, page_length=5):
     scope = _get_scope(department=department, employee=employee)
     safe_start = max(0, _coerce_int(start, 0))
@@ -20,6 +20,14 @@ from frappe.utils import (
 from datetime import timedelta
 from typing import Dict, Any, Optional, List
 
+from sales_performance_dashboard.api.dashboard_cache import (
+    PERSONAL_NAMESPACE,
+    get_or_compute,
+    get_version,
+)
+from sales_performance_dashboard.api.demo_data import DEMO_NAMES_SQL, not_demo_filter, not_demo_route_filter
+from sales_performance_dashboard.api.instrumentation import instrumented
+
 class PersonalSalesDashboard:
     """Handler class for Personal Sales Dashboard metrics"""
     
@@ -32,7 +40,6 @@ class PersonalSalesDashboard:
         """
         self.user = user or frappe.session.user
         self.today = getdate(nowdate())
-        self.demo_pattern = "%DEMO%"
         
         # Month boundaries
         self.month_start = get_first_day(self.today)
@@ -52,14 +59,20 @@ class PersonalSalesDashboard:
 
     def _get_employee(self) -> Optional[str]:
         """Get Employee linked to current user."""
-        return frappe.db.get_value("Employee", {"user_id": self.user}, "name")
+        if not hasattr(self, "_employee"):
+            self._employee = frappe.db.get_value("Employee", {"user_id": self.user}, "name")
+        return self._employee
 
     def _get_sales_persons(self) -> List[str]:
         """Get Sales Person records linked to current user."""
-        employee = self._get_employee()
-        if not employee:
-            return []
-        return frappe.get_all("Sales Person", filters={"employee": employee}, pluck="name")
+        if not hasattr(self, "_sales_persons"):
+            employee = self._get_employee()
+            self._sales_persons = (
+                frappe.get_all("Sales Person", filters={"employee": employee}, pluck="name")
+                if employee
+                else []
+            )
+        return self._sales_persons
 
     def _make_card_value(self, value, fieldtype="Currency"):
         """Return value in Number Card custom format."""
@@ -73,120 +86,274 @@ class PersonalSalesDashboard:
         }
 
     def _is_not_demo_filter(self, fieldname: str):
-        """Return a Not Like filter for demo records."""
-        return [fieldname, "not like", self.demo_pattern]
+        """Return a Not In filter against the demo record registry."""
+        return not_demo_filter(fieldname)
+
+    def _not_demo_route_filter(self):
+        """Route option excluding demo records by their marker."""
+        return not_demo_route_filter()
     
     def get_cache_key(self, metric: str) -> str:
-        """Generate cache key for metrics"""
-        return f"personal_dashboard:{self.user}:{metric}:{self.today}"
-    
-    # ==================== Revenue Metrics ====================
+        """
+        Generate cache key for metrics
+
+        The key embeds the user's cache version, which Sales Invoice,
+        Payment Entry, Opportunity and Sales Targets events bump, so a
+        submit invalidates the user's cached metrics immediately.
+        """
+        version = get_version(PERSONAL_NAMESPACE, self.user)
+        return f"personal_dashboard:{self.user}:{version}:{metric}:{self.today}"
     
-    @frappe.whitelist()
-    def get_total_revenue(self) -> float:
+    # ==================== Batched Metrics ====================
+
+    def get_batched_metrics(self) -> Dict[str, Any]:
         """
-        Get total revenue from submitted Sales Invoices for current month
-        
+        Compute the card metrics with one query per source table
+
+        Sales Invoice, Payment Entry, Opportunity (with Leads) and
+        Customer (with Appointments) are each read once. The result is
+        shared by every getter for the rest of the request and cached
+        until the user's cache version changes (at most 1 hour).
+
         Returns:
-            float: Total grand_total amount
-        """
-        cache_key = self.get_cache_key("revenue")
-        cached_value = frappe.cache().get_value(cache_key)
-        
-        if cached_value is not None:
-            return flt(cached_value)
-        
+            dict: Raw metric values keyed by metric name
+        """
+        memo = getattr(frappe.local, "spd_personal_metrics", None)
+        if memo is None:
+            memo = frappe.local.spd_personal_metrics = {}
+
+        key = (self.user, str(self.today))
+        if key not in memo:
+            memo[key] = get_or_compute(
+                self.get_cache_key("metrics"),
+                self._query_batched_metrics,
+                expires_in_sec=3600,
+                namespace=PERSONAL_NAMESPACE,
+            )
+        return memo[key]
+
+    def _query_batched_metrics(self) -> Dict[str, Any]:
+        metrics = {}
+        metrics.update(self._query_invoice_metrics())
+        metrics.update(self._query_collection_metrics())
+        metrics.update(self._query_opportunity_metrics())
+        metrics.update(self._query_customer_metrics())
+        return metrics
+
+    def _batch_params(self) -> Dict[str, Any]:
+        # frappe.db.count's between filter runs to the end of the last day;
+        # the *_eod bounds keep the counts identical to the old per-card queries.
+        return {
+            "user": self.user,
+            "month_start": self.month_start,
+            "month_end": self.month_end,
+            "month_end_eod": f"{self.month_end} 23:59:59.999999",
+            "week_start": self.week_start,
+            "week_end": self.week_end,
+            "week_end_eod": f"{self.week_end} 23:59:59.999999",
+        }
+
+    def _query_invoice_metrics(self) -> Dict[str, Any]:
+        """Revenue, outstanding, invoice count and customers served from Sales Invoice"""
         result = frappe.db.sql(
-            """
-            SELECT COALESCE(SUM(grand_total), 0) as value
+            f"""
+            SELECT
+                COALESCE(SUM(CASE WHEN posting_date BETWEEN %(month_start)s AND %(month_end)s
+                    THEN grand_total END), 0) as revenue,
+                COALESCE(SUM(CASE WHEN outstanding_amount > 0
+                    THEN outstanding_amount END), 0) as outstanding,
+                COUNT(CASE WHEN posting_date BETWEEN %(month_start)s AND %(month_end)s
+                    THEN 1 END) as total_invoices,
+                COUNT(DISTINCT CASE WHEN posting_date BETWEEN %(week_start)s AND %(week_end)s
+                    THEN customer END) as customers_served_week,
+                COUNT(DISTINCT CASE WHEN posting_date BETWEEN %(month_start)s AND %(month_end)s
+                    THEN customer END) as customers_served_month
             FROM `tabSales Invoice`
             WHERE docstatus = 1
                 AND owner = %(user)s
-                AND customer NOT LIKE %(demo)s
-                AND posting_date BETWEEN %(from_date)s AND %(to_date)s
+                AND customer NOT IN ({DEMO_NAMES_SQL})
+                AND (
+                    outstanding_amount > 0
+                    OR posting_date BETWEEN %(scan_start)s AND %(scan_end)s
+                )
             """,
             {
-                "user": self.user,
-                "demo": self.demo_pattern,
-                "from_date": self.month_start,
-                "to_date": self.month_end,
+                **self._batch_params(),
+                "scan_start": min(self.month_start, self.week_start),
+                "scan_end": max(self.month_end, self.week_end),
             },
             as_dict=1,
         )
-        
-        value = flt(result[0].value) if result else 0.0
-        
-        # Cache for 5 minutes
-        frappe.cache().set_value(cache_key, value, expires_in_sec=300)
-        
-        return value
-    
+        row = result[0] if result else frappe._dict()
+        return {
+            "revenue": flt(row.get("revenue")),
+            "outstanding": flt(row.get("outstanding")),
+            "total_invoices": int(row.get("total_invoices") or 0),
+            "customers_served_week": int(row.get("customers_served_week") or 0),
+            "customers_served_month": int(row.get("customers_served_month") or 0),
+        }
+
+    def _query_collection_metrics(self) -> Dict[str, Any]:
+        """Amount received this month from Payment Entry"""
+        result = frappe.db.sql(
+            f"""
+            SELECT COALESCE(SUM(paid_amount), 0) as collected
+            FROM `tabPayment Entry`
+            WHERE docstatus = 1
+                AND owner = %(user)s
+                AND party NOT IN ({DEMO_NAMES_SQL})
+                AND posting_date BETWEEN %(month_start)s AND %(month_end)s
+                AND payment_type = 'Receive'
+            """,
+            self._batch_params(),
+            as_dict=1,
+        )
+        return {"collected": flt(result[0].collected) if result else 0.0}
+
+    def _query_opportunity_metrics(self) -> Dict[str, Any]:
+        """Lead, pipeline, win/loss and cycle-time metrics from Opportunity"""
+        result = frappe.db.sql(
+            f"""
+            SELECT
+                (
+                    SELECT COUNT(*)
+                    FROM `tabLead`
+                    WHERE owner = %(user)s
+                        AND name NOT IN ({DEMO_NAMES_SQL})
+                        AND creation BETWEEN %(month_start)s AND %(month_end_eod)s
+                ) as leads,
+                COUNT(CASE WHEN o.creation BETWEEN %(month_start)s AND %(month_end_eod)s
+                    THEN 1 END) as opportunities,
+                COALESCE(SUM(CASE WHEN o.creation BETWEEN %(month_start)s AND %(month_end)s
+                    THEN o.opportunity_amount END), 0) as opportunities_value,
+                COUNT(CASE WHEN o.creation BETWEEN %(month_start)s AND %(month_end_eod)s
+                    AND o.status NOT IN ('Converted', 'Lost') THEN 1 END) as ongoing_deals,
+                COUNT(CASE WHEN o.status = 'Converted'
+                    AND o.modified BETWEEN %(month_start)s AND %(month_end_eod)s THEN 1 END) as won_deals,
+                COUNT(CASE WHEN o.status = 'Lost'
+                    AND o.modified BETWEEN %(month_start)s AND %(month_end_eod)s THEN 1 END) as lost_deals,
+                COALESCE(AVG(CASE WHEN o.creation BETWEEN %(month_start)s AND %(month_end)s
+                    THEN o.opportunity_amount END), 0) as avg_deal_value,
+                COALESCE(AVG(CASE WHEN o.status = 'Converted'
+                    AND o.modified BETWEEN %(month_start)s AND %(month_end)s
+                    THEN o.opportunity_amount END), 0) as avg_won_deal_value,
+                COALESCE(AVG(CASE WHEN o.status = 'Converted'
+                    AND o.modified BETWEEN %(month_start)s AND %(month_end)s
+                    THEN DATEDIFF(o.modified, o.creation) END), 0) as avg_days_to_close,
+                COALESCE(AVG(CASE WHEN o.status = 'Converted'
+                    AND o.modified BETWEEN %(month_start)s AND %(month_end)s
+                    AND l.name IS NOT NULL
+                    THEN DATEDIFF(o.modified, l.creation) END), 0) as avg_days_lead_to_deal
+            FROM `tabOpportunity` o
+            LEFT JOIN `tabLead` l
+                ON o.opportunity_from = 'Lead'
+                AND l.name = o.party_name
+                AND l.name NOT IN ({DEMO_NAMES_SQL})
+            WHERE o.owner = %(user)s
+                AND o.name NOT IN ({DEMO_NAMES_SQL})
+                AND o.party_name NOT IN ({DEMO_NAMES_SQL})
+                AND (
+                    o.creation BETWEEN %(month_start)s AND %(month_end_eod)s
+                    OR o.modified BETWEEN %(month_start)s AND %(month_end_eod)s
+                )
+            """,
+            self._batch_params(),
+            as_dict=1,
+        )
+        row = result[0] if result else frappe._dict()
+        return {
+            "leads": int(row.get("leads") or 0),
+            "opportunities": int(row.get("opportunities") or 0),
+            "opportunities_value": flt(row.get("opportunities_value")),
+            "ongoing_deals": int(row.get("ongoing_deals") or 0),
+            "won_deals": int(row.get("won_deals") or 0),
+            "lost_deals": int(row.get("lost_deals") or 0),
+            "avg_deal_value": flt(row.get("avg_deal_value")),
+            "avg_won_deal_value": flt(row.get("avg_won_deal_value")),
+            "avg_days_to_close": round(flt(row.get("avg_days_to_close"))),
+            "avg_days_lead_to_deal": round(flt(row.get("avg_days_lead_to_deal"))),
+        }
+
+    def _query_customer_metrics(self) -> Dict[str, Any]:
+        """New customer counts from Customer plus Appointment counts"""
+        appointment_columns = """
+                0 as appointments_total,
+                0 as appointments_open,
+                0 as appointments_closed"""
+        if frappe.db.exists("DocType", "Appointment"):
+            appointment_columns = """
+                COUNT(CASE WHEN a.scheduled_time BETWEEN %(month_start)s AND %(month_end_eod)s
+                    THEN 1 END) as appointments_total,
+                COUNT(CASE WHEN a.status IN ('Open', 'Scheduled') THEN 1 END) as appointments_open,
+                COUNT(CASE WHEN a.status = 'Closed'
+                    AND a.scheduled_time BETWEEN %(month_start)s AND %(month_end_eod)s
+                    THEN 1 END) as appointments_closed
+            FROM `tabAppointment` a
+            WHERE a.owner = %(user)s"""
+
+        result = frappe.db.sql(
+            f"""
+            SELECT
+                (
+                    SELECT COUNT(*)
+                    FROM `tabCustomer`
+                    WHERE owner = %(user)s
+                        AND name NOT IN ({DEMO_NAMES_SQL})
+                        AND creation BETWEEN %(week_start)s AND %(week_end_eod)s
+                ) as new_customers_week,
+                (
+                    SELECT COUNT(*)
+                    FROM `tabCustomer`
+                    WHERE owner = %(user)s
+                        AND name NOT IN ({DEMO_NAMES_SQL})
+                        AND creation BETWEEN %(month_start)s AND %(month_end_eod)s
+                ) as new_customers_month,
+                {appointment_columns}
+            """,
+            self._batch_params(),
+            as_dict=1,
+        )
+        row = result[0] if result else frappe._dict()
+        return {
+            "new_customers_week": int(row.get("new_customers_week") or 0),
+            "new_customers_month": int(row.get("new_customers_month") or 0),
+            "appointments_total": int(row.get("appointments_total") or 0),
+            "appointments_open": int(row.get("appointments_open") or 0),
+            "appointments_closed": int(row.get("appointments_closed") or 0),
+        }
+
+    # ==================== Revenue Metrics ====================
+
+    @frappe.whitelist()
+    def get_total_revenue(self) -> float:
+        """
+        Get total revenue from submitted Sales Invoices for current month
+
+        Returns:
+            float: Total grand_total amount
+        """
+        return self.get_batched_metrics()["revenue"]
+
     @frappe.whitelist()
     def get_total_collected(self) -> float:
         """
         Get total collected amount from Payment Entries for current month
-        
+
         Returns:
             float: Total paid_amount
         """
-        cache_key = self.get_cache_key("collected")
-        cached_value = frappe.cache().get_value(cache_key)
-        
-        if cached_value is not None:
-            return flt(cached_value)
-        
-        result = frappe.db.sql("""
-            SELECT COALESCE(SUM(paid_amount), 0) as value
-            FROM `tabPayment Entry`
-            WHERE docstatus = 1
-                AND owner = %(user)s
-                AND party NOT LIKE %(demo)s
-                AND posting_date BETWEEN %(from_date)s AND %(to_date)s
-                AND payment_type = 'Receive'
-        """, {
-            'user': self.user,
-            'demo': self.demo_pattern,
-            'from_date': self.month_start,
-            'to_date': self.month_end
-        }, as_dict=1)
-        
-        value = flt(result[0].value) if result else 0.0
-        frappe.cache().set_value(cache_key, value, expires_in_sec=300)
-        
-        return value
-    
+        return self.get_batched_metrics()["collected"]
+
     @frappe.whitelist()
     def get_total_outstanding(self) -> float:
         """
         Get total outstanding amount from all Sales Invoices
-        
+
         Returns:
             float: Total outstanding_amount
         """
-        cache_key = self.get_cache_key("outstanding")
-        cached_value = frappe.cache().get_value(cache_key)
-        
-        if cached_value is not None:
-            return flt(cached_value)
-        
-        result = frappe.db.sql(
-            """
-            SELECT COALESCE(SUM(outstanding_amount), 0) as value
-            FROM `tabSales Invoice`
-            WHERE docstatus = 1
-                AND owner = %(user)s
-                AND outstanding_amount > 0
-                AND customer NOT LIKE %(demo)s
-            """,
-            {"user": self.user, "demo": self.demo_pattern},
-            as_dict=1,
-        )
-        
-        value = flt(result[0].value) if result else 0.0
-        frappe.cache().set_value(cache_key, value, expires_in_sec=300)
-        
-        return value
-    
+        return self.get_batched_metrics()["outstanding"]
+
     # ==================== Target Metrics ====================
     
     @frappe.whitelist()
@@ -197,16 +364,20 @@ class PersonalSalesDashboard:
         Returns:
             float: Target amount for current month
         """
-        cache_key = self.get_cache_key("target")
-        cached_value = frappe.cache().get_value(cache_key)
-        
-        if cached_value is not None:
-            return flt(cached_value)
-        
         employee = self._get_employee()
         if not employee:
             return 0.0
 
+        return flt(
+            get_or_compute(
+                self.get_cache_key("target"),
+                lambda: self._query_monthly_target(employee),
+                expires_in_sec=3600,  # Cache for 1 hour
+                namespace=PERSONAL_NAMESPACE,
+            )
+        )
+
+    def _query_monthly_target(self, employee: str) -> float:
         result = frappe.db.sql(
             """
             SELECT
@@ -224,10 +395,7 @@ class PersonalSalesDashboard:
             as_dict=1,
         )
         
-        value = flt(result[0].value) if result else 0.0
-        frappe.cache().set_value(cache_key, value, expires_in_sec=3600)  # Cache for 1 hour
-        
-        return value
+        return flt(result[0].value) if result else 0.0
     
     @frappe.whitelist()
     def get_target_percentage(self) -> float:
@@ -246,373 +414,181 @@ class PersonalSalesDashboard:
         return round((revenue / target) * 100, 2)
     
     # ==================== Lead & Opportunity Metrics ====================
-    
+
     @frappe.whitelist()
     def get_total_leads(self) -> int:
         """
         Get total leads created in current month
-        
+
         Returns:
             int: Count of leads
         """
-        return frappe.db.count('Lead', {
-            'owner': self.user,
-            'name': ['not like', self.demo_pattern],
-            'creation': ['between', [self.month_start, self.month_end]]
-        })
-    
+        return self.get_batched_metrics()["leads"]
+
     @frappe.whitelist()
     def get_total_opportunities(self) -> int:
         """
         Get total opportunities created in current month
-        
+
         Returns:
             int: Count of opportunities
         """
-        return frappe.db.count('Opportunity', {
-            'owner': self.user,
-            'name': ['not like', self.demo_pattern],
-            'party_name': ['not like', self.demo_pattern],
-            'creation': ['between', [self.month_start, self.month_end]]
-        })
-    
+        return self.get_batched_metrics()["opportunities"]
+
     @frappe.whitelist()
     def get_opportunities_value(self) -> float:
         """
         Get total value of opportunities in current month
-        
+
         Returns:
             float: Sum of opportunity_amount
         """
-        result = frappe.db.sql("""
-            SELECT COALESCE(SUM(opportunity_amount), 0) as value
-            FROM `tabOpportunity`
-            WHERE owner = %(user)s
-                AND name NOT LIKE %(demo)s
-                AND party_name NOT LIKE %(demo)s
-                AND creation BETWEEN %(from_date)s AND %(to_date)s
-        """, {
-            'user': self.user,
-            'demo': self.demo_pattern,
-            'from_date': self.month_start,
-            'to_date': self.month_end
-        }, as_dict=1)
-        
-        return flt(result[0].value) if result else 0.0
-    
+        return self.get_batched_metrics()["opportunities_value"]
+
     @frappe.whitelist()
     def get_won_deals(self) -> int:
         """
         Get count of won opportunities in current month
-        
+
         Returns:
             int: Count of converted opportunities
         """
-        return frappe.db.count('Opportunity', {
-            'owner': self.user,
-            'status': 'Converted',
-            'name': ['not like', self.demo_pattern],
-            'party_name': ['not like', self.demo_pattern],
-            'modified': ['between', [self.month_start, self.month_end]]
-        })
-    
+        return self.get_batched_metrics()["won_deals"]
+
     @frappe.whitelist()
     def get_lost_deals(self) -> int:
         """
         Get count of lost opportunities in current month
-        
+
         Returns:
             int: Count of lost opportunities
         """
-        return frappe.db.count('Opportunity', {
-            'owner': self.user,
-            'status': 'Lost',
-            'name': ['not like', self.demo_pattern],
-            'party_name': ['not like', self.demo_pattern],
-            'modified': ['between', [self.month_start, self.month_end]]
-        })
+        return self.get_batched_metrics()["lost_deals"]
 
     @frappe.whitelist()
     def get_ongoing_deals(self) -> int:
         """
         Get count of ongoing opportunities (not Lost/Converted) in current month
         """
-        return frappe.db.count('Opportunity', {
-            'owner': self.user,
-            'status': ['not in', ['Converted', 'Lost']],
-            'name': ['not like', self.demo_pattern],
-            'party_name': ['not like', self.demo_pattern],
-            'creation': ['between', [self.month_start, self.month_end]]
-        })
+        return self.get_batched_metrics()["ongoing_deals"]
 
     @frappe.whitelist()
     def get_avg_deal_value(self) -> float:
         """
         Get average opportunity amount in current month
         """
-        result = frappe.db.sql(
-            """
-            SELECT COALESCE(AVG(opportunity_amount), 0) as value
-            FROM `tabOpportunity`
-            WHERE owner = %(user)s
-              AND name NOT LIKE %(demo)s
-              AND party_name NOT LIKE %(demo)s
-              AND creation BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                'user': self.user,
-                'demo': self.demo_pattern,
-                'from_date': self.month_start,
-                'to_date': self.month_end
-            },
-            as_dict=1
-        )
-        return flt(result[0].value) if result else 0.0
+        return self.get_batched_metrics()["avg_deal_value"]
 
     @frappe.whitelist()
     def get_avg_won_deal_value(self) -> float:
         """
         Get average value of converted opportunities in current month
         """
-        result = frappe.db.sql(
-            """
-            SELECT COALESCE(AVG(opportunity_amount), 0) as value
-            FROM `tabOpportunity`
-            WHERE owner = %(user)s
-              AND status = 'Converted'
-              AND name NOT LIKE %(demo)s
-              AND party_name NOT LIKE %(demo)s
-              AND modified BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                'user': self.user,
-                'demo': self.demo_pattern,
-                'from_date': self.month_start,
-                'to_date': self.month_end
-            },
-            as_dict=1
-        )
-        return flt(result[0].value) if result else 0.0
+        return self.get_batched_metrics()["avg_won_deal_value"]
 
     @frappe.whitelist()
     def get_avg_time_to_close_deal(self) -> dict:
         """
         Average time (days) from opportunity creation to conversion in current month
         """
-        rows = frappe.db.sql(
-            """
-            SELECT DATEDIFF(modified, creation) as days
-            FROM `tabOpportunity`
-            WHERE owner = %(user)s
-              AND status = 'Converted'
-              AND name NOT LIKE %(demo)s
-              AND party_name NOT LIKE %(demo)s
-              AND modified BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                'user': self.user,
-                'demo': self.demo_pattern,
-                'from_date': self.month_start,
-                'to_date': self.month_end
-            },
-            as_dict=1
-        )
-        if not rows:
-            return self._make_card_value("0 days", "Data")
-        avg_days = sum((r.days or 0) for r in rows) / max(len(rows), 1)
-        return self._make_card_value(f"{round(avg_days)} days", "Data")
+        days = self.get_batched_metrics()["avg_days_to_close"]
+        return self._make_card_value(f"{days} days", "Data")
 
     @frappe.whitelist()
     def get_avg_time_lead_to_deal(self) -> dict:
         """
         Average time (days) from lead creation to converted opportunity in current month
         """
-        rows = frappe.db.sql(
-            """
-            SELECT DATEDIFF(o.modified, l.creation) as days
-            FROM `tabOpportunity` o
-            INNER JOIN `tabLead` l ON l.name = o.party_name
-            WHERE o.owner = %(user)s
-              AND o.opportunity_from = 'Lead'
-              AND o.status = 'Converted'
-              AND o.name NOT LIKE %(demo)s
-              AND o.party_name NOT LIKE %(demo)s
-              AND l.name NOT LIKE %(demo)s
-              AND o.modified BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                'user': self.user,
-                'demo': self.demo_pattern,
-                'from_date': self.month_start,
-                'to_date': self.month_end
-            },
-            as_dict=1
-        )
-        if not rows:
-            return self._make_card_value("0 days", "Data")
-        avg_days = sum((r.days or 0) for r in rows) / max(len(rows), 1)
-        return self._make_card_value(f"{round(avg_days)} days", "Data")
-    
+        days = self.get_batched_metrics()["avg_days_lead_to_deal"]
+        return self._make_card_value(f"{days} days", "Data")
+
     # ==================== Customer Metrics ====================
-    
+
     @frappe.whitelist()
     def get_new_customers_week(self) -> int:
         """
         Get new customers created this week
-        
+
         Returns:
             int: Count of new customers
         """
-        return frappe.db.count('Customer', {
-            'owner': self.user,
-            'name': ['not like', self.demo_pattern],
-            'customer_name': ['not like', self.demo_pattern],
-            'creation': ['between', [self.week_start, self.week_end]]
-        })
-    
+        return self.get_batched_metrics()["new_customers_week"]
+
     @frappe.whitelist()
     def get_new_customers_month(self) -> int:
         """
         Get new customers created this month
-        
+
         Returns:
             int: Count of new customers
         """
-        return frappe.db.count('Customer', {
-            'owner': self.user,
-            'name': ['not like', self.demo_pattern],
-            'customer_name': ['not like', self.demo_pattern],
-            'creation': ['between', [self.month_start, self.month_end]]
-        })
-    
+        return self.get_batched_metrics()["new_customers_month"]
+
     @frappe.whitelist()
     def get_customers_served_week(self) -> int:
         """
         Get unique customers served this week (from Sales Invoices)
-        
+
         Returns:
             int: Count of unique customers
         """
-        result = frappe.db.sql(
-            """
-            SELECT COUNT(DISTINCT customer) as value
-            FROM `tabSales Invoice`
-            WHERE docstatus = 1
-                AND owner = %(user)s
-                AND customer NOT LIKE %(demo)s
-                AND posting_date BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                "user": self.user,
-                "demo": self.demo_pattern,
-                "from_date": self.week_start,
-                "to_date": self.week_end,
-            },
-            as_dict=1,
-        )
-        
-        return int(result[0].value) if result else 0
-    
+        return self.get_batched_metrics()["customers_served_week"]
+
     @frappe.whitelist()
     def get_customers_served_month(self) -> int:
         """
         Get unique customers served this month (from Sales Invoices)
-        
+
         Returns:
             int: Count of unique customers
         """
-        result = frappe.db.sql(
-            """
-            SELECT COUNT(DISTINCT customer) as value
-            FROM `tabSales Invoice`
-            WHERE docstatus = 1
-                AND owner = %(user)s
-                AND customer NOT LIKE %(demo)s
-                AND posting_date BETWEEN %(from_date)s AND %(to_date)s
-            """,
-            {
-                "user": self.user,
-                "demo": self.demo_pattern,
-                "from_date": self.month_start,
-                "to_date": self.month_end,
-            },
-            as_dict=1,
-        )
-        
-        return int(result[0].value) if result else 0
-    
+        return self.get_batched_metrics()["customers_served_month"]
+
     # ==================== Appointment Metrics ====================
-    
+
     @frappe.whitelist()
     def get_total_appointments(self) -> int:
         """
         Get total appointments scheduled this month
         Note: Returns 0 if Appointment doctype doesn't exist
-        
+
         Returns:
             int: Count of appointments
         """
-        if not frappe.db.exists('DocType', 'Appointment'):
-            return 0
-        
-        return frappe.db.count('Appointment', {
-            'owner': self.user,
-            'scheduled_time': ['between', [self.month_start, self.month_end]]
-        })
-    
+        return self.get_batched_metrics()["appointments_total"]
+
     @frappe.whitelist()
     def get_open_appointments(self) -> int:
         """
         Get currently open/scheduled appointments
-        
+
         Returns:
             int: Count of open appointments
         """
-        if not frappe.db.exists('DocType', 'Appointment'):
-            return 0
-        
-        return frappe.db.count('Appointment', {
-            'owner': self.user,
-            'status': ['in', ['Open', 'Scheduled']]
-        })
-    
+        return self.get_batched_metrics()["appointments_open"]
+
     @frappe.whitelist()
     def get_closed_appointments(self) -> int:
         """
         Get closed appointments this month
-        
+
         Returns:
             int: Count of closed appointments
         """
-        if not frappe.db.exists('DocType', 'Appointment'):
-            return 0
-        
-        return frappe.db.count('Appointment', {
-            'owner': self.user,
-            'status': 'Closed',
-            'scheduled_time': ['between', [self.month_start, self.month_end]]
-        })
-    
+        return self.get_batched_metrics()["appointments_closed"]
+
     # ==================== Invoice Metrics ====================
-    
+
     @frappe.whitelist()
     def get_total_invoices(self) -> int:
         """
         Get total submitted sales invoices this month
-        
+
         Returns:
             int: Count of sales invoices
         """
-        return frappe.db.count(
-            "Sales Invoice",
-            {
-                "owner": self.user,
-                "docstatus": 1,
-                "posting_date": ["between", [self.month_start, self.month_end]],
-                "customer": ["not like", self.demo_pattern],
-            },
-        )
-    
+        return self.get_batched_metrics()["total_invoices"]
+
     # ==================== Aggregate Method ====================
     
     @frappe.whitelist()
@@ -645,9 +621,27 @@ class PersonalSalesDashboard:
         }
 
 
+def get_dashboard_context(user: Optional[str] = None) -> PersonalSalesDashboard:
+    """
+    Return the dashboard for a user, built once per request
+
+    Number Cards, charts and the aggregate endpoint rendered in the same
+    request share one instance, so boundaries, access checks, the employee
+    and sales person lookups and the batched metrics are resolved once.
+    """
+    user = user or frappe.session.user
+    contexts = getattr(frappe.local, "spd_personal_contexts", None)
+    if contexts is None:
+        contexts = frappe.local.spd_personal_contexts = {}
+    if user not in contexts:
+        contexts[user] = PersonalSalesDashboard(user)
+    return contexts[user]
+
+
 # ==================== Whitelisted API Methods ====================
 
 @frappe.whitelist()
+@instrumented
 def get_personal_dashboard_metrics():
     """
     API endpoint to get all personal dashboard metrics
@@ -655,30 +649,31 @@ def get_personal_dashboard_metrics():
     Returns:
         dict: All dashboard metrics
     """
-    dashboard = PersonalSalesDashboard()
-    return dashboard.get_all_metrics()
+    return get_dashboard_context().get_all_metrics()
 
 
 # Individual metric endpoints (for Number Cards)
 
 @frappe.whitelist()
+@instrumented
 def get_revenue():
     """API: Get total revenue"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_total_revenue()
     return {
         **dash._make_card_value(value, "Currency"),
         **dash._route_to("Sales Invoice", {
             "posting_date": ["between", [dash.month_start, dash.month_end]],
             "docstatus": 1,
-            "customer": ["not like", dash.demo_pattern],
+            "customer": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_collected():
     """API: Get total collected"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_total_collected()
     return {
         **dash._make_card_value(value, "Currency"),
@@ -686,28 +681,30 @@ def get_collected():
             "posting_date": ["between", [dash.month_start, dash.month_end]],
             "payment_type": "Receive",
             "docstatus": 1,
-            "party": ["not like", dash.demo_pattern],
+            "party": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_outstanding():
     """API: Get total outstanding"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_total_outstanding()
     return {
         **dash._make_card_value(value, "Currency"),
         **dash._route_to("Sales Invoice", {
             "outstanding_amount": [">", 0],
             "docstatus": 1,
-            "customer": ["not like", dash.demo_pattern],
+            "customer": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_target():
     """API: Get monthly target"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_monthly_target()
     return {
         **dash._make_card_value(value, "Currency"),
@@ -715,9 +712,10 @@ def get_target():
     }
 
 @frappe.whitelist()
+@instrumented
 def get_target_achievement():
     """API: Get target percentage"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_target_percentage()
     return {
         **dash._make_card_value(value, "Percent"),
@@ -725,83 +723,87 @@ def get_target_achievement():
     }
 
 @frappe.whitelist()
+@instrumented
 def get_leads():
     """API: Get total leads"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_total_leads()
     return {
         **dash._make_card_value(value, "Int"),
         **dash._route_to("Lead", {
             "creation": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_opportunities():
     """API: Get total opportunities"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_total_opportunities()
     return {
         **dash._make_card_value(value, "Int"),
         **dash._route_to("Opportunity", {
             "creation": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "party_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
+            "party_name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_opportunities_value():
     """API: Get opportunities value"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_opportunities_value()
     return {
         **dash._make_card_value(value, "Currency"),
         **dash._route_to("Opportunity", {
             "creation": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "party_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
+            "party_name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_new_customers_week():
     """API: Get new customers this week"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_new_customers_week()
     return {
         **dash._make_card_value(value, "Int"),
         **dash._route_to("Customer", {
             "creation": ["between", [dash.week_start, dash.week_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "customer_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_new_customers_month():
     """API: Get new customers this month"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_new_customers_month()
     return {
         **dash._make_card_value(value, "Int"),
         **dash._route_to("Customer", {
             "creation": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "customer_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_total_appointments():
     """API: Get total appointments"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_total_appointments()
     return {
         **dash._make_card_value(value, "Int"),
@@ -812,9 +814,10 @@ def get_total_appointments():
     }
 
 @frappe.whitelist()
+@instrumented
 def get_open_appointments():
     """API: Get open appointments"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_open_appointments()
     return {
         **dash._make_card_value(value, "Int"),
@@ -825,9 +828,10 @@ def get_open_appointments():
     }
 
 @frappe.whitelist()
+@instrumented
 def get_closed_appointments():
     """API: Get closed appointments"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_closed_appointments()
     return {
         **dash._make_card_value(value, "Int"),
@@ -839,37 +843,40 @@ def get_closed_appointments():
     }
 
 @frappe.whitelist()
+@instrumented
 def get_customers_served_week():
     """API: Get customers served this week"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_customers_served_week()
     return {
         **dash._make_card_value(value, "Int"),
         **dash._route_to("Sales Invoice", {
             "posting_date": ["between", [dash.week_start, dash.week_end]],
             "docstatus": 1,
-            "customer": ["not like", dash.demo_pattern],
+            "customer": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_customers_served_month():
     """API: Get customers served this month"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_customers_served_month()
     return {
         **dash._make_card_value(value, "Int"),
         **dash._route_to("Sales Invoice", {
             "posting_date": ["between", [dash.month_start, dash.month_end]],
             "docstatus": 1,
-            "customer": ["not like", dash.demo_pattern],
+            "customer": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_won_deals():
     """API: Get won deals"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_won_deals()
     return {
         **dash._make_card_value(value, "Int"),
@@ -877,15 +884,16 @@ def get_won_deals():
             "status": "Converted",
             "modified": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "party_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
+            "party_name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_lost_deals():
     """API: Get lost deals"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_lost_deals()
     return {
         **dash._make_card_value(value, "Int"),
@@ -893,15 +901,16 @@ def get_lost_deals():
             "status": "Lost",
             "modified": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "party_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
+            "party_name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_ongoing_deals():
     """API: Get ongoing deals"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_ongoing_deals()
     return {
         **dash._make_card_value(value, "Int"),
@@ -909,30 +918,32 @@ def get_ongoing_deals():
             "status": ["not in", ["Converted", "Lost"]],
             "creation": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "party_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
+            "party_name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_avg_deal_value():
     """API: Get average deal value"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_avg_deal_value()
     return {
         **dash._make_card_value(value, "Currency"),
         **dash._route_to("Opportunity", {
             "creation": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "party_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
+            "party_name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_avg_won_deal_value():
     """API: Get average won deal value"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_avg_won_deal_value()
     return {
         **dash._make_card_value(value, "Currency"),
@@ -940,30 +951,32 @@ def get_avg_won_deal_value():
             "status": "Converted",
             "modified": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "party_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
+            "party_name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_avg_time_to_close_deal():
     """API: Get average time to close a deal"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     return {
         **dash.get_avg_time_to_close_deal(),
         **dash._route_to("Opportunity", {
             "status": "Converted",
             "modified": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "party_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
+            "party_name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_avg_time_lead_to_deal():
     """API: Get average time from lead to deal close"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     return {
         **dash.get_avg_time_lead_to_deal(),
         **dash._route_to("Opportunity", {
@@ -971,21 +984,22 @@ def get_avg_time_lead_to_deal():
             "opportunity_from": "Lead",
             "modified": ["between", [dash.month_start, dash.month_end]],
             "owner": dash.user,
-            "name": ["not like", dash.demo_pattern],
-            "party_name": ["not like", dash.demo_pattern],
+            "name": dash._not_demo_route_filter(),
+            "party_name": dash._not_demo_route_filter(),
         }),
     }
 
 @frappe.whitelist()
+@instrumented
 def get_total_invoices():
     """API: Get total invoices"""
-    dash = PersonalSalesDashboard()
+    dash = get_dashboard_context()
     value = dash.get_total_invoices()
     return {
         **dash._make_card_value(value, "Int"),
         **dash._route_to("Sales Invoice", {
             "posting_date": ["between", [dash.month_start, dash.month_end]],
             "docstatus": 1,
-            "customer": ["not like", dash.demo_pattern],
+            "customer": dash._not_demo_route_filter(),
         }),
     }
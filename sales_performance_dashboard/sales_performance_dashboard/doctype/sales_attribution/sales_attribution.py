@@ -0,0 +1,6 @@
+from frappe.model.document import Document
+
+
+class SalesAttribution(Document):
+    # Rows are written by sales_performance_dashboard.api.sales_attribution, never through the form.
+    pass
@@ -0,0 +1,6 @@
+from frappe.model.document import Document
+
+
+class SalesDailyFact(Document):
+    # Rows are upserted by sales_performance_dashboard.api.sales_facts, never through the form.
+    pass
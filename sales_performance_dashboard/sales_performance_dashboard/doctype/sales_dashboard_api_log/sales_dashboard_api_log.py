@@ -0,0 +1,6 @@
+from frappe.model.document import Document
+
+
+class SalesDashboardAPILog(Document):
+    # Rows are written in batches by sales_performance_dashboard.api.instrumentation.flush_api_log.
+    pass
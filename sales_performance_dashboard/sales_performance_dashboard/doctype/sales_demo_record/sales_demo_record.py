@@ -0,0 +1,6 @@
+from frappe.model.document import Document
+
+
+class SalesDemoRecord(Document):
+    # Rows are maintained by sales_performance_dashboard.api.demo_data, never through the form.
+    pass
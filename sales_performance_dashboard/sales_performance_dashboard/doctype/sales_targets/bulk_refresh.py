@@ -0,0 +1,225 @@
+import bisect
+import itertools
+from collections import defaultdict
+
+import frappe
+from frappe.utils import flt, getdate
+
+from sales_performance_dashboard.api.dashboard_cache import bump_employee_versions, bump_shared_versions
+from sales_performance_dashboard.sales_performance_dashboard.doctype.sales_targets.working_calendar import (
+    preload_employee_holiday_lists,
+)
+
+TARGET_FIELDS = [
+    "name",
+    "target_level",
+    "company",
+    "department",
+    "employee",
+    "start_date",
+    "end_date",
+    "yearly_target",
+    "quarterly_target",
+    "monthly_target",
+    "weekly_target",
+    "daily_target",
+]
+
+RESULT_FIELDS = [
+    "achieved_total",
+    "daily_target_current",
+    "monthly_target_current",
+    "quarterly_target_current",
+    "yearly_target_current",
+    "yearly_progress",
+    "quarterly_progress",
+    "monthly_progress",
+    "weekly_progress",
+    "daily_progress",
+]
+
+
+def recompute_sales_targets(names=None, write=True, chunk_size=500):
+    """Recompute achieved, carryover and progress fields for many targets at once.
+
+    Scopes are resolved and achievements aggregated in at most two grouped
+    queries for the whole batch; changed rows are written back with batched
+    UPDATEs. Returns the computed values per target and the names written.
+    """
+    targets = _load_targets(names)
+    if not targets:
+        return frappe._dict(values={}, updated=[])
+
+    series_index = build_series_index(targets)
+    # Daily carryover resolves each employee's holiday list; fetch them together.
+    preload_employee_holiday_lists(row.employee for row in targets if row.employee)
+    values = {}
+    for row in targets:
+        doc = frappe.get_doc({**row, "doctype": "Sales Targets"})
+        if row.start_date and row.end_date:
+            doc.set_achieved_series(
+                series_index.get_series(scope_key(row), row.start_date, row.end_date)
+            )
+        doc.set_achieved_total()
+        doc.set_carryover_targets()
+        doc.update_progress_fields()
+        values[row.name] = {fieldname: flt(doc.get(fieldname)) for fieldname in RESULT_FIELDS}
+
+    changed = {
+        row.name: values[row.name]
+        for row in targets
+        if _has_changed(row, values[row.name])
+    }
+    if write and changed:
+        frappe.db.bulk_update(
+            "Sales Targets",
+            changed,
+            chunk_size=chunk_size,
+            update_modified=False,
+        )
+        # bulk_update skips doc events, so invalidate cached targets here.
+        bump_employee_versions(
+            [row.employee for row in targets if row.name in changed and row.target_level == "Individual"]
+        )
+        bump_shared_versions()
+
+    return frappe._dict(values=values, updated=list(changed))
+
+
+def build_series_index(targets, from_date=None, to_date=None):
+    """Per-scope achieved-by-date series for every target in the batch.
+
+    Covers the targets' own periods, or just `from_date`..`to_date` when given
+    (then targets without dates are included too).
+    """
+    index = SeriesIndex()
+    if from_date and to_date:
+        dated = list(targets)
+        params = {"from_date": getdate(from_date), "to_date": getdate(to_date)}
+    else:
+        dated = [row for row in targets if row.start_date and row.end_date]
+        if not dated:
+            return index
+        params = {
+            "from_date": min(getdate(row.start_date) for row in dated),
+            "to_date": max(getdate(row.end_date) for row in dated),
+        }
+
+    if any(row.target_level == "Company" for row in dated):
+        for company, posting_date, amount in frappe.db.sql(
+            """
+            select si.company, si.posting_date, sum(coalesce(si.grand_total, 0))
+            from `tabSales Invoice` si
+            where si.docstatus = 1
+              and si.posting_date between %(from_date)s and %(to_date)s
+            group by si.company, si.posting_date
+            """,
+            params,
+        ):
+            index.add(("Company", company), posting_date, amount)
+            index.add(("Company", None), posting_date, amount)
+
+    employees = {row.employee for row in dated if row.target_level == "Individual" and row.employee}
+    departments = {
+        row.department for row in dated if row.target_level == "Department" and row.department
+    }
+    scope_conditions = []
+    if employees:
+        scope_conditions.append("sp.employee in %(employees)s")
+        params["employees"] = tuple(employees)
+    if departments:
+        scope_conditions.append("emp.department in %(departments)s")
+        params["departments"] = tuple(departments)
+
+    if scope_conditions:
+        for employee, department, posting_date, amount in frappe.db.sql(
+            f"""
+            select sp.employee, emp.department, si.posting_date, sum(coalesce(st.allocated_amount, 0))
+            from `tabSales Team` st
+            join `tabSales Invoice` si on si.name = st.parent
+            join `tabSales Person` sp on sp.name = st.sales_person
+            left join `tabEmployee` emp on emp.name = sp.employee
+            where st.parenttype = 'Sales Invoice'
+              and si.docstatus = 1
+              and si.posting_date between %(from_date)s and %(to_date)s
+              and ({' or '.join(scope_conditions)})
+            group by sp.employee, emp.department, si.posting_date
+            """,
+            params,
+        ):
+            if employee in employees:
+                index.add(("Individual", employee), posting_date, amount)
+            if department in departments:
+                index.add(("Department", department), posting_date, amount)
+
+    index.freeze()
+    return index
+
+
+class SeriesIndex:
+    def __init__(self):
+        self._amounts = defaultdict(lambda: defaultdict(float))
+        self._dates = {}
+        self._values = {}
+        self._totals = {}
+
+    def add(self, key, posting_date, amount):
+        self._amounts[key][getdate(posting_date)] += flt(amount)
+
+    def freeze(self):
+        for key, by_date in self._amounts.items():
+            dates = sorted(by_date)
+            self._dates[key] = dates
+            self._values[key] = [by_date[posting_date] for posting_date in dates]
+            self._totals[key] = [0.0, *itertools.accumulate(self._values[key])]
+
+    def get_series(self, key, start_date, end_date):
+        dates = self._dates.get(key)
+        if not dates:
+            return []
+
+        lo = bisect.bisect_left(dates, getdate(start_date))
+        hi = bisect.bisect_right(dates, getdate(end_date))
+        return list(zip(dates[lo:hi], self._values[key][lo:hi], strict=True))
+
+    def get_total(self, key, start_date, end_date):
+        """Achieved between two dates (inclusive) from prefix sums."""
+        dates = self._dates.get(key)
+        if not dates:
+            return 0.0
+
+        lo = bisect.bisect_left(dates, getdate(start_date))
+        hi = bisect.bisect_right(dates, getdate(end_date))
+        return self._totals[key][hi] - self._totals[key][lo] if hi > lo else 0.0
+
+
+def _load_targets(names=None):
+    filters = {}
+    if names is not None:
+        if not names:
+            return []
+        filters["name"] = ("in", list(names))
+
+    return frappe.get_all(
+        "Sales Targets",
+        filters=filters,
+        fields=TARGET_FIELDS + RESULT_FIELDS,
+        order_by="name asc",
+    )
+
+
+def scope_key(row):
+    if row.target_level == "Company":
+        return ("Company", row.company or None)
+    if row.target_level == "Department":
+        return ("Department", row.department)
+    if row.target_level == "Individual":
+        return ("Individual", row.employee)
+    return (None, None)
+
+
+def _has_changed(row, values):
+    return any(
+        round(flt(row.get(fieldname)), 6) != round(flt(values[fieldname]), 6)
+        for fieldname in RESULT_FIELDS
+    )
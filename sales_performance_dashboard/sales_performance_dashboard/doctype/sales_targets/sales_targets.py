@@ -2,9 +2,12 @@ import datetime
 
 import frappe
 from frappe.model.document import Document
-from frappe.utils import add_days, add_months, flt, get_first_day, getdate, nowdate
+from frappe.utils import flt, get_first_day, getdate, nowdate
 
-HOLIDAY_LIST_NAME = "Kenya Holiday list 2026"
+from sales_performance_dashboard.sales_performance_dashboard.doctype.sales_targets.working_calendar import (
+    get_working_calendar,
+    resolve_holiday_list,
+)
 
 
 class SalesTargets(Document):
@@ -70,7 +73,7 @@ class SalesTargets(Document):
             self.achieved_total = 0
             return
 
-        self.achieved_total = self.get_achieved_between(self.start_date, self.end_date)
+        self.achieved_total = sum(amount for _posting_date, amount in self.get_achieved_series())
 
     def set_carryover_targets(self):
         if not self.start_date or not self.end_date:
@@ -81,10 +84,11 @@ class SalesTargets(Document):
             return
 
         current_date = self.get_effective_current_date()
-        self.daily_target_current = self.get_daily_target_current(current_date)
-        self.monthly_target_current = self.get_monthly_target_current(current_date)
-        self.quarterly_target_current = self.get_quarterly_target_current(current_date)
-        self.yearly_target_current = self.get_yearly_target_current(current_date)
+        achieved_to_date = self.get_achieved_between(self.start_date, current_date)
+        self.daily_target_current = self.get_daily_target_current(current_date, achieved_to_date)
+        self.monthly_target_current = self.get_monthly_target_current(current_date, achieved_to_date)
+        self.quarterly_target_current = self.get_quarterly_target_current(current_date, achieved_to_date)
+        self.yearly_target_current = self.get_yearly_target_current(current_date, achieved_to_date)
 
     def get_effective_current_date(self):
         current_date = getdate(nowdate())
@@ -96,7 +100,7 @@ class SalesTargets(Document):
             return end_date
         return current_date
 
-    def get_daily_target_current(self, current_date):
+    def get_daily_target_current(self, current_date, achieved_to_date=None):
         if not self.daily_target or self.target_level != "Individual":
             return 0
 
@@ -104,11 +108,12 @@ class SalesTargets(Document):
         if current_date < start_date:
             return flt(self.daily_target)
 
-        achieved_to_date = self.get_achieved_between(start_date, current_date)
+        if achieved_to_date is None:
+            achieved_to_date = self.get_achieved_between(start_date, current_date)
         days_elapsed = self.count_working_days(start_date, current_date)
         return max(0, flt(self.daily_target) * days_elapsed - achieved_to_date)
 
-    def get_monthly_target_current(self, current_date):
+    def get_monthly_target_current(self, current_date, achieved_to_date=None):
         if not self.monthly_target:
             return 0
 
@@ -119,10 +124,11 @@ class SalesTargets(Document):
         else:
             months_elapsed = self.count_months_between(start_date, current_month_start) + 1
 
-        achieved_to_date = self.get_achieved_between(start_date, current_date)
+        if achieved_to_date is None:
+            achieved_to_date = self.get_achieved_between(start_date, current_date)
         return max(0, flt(self.monthly_target) * months_elapsed - achieved_to_date)
 
-    def get_quarterly_target_current(self, current_date):
+    def get_quarterly_target_current(self, current_date, achieved_to_date=None):
         if not self.quarterly_target:
             return 0
 
@@ -133,10 +139,11 @@ class SalesTargets(Document):
         else:
             quarters_elapsed = self.count_quarters_between(start_date, current_quarter_start) + 1
 
-        achieved_to_date = self.get_achieved_between(start_date, current_date)
+        if achieved_to_date is None:
+            achieved_to_date = self.get_achieved_between(start_date, current_date)
         return max(0, flt(self.quarterly_target) * quarters_elapsed - achieved_to_date)
 
-    def get_yearly_target_current(self, current_date):
+    def get_yearly_target_current(self, current_date, achieved_to_date=None):
         if not self.yearly_target:
             return 0
 
@@ -147,7 +154,8 @@ class SalesTargets(Document):
         else:
             years_elapsed = current_year_start.year - start_date.year + 1
 
-        achieved_to_date = self.get_achieved_between(start_date, current_date)
+        if achieved_to_date is None:
+            achieved_to_date = self.get_achieved_between(start_date, current_date)
         return max(0, flt(self.yearly_target) * years_elapsed - achieved_to_date)
 
     def count_months_between(self, start_date, end_date):
@@ -165,105 +173,109 @@ class SalesTargets(Document):
         return datetime.date(current.year, quarter_month, 1)
 
     def count_working_days(self, start_date, end_date):
-        start = getdate(start_date)
-        end = getdate(end_date)
-        if end < start:
-            return 0
-
-        holidays = set(self.get_holidays_between(start, end))
-        days = 0
-        current = start
-        while current <= end:
-            if current.weekday() != 6 and current not in holidays:
-                days += 1
-            current = add_days(current, 1)
-        return days
+        return get_working_calendar(self.get_holiday_list()).count_working_days(start_date, end_date)
 
     def get_holidays_between(self, start_date, end_date):
-        if not HOLIDAY_LIST_NAME:
-            return []
+        return get_working_calendar(self.get_holiday_list()).get_holidays_between(start_date, end_date)
 
-        return frappe.get_all(
-            "Holiday",
-            filters={
-                "parent": HOLIDAY_LIST_NAME,
-                "holiday_date": ("between", [start_date, end_date]),
-            },
-            pluck="holiday_date",
-        )
+    def get_holiday_list(self):
+        return resolve_holiday_list(company=self.company, employee=self.employee)
 
     def get_achieved_between(self, start_date, end_date):
         if not start_date or not end_date:
             return 0
 
-        if self.target_level == "Company":
-            return self.get_company_achieved_between(start_date, end_date)
-        if self.target_level == "Department":
-            return self.get_department_achieved_between(start_date, end_date)
-        if self.target_level == "Individual":
-            return self.get_individual_achieved_between(start_date, end_date)
-        return 0
-
-    def get_company_achieved_between(self, start_date, end_date):
-        conditions = ["docstatus = 1", "posting_date between %s and %s"]
-        values = [start_date, end_date]
-        if self.company:
-            conditions.append("company = %s")
-            values.append(self.company)
-
-        query = f"""
-            select sum(coalesce(grand_total, 0))
-            from `tabSales Invoice`
-            where {' and '.join(conditions)}
-        """
-        return flt(frappe.db.sql(query, values)[0][0])
-
-    def get_department_achieved_between(self, start_date, end_date):
-        if not self.department:
-            return 0
-
-        employees = frappe.get_all(
-            "Employee",
-            filters={"department": self.department},
-            pluck="name",
+        start = getdate(start_date)
+        end = getdate(end_date)
+        within_period = (
+            self.start_date
+            and self.end_date
+            and getdate(self.start_date) <= start
+            and end <= getdate(self.end_date)
         )
-        if not employees:
-            return 0
+        if within_period:
+            series = self.get_achieved_series()
+        else:
+            series = self.query_achieved_series(start, end)
 
-        sales_people = frappe.get_all(
-            "Sales Person",
-            filters={"employee": ("in", employees)},
-            pluck="name",
-        )
-        return self.get_sales_team_achieved_between(start_date, end_date, sales_people)
+        return flt(sum(amount for posting_date, amount in series if start <= posting_date <= end))
 
-    def get_individual_achieved_between(self, start_date, end_date):
-        if not self.employee:
-            return 0
+    def get_achieved_series(self):
+        """Achieved amount per posting date across the target period, fetched once per scope."""
+        if not self.start_date or not self.end_date:
+            return []
 
-        sales_person = frappe.get_value("Sales Person", {"employee": self.employee})
-        return self.get_sales_team_achieved_between(
-            start_date,
-            end_date,
-            [sales_person] if sales_person else [],
+        if getattr(self, "_achieved_series_key", None) != self._get_series_key():
+            self.set_achieved_series(
+                self.query_achieved_series(getdate(self.start_date), getdate(self.end_date))
+            )
+        return self._achieved_series
+
+    def set_achieved_series(self, series):
+        """Seed the per-date series, e.g. from the bulk refresher, so no query is needed."""
+        self._achieved_series = series
+        self._achieved_series_key = self._get_series_key()
+
+    def _get_series_key(self):
+        return (
+            self.target_level,
+            self.company,
+            self.department,
+            self.employee,
+            str(self.start_date),
+            str(self.end_date),
         )
 
-    def get_sales_team_achieved_between(self, start_date, end_date, sales_people):
-        if not sales_people:
-            return 0
+    def query_achieved_series(self, start_date, end_date):
+        params = {"from_date": start_date, "to_date": end_date}
+        if self.target_level == "Company":
+            company_condition = ""
+            if self.company:
+                company_condition = "and si.company = %(company)s"
+                params["company"] = self.company
+            query = f"""
+                select si.posting_date, sum(coalesce(si.grand_total, 0))
+                from `tabSales Invoice` si
+                where si.docstatus = 1
+                  and si.posting_date between %(from_date)s and %(to_date)s
+                  {company_condition}
+                group by si.posting_date
+            """
+        elif self.target_level == "Department":
+            if not self.department:
+                return []
+            params["department"] = self.department
+            query = self._sales_team_series_query(
+                "join `tabEmployee` emp on emp.name = sp.employee",
+                "emp.department = %(department)s",
+            )
+        elif self.target_level == "Individual":
+            if not self.employee:
+                return []
+            params["employee"] = self.employee
+            query = self._sales_team_series_query("", "sp.employee = %(employee)s")
+        else:
+            return []
+
+        return [
+            (getdate(posting_date), flt(amount))
+            for posting_date, amount in frappe.db.sql(query, params)
+        ]
 
-        placeholders = ", ".join(["%s"] * len(sales_people))
-        values = [start_date, end_date, *sales_people]
-        query = f"""
-            select sum(coalesce(st.allocated_amount, 0))
+    @staticmethod
+    def _sales_team_series_query(extra_join, scope_condition):
+        return f"""
+            select si.posting_date, sum(coalesce(st.allocated_amount, 0))
             from `tabSales Team` st
             join `tabSales Invoice` si on si.name = st.parent
+            join `tabSales Person` sp on sp.name = st.sales_person
+            {extra_join}
             where st.parenttype = 'Sales Invoice'
               and si.docstatus = 1
-              and si.posting_date between %s and %s
-              and st.sales_person in ({placeholders})
+              and si.posting_date between %(from_date)s and %(to_date)s
+              and {scope_condition}
+            group by si.posting_date
         """
-        return flt(frappe.db.sql(query, values)[0][0])
 
     @staticmethod
     def calculate_progress(achieved, target):
@@ -0,0 +1,154 @@
+import datetime
+
+import frappe
+from frappe.utils import getdate
+
+# Used when neither the employee, the company nor the dashboard settings name a holiday list.
+HOLIDAY_LIST_NAME = "Kenya Holiday list 2026"
+HOLIDAY_CACHE_KEY = "sales_performance_dashboard:holiday_dates"
+WEEKLY_OFF_DAYS = (6,)
+
+
+class WorkingDayCalendar:
+    """Working-day counts over a prefix-sum array; each query is O(1) once the span is built."""
+
+    def __init__(self, holiday_list=None, holidays=()):
+        self.holiday_list = holiday_list
+        self.holidays = frozenset(getdate(day) for day in holidays)
+        self._origin = None
+        self._prefix = [0]
+
+    def count_working_days(self, start_date, end_date):
+        start = getdate(start_date)
+        end = getdate(end_date)
+        if end < start:
+            return 0
+
+        self._ensure_span(start, end)
+        return self._prefix[(end - self._origin).days + 1] - self._prefix[(start - self._origin).days]
+
+    def get_holidays_between(self, start_date, end_date):
+        start = getdate(start_date)
+        end = getdate(end_date)
+        return sorted(day for day in self.holidays if start <= day <= end)
+
+    def is_working_day(self, day):
+        day = getdate(day)
+        return day.weekday() not in WEEKLY_OFF_DAYS and day not in self.holidays
+
+    def _ensure_span(self, start, end):
+        if self._origin is not None:
+            last = self._origin + datetime.timedelta(days=len(self._prefix) - 2)
+            if self._origin <= start and end <= last:
+                return
+            start = min(start, self._origin)
+            end = max(end, last)
+
+        # Build whole years so neighbouring targets reuse the same array.
+        origin = datetime.date(start.year, 1, 1)
+        last = datetime.date(end.year, 12, 31)
+        prefix = [0]
+        day = origin
+        one_day = datetime.timedelta(days=1)
+        while day <= last:
+            prefix.append(prefix[-1] + (1 if self.is_working_day(day) else 0))
+            day += one_day
+
+        self._origin = origin
+        self._prefix = prefix
+
+
+def get_working_calendar(holiday_list=None):
+    """Calendar for a holiday list, memoized for the current request/job."""
+    calendars = _get_local_memo("spd_working_calendars")
+    key = holiday_list or ""
+    if key not in calendars:
+        calendars[key] = WorkingDayCalendar(holiday_list, get_holiday_dates(holiday_list))
+    return calendars[key]
+
+
+def get_holiday_dates(holiday_list):
+    if not holiday_list:
+        return []
+
+    dates = frappe.cache().hget(
+        HOLIDAY_CACHE_KEY,
+        holiday_list,
+        lambda: [
+            str(day)
+            for day in frappe.get_all(
+                "Holiday",
+                filters={"parent": holiday_list},
+                pluck="holiday_date",
+            )
+        ],
+    )
+    return [getdate(day) for day in dates or []]
+
+
+def resolve_holiday_list(company=None, employee=None):
+    """Employee holiday list, then the company default, then settings, then the fallback."""
+    resolved = _get_local_memo("spd_resolved_holiday_lists")
+    key = (company or "", employee or "")
+    if key in resolved:
+        return resolved[key]
+
+    holiday_list = None
+    if employee:
+        employee_rows = _get_local_memo("spd_employee_holiday_rows")
+        if employee not in employee_rows:
+            employee_rows[employee] = frappe.db.get_value(
+                "Employee", employee, ["holiday_list", "company"], as_dict=True
+            )
+        employee_row = employee_rows[employee]
+        if employee_row:
+            holiday_list = employee_row.holiday_list
+            company = company or employee_row.company
+
+    if not holiday_list and company:
+        holiday_list = frappe.get_cached_value("Company", company, "default_holiday_list")
+
+    if not holiday_list:
+        from sales_performance_dashboard.api.access_settings import get_default_holiday_list
+
+        holiday_list = get_default_holiday_list() or HOLIDAY_LIST_NAME
+
+    resolved[key] = holiday_list
+    return holiday_list
+
+
+def preload_employee_holiday_lists(employees):
+    """Load holiday list and company for many employees in one query.
+
+    Seeds the memo `resolve_holiday_list` reads, so a batch of targets does not
+    look up its employees one by one.
+    """
+    employee_rows = _get_local_memo("spd_employee_holiday_rows")
+    missing = list({employee for employee in employees if employee and employee not in employee_rows})
+    if not missing:
+        return
+
+    for employee in missing:
+        employee_rows[employee] = None
+    for row in frappe.get_all(
+        "Employee",
+        filters={"name": ("in", missing)},
+        fields=["name", "holiday_list", "company"],
+    ):
+        employee_rows[row.name] = frappe._dict(holiday_list=row.holiday_list, company=row.company)
+
+
+def clear_holiday_cache(doc, method=None):
+    """Drop cached holidays when a Holiday List is saved or deleted."""
+    frappe.cache().hdel(HOLIDAY_CACHE_KEY, doc.name)
+    for attr in ("spd_working_calendars", "spd_resolved_holiday_lists", "spd_employee_holiday_rows"):
+        if hasattr(frappe.local, attr):
+            delattr(frappe.local, attr)
+
+
+def _get_local_memo(attr):
+    memo = getattr(frappe.local, attr, None)
+    if memo is None:
+        memo = {}
+        setattr(frappe.local, attr, memo)
+    return memo
@@ -0,0 +1,144 @@
+import datetime
+from collections import defaultdict
+
+import frappe
+from frappe.utils import add_days, add_months, get_first_day, getdate
+
+from sales_performance_dashboard.sales_performance_dashboard.doctype.sales_targets.bulk_refresh import (
+    build_series_index,
+)
+from sales_performance_dashboard.sales_performance_dashboard.report.sales_performance_snapshot.sales_performance_snapshot import (
+    DEPARTMENTS,
+    calculate_progress,
+    get_period_range,
+    get_target_period_values,
+    load_targets,
+)
+
+# Each period adds three columns; keeps Daily/Weekly matrices readable.
+MAX_MATRIX_PERIODS = 62
+
+
+def execute(filters=None):
+    filters = filters or {}
+    return get_matrix(filters, filters.get("period") or "Monthly")
+
+
+def get_matrix(filters, period):
+    """Target, achieved and progress for every period between two dates, one column group per period.
+
+    Targets are loaded once and achieved amounts aggregated once over the whole
+    range; each cell then reads the same values a single-period run would.
+    """
+    from_date = getdate(filters.get("from_date") or get_first_day(add_months(datetime.date.today(), -11)))
+    to_date = getdate(filters.get("to_date") or datetime.date.today())
+    if to_date < from_date:
+        frappe.throw("To Date must be on or after From Date.")
+
+    periods = get_periods(period, from_date, to_date)
+    if len(periods) > MAX_MATRIX_PERIODS:
+        frappe.throw(
+            f"{len(periods)} {period} periods selected; the matrix shows at most {MAX_MATRIX_PERIODS}. "
+            "Pick a longer period or a shorter date range."
+        )
+
+    target_level = filters.get("target_level") or "Company"
+    if target_level == "Department":
+        department = filters.get("department")
+        targets = load_targets({"target_level": "Individual", "department": department}) if department else []
+    else:
+        targets = load_targets({"target_level": "Department", "department": ("in", DEPARTMENTS)})
+    index = build_series_index(targets, periods[0][0], periods[-1][1])
+
+    if target_level == "Department":
+        rows = [
+            {
+                "sales_target": target.name,
+                "target_level": target.target_level,
+                "department": target.department,
+                "employee": target.employee,
+                "targets": [target],
+            }
+            for target in targets
+        ]
+    else:
+        by_department = defaultdict(list)
+        for target in targets:
+            by_department[target.department].append(target)
+        rows = [
+            {
+                "sales_target": "",
+                "target_level": "Department",
+                "department": department,
+                "employee": "",
+                "targets": by_department[department],
+            }
+            for department in DEPARTMENTS
+        ]
+
+    totals = {"sales_target": "", "target_level": "Total", "department": "Total", "employee": ""}
+    for start, end, _label in periods:
+        key = start.strftime("%Y%m%d")
+        total_target = total_achieved = 0
+        for row in rows:
+            target_value = achieved = 0
+            for target in row["targets"]:
+                _, _, value, amount = get_target_period_values(target, index, period, start, end)
+                target_value += value
+                achieved += amount
+            row[f"target_{key}"] = target_value
+            row[f"achieved_{key}"] = achieved
+            row[f"progress_{key}"] = calculate_progress(achieved, target_value)
+            total_target += target_value
+            total_achieved += achieved
+        totals[f"target_{key}"] = total_target
+        totals[f"achieved_{key}"] = total_achieved
+        totals[f"progress_{key}"] = calculate_progress(total_achieved, total_target)
+
+    for row in rows:
+        del row["targets"]
+    if rows:
+        rows.append(totals)
+
+    return get_matrix_columns(periods), rows
+
+
+def get_matrix_columns(periods):
+    columns = [
+        {"label": "Sales Target", "fieldname": "sales_target", "fieldtype": "Link", "options": "Sales Targets", "width": 160},
+        {"label": "Target Level", "fieldname": "target_level", "fieldtype": "Data", "width": 120},
+        {"label": "Department", "fieldname": "department", "fieldtype": "Link", "options": "Department", "width": 140},
+        {"label": "Employee", "fieldname": "employee", "fieldtype": "Link", "options": "Employee", "width": 140},
+    ]
+    for start, _end, label in periods:
+        key = start.strftime("%Y%m%d")
+        columns.extend(
+            [
+                {"label": f"{label} Target", "fieldname": f"target_{key}", "fieldtype": "Currency", "width": 120},
+                {"label": f"{label} Achieved", "fieldname": f"achieved_{key}", "fieldtype": "Currency", "width": 120},
+                {"label": f"{label} Progress (%)", "fieldname": f"progress_{key}", "fieldtype": "Percent", "width": 110},
+            ]
+        )
+    return columns
+
+
+def get_periods(period, from_date, to_date):
+    """(start, end, label) for every period touching from_date..to_date."""
+    periods = []
+    start, end = get_period_range(period, from_date)
+    while start <= to_date:
+        periods.append((start, end, get_period_label(period, start)))
+        start, end = get_period_range(period, add_days(end, 1))
+    return periods
+
+
+def get_period_label(period, start):
+    if period == "Weekly":
+        return f"Week of {start.strftime('%d %b %Y')}"
+    if period == "Monthly":
+        return start.strftime("%b %Y")
+    if period == "Quarterly":
+        return f"Q{(start.month - 1) // 3 + 1} {start.year}"
+    if period == "Yearly":
+        return str(start.year)
+    return start.strftime("%d %b %Y")
@@ -1,8 +1,15 @@
 import datetime
+from collections import defaultdict
 
 import frappe
 from frappe.utils import add_days, add_months, flt, get_first_day, get_last_day, getdate
 
+from sales_performance_dashboard.sales_performance_dashboard.doctype.sales_targets.bulk_refresh import (
+    TARGET_FIELDS,
+    build_series_index,
+    scope_key,
+)
+
 DEPARTMENTS = [
     "Trading Division - NAL",
     "Industrial Division - NAL",
@@ -50,17 +57,19 @@ def get_snapshot_rows(filters, period, period_start, period_end):
 
 
 def get_company_rows(period, period_start, period_end):
+    targets = load_targets({"target_level": "Department", "department": ("in", DEPARTMENTS)})
+    index = build_series_index(targets, period_start, period_end)
+    by_department = defaultdict(lambda: {"target_value": 0, "achieved": 0})
+    for target in targets:
+        _, _, target_value, achieved = get_target_period_values(target, index, period, period_start, period_end)
+        by_department[target.department]["target_value"] += target_value
+        by_department[target.department]["achieved"] += achieved
+
     rows = []
     totals = {"target_value": 0, "achieved": 0}
     for department in DEPARTMENTS:
-        targets = frappe.get_all(
-            "Sales Targets",
-            filters={"target_level": "Department", "department": department},
-            fields=["name"],
-        )
-        target_value, achieved = (0, 0)
-        if targets:
-            target_value, achieved = sum_targets_for_period(targets, period, period_start, period_end)
+        target_value = by_department[department]["target_value"]
+        achieved = by_department[department]["achieved"]
         totals["target_value"] += target_value
         totals["achieved"] += achieved
         rows.append(
@@ -87,27 +96,23 @@ def get_department_rows(filters, period, period_start, period_end):
     department = filters.get("department")
     if not department:
         return []
-    targets = frappe.get_all(
-        "Sales Targets",
-        filters={"target_level": "Individual", "department": department},
-        fields=["name"],
-    )
+    targets = load_targets({"target_level": "Individual", "department": department})
+    index = build_series_index(targets, period_start, period_end)
     rows = []
     totals = {"target_value": 0, "achieved": 0}
-    for row in targets:
-        doc = frappe.get_doc("Sales Targets", row.name)
-        target_value = get_target_value(doc, period) or 0
-        start, end = clamp_period(doc, period_start, period_end)
-        achieved = doc.get_achieved_between(start, end) if start and end else 0
+    for target in targets:
+        start, end, target_value, achieved = get_target_period_values(
+            target, index, period, period_start, period_end
+        )
         totals["target_value"] += target_value
         totals["achieved"] += achieved
         rows.append(
             {
-                "sales_target": doc.name,
-                "target_level": doc.target_level,
-                "company": doc.company,
-                "department": doc.department,
-                "employee": doc.employee,
+                "sales_target": target.name,
+                "target_level": target.target_level,
+                "company": target.company,
+                "department": target.department,
+                "employee": target.employee,
                 "period": period,
                 "period_start": start,
                 "period_end": end,
@@ -121,17 +126,17 @@ def get_department_rows(filters, period, period_start, period_end):
     return rows
 
 
-def sum_targets_for_period(targets, period, period_start, period_end):
-    total_target = 0
-    total_achieved = 0
-    for row in targets:
-        doc = frappe.get_doc("Sales Targets", row.name)
-        target_value = get_target_value(doc, period) or 0
-        start, end = clamp_period(doc, period_start, period_end)
-        achieved = doc.get_achieved_between(start, end) if start and end else 0
-        total_target += target_value
-        total_achieved += achieved
-    return total_target, total_achieved
+def load_targets(filters):
+    """Every target the report needs in one query; no per-target get_doc."""
+    return frappe.get_all("Sales Targets", filters=filters, fields=TARGET_FIELDS)
+
+
+def get_target_period_values(target, index, period, period_start, period_end):
+    """(start, end, target value, achieved) of a target within the period, read from the index."""
+    target_value = get_target_value(target, period) or 0
+    start, end = clamp_period(target, period_start, period_end)
+    achieved = index.get_total(scope_key(target), start, end) if start and end else 0
+    return start, end, target_value, achieved
 
 
 def build_total_row(period, period_start, period_end, totals):
@@ -1,30 +1,72 @@
+import time
+
 import frappe
+from frappe.utils import add_months, get_first_day, now_datetime, nowdate
+
+from sales_performance_dashboard.api import sales_facts
+from sales_performance_dashboard.events import add_dirty_targets, pop_dirty_targets
+from sales_performance_dashboard.sales_performance_dashboard.doctype.sales_targets.bulk_refresh import (
+    recompute_sales_targets,
+)
+
+REFRESH_STATS_KEY = "sales_performance_dashboard:sales_targets_refresh_stats"
 
 
 def update_sales_targets():
-    targets = frappe.get_all("Sales Targets", pluck="name")
-    if not targets:
-        return
-
-    for name in targets:
-        doc = frappe.get_doc("Sales Targets", name)
-        doc.set_achieved_total()
-        doc.set_carryover_targets()
-        doc.update_progress_fields()
-        frappe.db.set_value(
-            "Sales Targets",
-            name,
-            {
-                "achieved_total": doc.achieved_total,
-                "daily_target_current": doc.daily_target_current,
-                "monthly_target_current": doc.monthly_target_current,
-                "quarterly_target_current": doc.quarterly_target_current,
-                "yearly_target_current": doc.yearly_target_current,
-                "yearly_progress": doc.yearly_progress,
-                "quarterly_progress": doc.quarterly_progress,
-                "monthly_progress": doc.monthly_progress,
-                "weekly_progress": doc.weekly_progress,
-                "daily_progress": doc.daily_progress,
-            },
-            update_modified=False,
-        )
+    """Recompute only the targets marked dirty by Sales Invoice submit/cancel."""
+    return refresh_sales_targets(pop_dirty_targets(), mode="incremental")
+
+
+def reconcile_sales_targets():
+    """Full recompute of every target; catches missed events and date roll-over."""
+    return refresh_sales_targets(None, mode="full")
+
+
+def rebuild_sales_daily_facts():
+    """Nightly rebuild of the trailing REBUILD_WINDOW_MONTHS of the Sales Daily Fact rollup."""
+    started = time.monotonic()
+    from_date = get_first_day(add_months(nowdate(), -sales_facts.REBUILD_WINDOW_MONTHS))
+    rows = sales_facts.rebuild_sales_daily_facts(from_date=from_date)
+    frappe.logger("sales_performance_dashboard").info(
+        f"Sales Daily Fact rebuild: {rows} rows in {round(time.monotonic() - started, 2)}s"
+    )
+    return rows
+
+
+def refresh_sales_targets(names, mode="incremental"):
+    started = time.monotonic()
+    recomputed = 0
+    updated = 0
+    failed = 0
+    # names=None means every target (full reconcile).
+    if names is None or names:
+        try:
+            result = recompute_sales_targets(names)
+            recomputed = len(result.values)
+            updated = len(result.updated)
+        except Exception:
+            failed = len(names) if names is not None else frappe.db.count("Sales Targets")
+            frappe.log_error(title=f"Sales Targets {mode} refresh failed")
+            if mode == "incremental":
+                add_dirty_targets(names)
+
+    stats = {
+        "mode": mode,
+        "recomputed": recomputed,
+        "updated": updated,
+        "failed": failed,
+        "duration_ms": round((time.monotonic() - started) * 1000, 2),
+        "ran_at": str(now_datetime()),
+    }
+    frappe.cache().set_value(f"{REFRESH_STATS_KEY}:{mode}", stats)
+    if recomputed or failed:
+        frappe.logger("sales_performance_dashboard").info(f"Sales Targets refresh: {stats}")
+    return stats
+
+
+def get_refresh_stats():
+    cache = frappe.cache()
+    return {
+        "incremental": cache.get_value(f"{REFRESH_STATS_KEY}:incremental"),
+        "full": cache.get_value(f"{REFRESH_STATS_KEY}:full"),
+    }